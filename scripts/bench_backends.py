@@ -0,0 +1,68 @@
+"""
+Benchmark dos backends de leitura de PDF (services.pdf_backends).
+
+Extrai o mesmo conjunto de faturas sintéticas (2025/2026, normais e densas)
+com cada backend, confere que os registros extraídos são idênticos e
+mostra a mediana por fatura e a vazão em PDFs/s.
+
+Uso:
+    python scripts/bench_backends.py [--rounds 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import build_text_pdf, invoice_lines
+
+from services.extractor import extract_raw_data
+from services.pdf_backends import BACKENDS
+
+
+def build_corpus(folder):
+    paths = []
+    for year in (2025, 2026):
+        for dense in (False, True):
+            name = f"{year}{'-densa' if dense else ''}.pdf"
+            paths.append(build_text_pdf(os.path.join(folder, name), invoice_lines(year, dense)))
+    return paths
+
+
+def run(paths, backend):
+    times = []
+    for _ in range(ARGS.rounds):
+        for path in paths:
+            start = time.perf_counter()
+            extract_raw_data(path, backend=backend)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, len(times) / sum(times)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        paths = build_corpus(folder)
+
+        reference = [extract_raw_data(path, backend="pdfplumber") for path in paths]
+        for name in BACKENDS:
+            assert [extract_raw_data(path, backend=name) for path in paths] == reference, name
+
+        results = {name: run(paths, name) for name in BACKENDS}
+
+    baseline = results["pdfplumber"][1]
+    print(f"faturas: {len(paths)} x {ARGS.rounds} rodadas (registros idênticos)")
+    print(f"{'backend':>12} {'mediana':>10} {'PDFs/s':>9} {'speedup':>8}")
+    for name, (median_ms, per_second) in results.items():
+        print(f"{name:>12} {median_ms:>7.1f} ms {per_second:>9.1f} {per_second / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10)
+    ARGS = parser.parse_args()
+    main()
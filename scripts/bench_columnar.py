@@ -0,0 +1,96 @@
+"""
+Benchmark do acumulador colunar (ColumnBuffer) na montagem dos DataFrames.
+
+Antes: cada linha virava um dict, cada fatura virava dois DataFrames
+(pd.DataFrame(lista de dicts)) e o lote era concatenado no fim.
+Depois: as linhas entram como tuplas nas colunas do ColumnBuffer e
+frames_from_raw_batch monta um único par de DataFrames para o lote.
+
+Mede tempo e pico de alocação (tracemalloc) para um lote de faturas
+extraídas do corpus sintético.
+
+Uso:
+    python scripts/bench_columnar.py [--invoices 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import generate_corpus
+
+from services.extractor import (
+    VALUE_FIELDS,
+    extract_raw_data,
+    frames_from_raw_batch,
+    parse_br_numeric,
+)
+
+
+def legacy_frames(raw_data):
+    """Caminho anterior: lista de dicts -> DataFrame por fatura."""
+    items = [dict(row) for row in raw_data["items"]]
+    df_fin = pd.DataFrame(items)
+    df_fin["mes_referencia"] = raw_data["reference"]
+    df_fin["numero_cliente"] = raw_data["client_id"]
+    for col in VALUE_FIELDS:
+        df_fin[col] = parse_br_numeric(df_fin[col]).fillna(0)
+
+    df_med = pd.DataFrame([dict(row) for row in raw_data["measurement"]])
+    df_med["mes_referencia"] = raw_data["reference"]
+    df_med["numero_cliente"] = raw_data["client_id"]
+    return df_fin, df_med
+
+
+def legacy_batch(raw_batch):
+    frames = [legacy_frames(raw_data) for raw_data in raw_batch]
+    return (
+        pd.concat([fin for fin, _ in frames], ignore_index=True),
+        pd.concat([med for _, med in frames], ignore_index=True),
+    )
+
+
+def measure(func, raw_batch):
+    # Tempo e alocação em execuções separadas: o tracemalloc distorce o tempo
+    start = time.perf_counter()
+    df_fin, _ = func(raw_batch)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(raw_batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024, len(df_fin)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        corpus = generate_corpus(folder, count=20, seed=1)
+        samples = [extract_raw_data(invoice["path"]) for invoice in corpus]
+
+    raw_batch = [samples[i % len(samples)] for i in range(ARGS.invoices)]
+
+    before = measure(legacy_batch, raw_batch)
+    after = measure(frames_from_raw_batch, raw_batch)
+    assert before[2] == after[2]
+
+    print(f"lote: {ARGS.invoices} faturas, {after[2]} itens financeiros")
+    print(f"{'':>10} {'tempo':>10} {'pico alocado':>14}")
+    print(f"{'antes':>10} {before[0]:>7.1f} ms {before[1]:>10.0f} KiB")
+    print(f"{'depois':>10} {after[0]:>7.1f} ms {after[1]:>10.0f} KiB")
+    print(f"{'ganho':>10} {before[0] / after[0]:>9.1f}x {before[1] / after[1]:>13.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--invoices", type=int, default=500)
+    ARGS = parser.parse_args()
+    main()
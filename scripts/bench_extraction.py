@@ -0,0 +1,219 @@
+"""
+Benchmark da extração de faturas sobre um lote sintético.
+
+Gera um lote variado de faturas 2025/2026 (scripts/synthetic_invoices.py),
+mede cada PDF várias vezes e reporta p50/p95 de latência e PDFs/s para:
+
+- extract_data_from_pdf (fatura inteira, de ponta a ponta)
+- _detect_invoice_year e select_parser (sobre o fingerprint, sem layout)
+- cada etapa do parser: abertura/decifragem, fingerprint, texto com layout,
+  referência/cliente, medição, linhas financeiras, itens financeiros
+  (inclui as linhas) e montagem dos DataFrames
+
+O resultado é gravado em JSON (com o commit atual) para comparar versões:
+    python scripts/bench_extraction.py --output bench/antes.json
+    ... alterações ...
+    python scripts/bench_extraction.py --output bench/depois.json --compare bench/antes.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import generate_corpus
+
+from services.extractor import (
+    PARSER_VERSION,
+    ParseContext,
+    _detect_invoice_year,
+    extract_data_from_pdf,
+    frames_from_raw_data,
+    select_parser,
+)
+from services.pdf_backends import BACKENDS, DEFAULT_BACKEND
+
+METRICS = [
+    "extract_data_from_pdf",
+    "detect_invoice_year",
+    "select_parser",
+    "open",
+    "fingerprint",
+    "layout_text",
+    "reference_client",
+    "measurement",
+    "financial_lines",
+    "financial_items",
+    "dataframes",
+]
+
+
+def timed(timings, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[name].append(time.perf_counter() - start)
+    return result
+
+
+def measure_invoice(invoice, backend, timings):
+    path, password = invoice["path"], invoice["password"]
+
+    timed(timings, "extract_data_from_pdf", extract_data_from_pdf, path, password, backend)
+
+    context = timed(timings, "open", ParseContext, path, password, backend)
+    with context:
+        fingerprint = timed(timings, "fingerprint", lambda: context.fingerprint)
+        timed(timings, "detect_invoice_year", _detect_invoice_year, context)
+        parser_cls = timed(timings, "select_parser", select_parser, fingerprint)
+
+        text = timed(timings, "layout_text", lambda: context.layout_text)
+        parser = parser_cls(path, password)
+        reference, client_id = timed(
+            timings, "reference_client",
+            lambda: (parser._extract_reference(text), parser._extract_client_id(text)),
+        )
+        measurement = timed(timings, "measurement", parser._extract_measurement_section, context)
+        timed(timings, "financial_lines", parser._get_financial_lines, context)
+        items = timed(timings, "financial_items", parser._extract_financial_items, context)
+
+    raw_data = {
+        "reference": reference,
+        "client_id": client_id,
+        "items": items,
+        "measurement": measurement,
+    }
+    timed(timings, "dataframes", frames_from_raw_data, raw_data)
+    return raw_data
+
+
+def percentile(values, pct):
+    """Percentil com interpolação linear (mesmo critério do numpy)."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples):
+    return {
+        "n": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "pdfs_per_second": len(samples) / sum(samples) if sum(samples) else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(count, rounds, seed, backend, password_ratio):
+    timings = {name: [] for name in METRICS}
+    with tempfile.TemporaryDirectory() as folder:
+        corpus = generate_corpus(
+            folder, count, seed, password="12345", password_ratio=password_ratio
+        )
+
+        # Aquecimento + checagem: o lote tem que ser extraído corretamente
+        for invoice in corpus:
+            raw_data = measure_invoice(invoice, backend, {name: [] for name in METRICS})
+            assert raw_data["reference"] == invoice["reference"], invoice["path"]
+            assert len(raw_data["items"]) == invoice["items"], invoice["path"]
+
+        for _ in range(rounds):
+            for invoice in corpus:
+                measure_invoice(invoice, backend, timings)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parser_version": PARSER_VERSION,
+        "backend": backend,
+        "corpus": {
+            "invoices": count,
+            "rounds": rounds,
+            "seed": seed,
+            "years": sorted({invoice["year"] for invoice in corpus}),
+            "dense": sum(invoice["dense"] for invoice in corpus),
+            "password_protected": sum(bool(invoice["password"]) for invoice in corpus),
+        },
+        "metrics": {name: summarize(samples) for name, samples in timings.items()},
+    }
+
+
+def print_report(result, baseline=None):
+    corpus = result["corpus"]
+    print(
+        f"commit {result['commit']} | backend {result['backend']} | "
+        f"{corpus['invoices']} faturas x {corpus['rounds']} rodadas "
+        f"({corpus['dense']} densas, {corpus['password_protected']} com senha)"
+    )
+    header = f"{'etapa':>22} {'p50 ms':>9} {'p95 ms':>9} {'PDFs/s':>9}"
+    if baseline:
+        header += f" {'vs ' + baseline['commit']:>14}"
+    print(header)
+
+    for name, stats in result["metrics"].items():
+        row = (
+            f"{name:>22} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['pdfs_per_second']:>9.1f}"
+        )
+        previous = baseline and baseline["metrics"].get(name)
+        if previous and stats["p50_ms"]:
+            row += f" {previous['p50_ms'] / stats['p50_ms']:>13.2f}x"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--invoices", type=int, default=20, help="Faturas no lote.")
+    parser.add_argument("--rounds", type=int, default=5, help="Medições por fatura.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument(
+        "--password-ratio", type=float, default=0.25,
+        help="Fração das faturas protegidas por senha.",
+    )
+    parser.add_argument("--output", help="Grava o resultado em JSON neste caminho.")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar o p50.")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        args.invoices, args.rounds, args.seed, args.backend, args.password_ratio
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Resultado gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Micro-benchmark do parser de linhas financeiras.
+
+Compara, linha a linha, a implementação anterior (regex passados como
+string a cada chamada + um `in` por termo de IGNORED_TERMS) com a atual
+(padrões pré-compilados + filtro de ruído em uma única passada).
+
+Uso:
+    python scripts/bench_line_parser.py [--repeat 2000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.extractor import (
+    HISTORY_REGEX,
+    IGNORED_TERMS,
+    JUNK_DESCRIPTIONS,
+    Parser2025,
+    normalize_negative_value,
+)
+
+# Linhas típicas extraídas de faturas 2025/2026 (itens, ruído e histórico)
+CORPUS = [
+    "Energia Ativa Fornecida kWh 477,00 0,55 262,35 5,20 262,35 20,00 52,47 0,45",
+    "Energia Atv Inj. oUC mPT kWh 312,00 0,55 171,60- 3,40- 171,60 20,00 34,32- 0,45",
+    "Consumo Energia Ativa TE kWh 477,00 0,31 147,87 2,93 147,87 20,00 29,57 0,25",
+    "Adicional Bandeira Amarela kWh 477,00 0,02 9,54 0,19 9,54 20,00 1,91 0,01",
+    "CIP Municipal 23,01",
+    "Bonus Itaipu 19,52-",
+    "Juros Moratórios 1,23 ICMS",
+    "Multa 5,25 DE FATURAMENTO",
+    "TRIBUTOS ALÍQUOTA BASE DE CÁLCULO VALOR",
+    "PIS/PASEP 0,95% 262,35 2,49",
+    "ICMS UNIT 20,00",
+    "CONSUMO FATURADO kWh 477",
+    "AGO25 477.00 30 LID",
+    "SET25 510.00 31 LID",
+    "262,35 52,47",
+    "123456789 CONTA CONTRATO",
+    "DADOS DE MEDIÇÃO",
+    "SALDO ANTERIOR 12,00",
+    "PIS 2,49",
+    "JAN/2025 480",
+]
+
+
+def legacy_clean_line(line):
+    history_pattern = (
+        r"\s(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)[\s\/]*\d{2,4}.*$"
+    )
+    cleaned_line = re.sub(history_pattern, "", line, flags=re.IGNORECASE).strip()
+    if not cleaned_line:
+        return None
+    unit_match = re.search(
+        r"^(.*?)\s+(kWh|kW|dias|unid|un)\s+(.*)$", cleaned_line, re.IGNORECASE
+    )
+    if unit_match:
+        return {
+            "description": unit_match.group(1).strip(),
+            "unit": unit_match.group(2).strip(),
+            "values_str": unit_match.group(3).strip(),
+            "type": "standard",
+        }
+    number_match = re.search(r"^(.*?)\s+(\d+[.,]\d{2}.*)$", cleaned_line)
+    if number_match:
+        return {
+            "description": number_match.group(1).strip(),
+            "unit": "",
+            "values_str": number_match.group(2).strip(),
+            "type": "simple",
+        }
+    return None
+
+
+def legacy_process_values(values_str, item_type):
+    clean_values = re.sub(
+        r"\s(I\s?CMS|LID|DE|FATURAMENTO|TRIBUTOS|COFINS|PIS).*",
+        "",
+        values_str,
+        flags=re.IGNORECASE,
+    ).strip()
+    tokens = clean_values.split()
+    tokens = [normalize_negative_value(token) for token in tokens]
+    columns = {
+        "quantidade": "",
+        "preco_unitario": "",
+        "valor_total": "",
+        "pis_cofins": "",
+        "base_calculo_icms": "",
+        "aliquota_icms": "",
+        "valor_icms": "",
+        "tarifa_unitaria": "",
+    }
+    if not tokens:
+        return columns
+    if item_type == "standard":
+        fields = list(columns)
+        if len(tokens) >= 8:
+            for i, field in enumerate(fields):
+                columns[field] = tokens[i]
+        elif len(tokens) >= 3:
+            columns["quantidade"] = tokens[0]
+            columns["preco_unitario"] = tokens[1]
+            columns["valor_total"] = tokens[2]
+            for i, val in enumerate(tokens[3:]):
+                if i < len(fields[3:]):
+                    columns[fields[3 + i]] = val
+    elif item_type == "simple":
+        columns["valor_total"] = tokens[0]
+        fields = ["pis_cofins", "base_calculo_icms", "aliquota_icms", "valor_icms"]
+        for i, val in enumerate(tokens[1:]):
+            if i < len(fields):
+                columns[fields[i]] = val
+    return columns
+
+
+def legacy_process_financial_line(clean_txt, upper_txt):
+    if any(term in upper_txt for term in IGNORED_TERMS):
+        return None
+    if re.match(r"^\d{5,}", clean_txt):
+        return None
+    if re.match(
+        r"^(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)\d{2}\s", clean_txt
+    ):
+        return None
+    if re.match(r"^\d+[.,]\d{2}\s+\d+[.,]\d{2}", clean_txt):
+        return None
+    info = legacy_clean_line(clean_txt)
+    if info and info["description"] and len(info["description"]) > 2:
+        desc_upper = info["description"].upper().strip()
+        if desc_upper in JUNK_DESCRIPTIONS:
+            return None
+        if HISTORY_REGEX.match(desc_upper):
+            return None
+        return {
+            "descricao": info["description"],
+            "unidade": info["unit"],
+            **legacy_process_values(info["values_str"], info["type"]),
+        }
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    lines = [(line, line.upper()) for line in CORPUS]
+    current = Parser2025("bench.pdf")._process_financial_line
+
+    # Sanidade: as duas versões precisam classificar o corpus igual
+    for clean_txt, upper_txt in lines:
+        assert (legacy_process_financial_line(clean_txt, upper_txt) is None) == (
+            current(clean_txt, upper_txt) is None
+        ), clean_txt
+
+    def run(func):
+        for clean_txt, upper_txt in lines:
+            func(clean_txt, upper_txt)
+
+    total_lines = len(lines) * args.repeat
+    results = {}
+    for name, func in [("anterior", legacy_process_financial_line), ("atual", current)]:
+        best = min(timeit.repeat(lambda: run(func), number=args.repeat, repeat=5))
+        results[name] = best / total_lines * 1e6
+        print(f"{name:>9}: {results[name]:.2f} µs/linha")
+
+    print(f"  speedup: {results['anterior'] / results['atual']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
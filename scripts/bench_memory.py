@@ -0,0 +1,119 @@
+"""
+Benchmark de memória da extração de PDFs com muitas páginas.
+
+Gera extratos consolidados sintéticos (uma fatura por UC, parte delas em
+duas páginas) com tamanhos crescentes e mede, em um processo novo para
+cada caso, o pico de RSS acima da linha de base e o tempo de:
+
+- extração: extract_data_from_pdf (páginas lidas uma a uma, caches de
+  cada página liberados ao avançar)
+- ingênua: pdfplumber.open + pdf.pages + extract_text(layout=True) em
+  todas as páginas (páginas e objetos do pdfminer ficam em cache)
+
+Com a leitura página a página, o pico não cresce com o documento.
+
+Uso:
+    python scripts/bench_memory.py [--pages 25 50 100 200] [--backend pdfium]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import generate_statement
+
+from services.pdf_backends import BACKENDS, DEFAULT_BACKEND
+
+MODES = ("extracao", "ingenua")
+
+
+def _rss_mib():
+    # ru_maxrss: KiB no Linux, bytes no macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _current_rss_mib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return _rss_mib()
+
+
+def run_child(mode, path, backend):
+    """Executa um caso no processo atual e imprime o resultado em JSON."""
+    import pdfplumber
+
+    from services.extractor import extract_data_from_pdf
+
+    baseline = _current_rss_mib()
+    start = time.perf_counter()
+    if mode == "extracao":
+        df_fin, _ = extract_data_from_pdf(path, backend=backend)
+        invoices = df_fin["numero_cliente"].nunique()
+    else:
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                page.extract_text(layout=True)
+        invoices = None
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "peak_mib": _rss_mib() - baseline,
+        "seconds": elapsed,
+        "invoices": invoices,
+    }))
+
+
+def measure(mode, path, backend):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, path, "--backend", backend],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.backend)
+        return
+
+    print(f"backend {args.backend}")
+    print(f"{'páginas':>8} {'faturas':>8} {'modo':>10} {'pico RSS':>11} {'tempo':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for pages in args.pages:
+            # split_ratio=0.25: ~4 faturas a cada 5 páginas
+            expected = generate_statement(
+                os.path.join(folder, "extrato.pdf"), invoices=round(pages / 1.25),
+                split_ratio=0.25,
+            )
+            path = os.path.join(folder, "extrato.pdf")
+            page_count = sum(invoice["pages"] for invoice in expected)
+
+            for mode in MODES:
+                result = measure(mode, path, args.backend)
+                if result["invoices"] is not None:
+                    assert result["invoices"] == len(expected), result
+                print(
+                    f"{page_count:>8} {len(expected):>8} {mode:>10} "
+                    f"{result['peak_mib']:>7.1f} MiB {result['seconds']:>8.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
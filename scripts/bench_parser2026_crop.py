@@ -0,0 +1,85 @@
+"""
+Benchmark do recorte por seção no Parser2026.
+
+Antes: extract_words() na página inteira + medição sobre o texto completo.
+Depois: as âncoras ("Itens de Fatura" ... "TOTAL", "Dados de Medição" ...
+"MES_ANO") são localizadas no textmap já em cache e a extração de palavras
+roda só sobre os caracteres dentro do bbox de cada seção.
+
+Mede, por fatura, a etapa de itens financeiros + medição (o texto com
+layout, compartilhado pelas duas versões, é extraído antes do cronômetro)
+e a extração completa.
+
+Uso:
+    python scripts/bench_parser2026_crop.py [--invoices 30]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import build_text_pdf, invoice_lines
+
+from services.extractor import ParseContext, Parser2026
+
+
+def stage_before(parser, context):
+    lines = parser._reconstruct_lines(context.words)
+    measurement = parser._extract_measurement(context.layout_text)
+    return lines, measurement
+
+
+def stage_after(parser, context):
+    lines = parser._get_financial_lines(context)
+    measurement = parser._extract_measurement_section(context)
+    return lines, measurement
+
+
+def run(path, stage):
+    stage_times, total_times = [], []
+    parser = Parser2026(path)
+    for _ in range(ARGS.invoices):
+        start = time.perf_counter()
+        with ParseContext(path) as context:
+            context.layout_text
+            stage_start = time.perf_counter()
+            stage(parser, context)
+            stage_times.append(time.perf_counter() - stage_start)
+        total_times.append(time.perf_counter() - start)
+    return statistics.median(stage_times) * 1000, statistics.median(total_times) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        path = build_text_pdf(os.path.join(folder, "2026.pdf"), invoice_lines(2026, dense=True))
+
+        with ParseContext(path) as context:
+            context.layout_text
+            parser = Parser2026(path)
+            before_lines, before_med = stage_before(parser, context)
+            after_lines, after_med = stage_after(parser, context)
+            # O recorte só pode remover linhas fora da tabela
+            assert [line for line in before_lines if line in after_lines] == after_lines
+            assert before_med == after_med
+
+        before = run(path, stage_before)
+        after = run(path, stage_after)
+
+    print(f"faturas 2026 (densas): {ARGS.invoices}")
+    print(f"{'':>10} {'itens+medição':>14} {'fatura inteira':>15}")
+    print(f"{'antes':>10} {before[0]:>11.1f} ms {before[1]:>12.1f} ms")
+    print(f"{'depois':>10} {after[0]:>11.1f} ms {after[1]:>12.1f} ms")
+    print(f"{'speedup':>10} {before[0] / after[0]:>13.1f}x {before[1] / after[1]:>14.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--invoices", type=int, default=30)
+    ARGS = parser.parse_args()
+    main()
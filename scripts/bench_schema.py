@@ -0,0 +1,170 @@
+"""
+Benchmark do esquema tipado da base (database/schema.py).
+
+Monta as tabelas faturas e medicao de uma carteira sintética (por padrão
+1.000 UCs com 10 anos de faturas mensais) com os tipos que a extração
+produz e compara, antes e depois de conform/to_arrow:
+
+- tamanho do Parquet em disco (um arquivo por tabela);
+- memória dos DataFrames como o app os mantém (após ler o Parquet) e o
+  tempo dessa leitura;
+- tempo dos agrupamentos do dashboard (por mês e por descrição).
+
+Uso:
+    python scripts/bench_schema.py [--clients 1000] [--years 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import EXTRA_ITEMS
+
+from database.schema import FATURAS_SCHEMA, MEDICAO_SCHEMA, conform, from_arrow, to_arrow
+
+DESCRIPTIONS = [
+    "Energia Ativa Fornecida",
+    *(description for description, _ in EXTRA_ITEMS),
+    "CIP Municipal",
+    "Bonus Itaipu",
+]
+
+
+def synthetic_tables(clients, years, seed=0):
+    """(df_faturas, df_medicao) com os dtypes de extract_data_from_pdf."""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(f"{2026 - years}-01", periods=12 * years, freq="M")
+    client_ids = [f"{7000000 + i:08d}" for i in range(clients)]
+
+    invoices = pd.MultiIndex.from_product([client_ids, months], names=["cliente", "mes"])
+    invoices = invoices.to_frame(index=False)
+    invoices["mes_referencia"] = invoices["mes"].dt.strftime("%m/%Y")
+    kwh = rng.integers(80, 2500, len(invoices)).astype(float)
+
+    # Faturas: energia, CIP e bônus sempre; adicionais em parte delas
+    items = rng.random((len(invoices), len(DESCRIPTIONS))) < 0.3
+    items[:, [0, -2, -1]] = True
+    invoice_idx, item_idx = np.nonzero(items)
+    quantity = kwh[invoice_idx]
+    price = rng.uniform(0.01, 0.8, len(invoice_idx)).round(5)
+    value = (quantity * price).round(2)
+    df_faturas = pd.DataFrame({
+        "descricao": np.array(DESCRIPTIONS, dtype=object)[item_idx],
+        "unidade": np.where(item_idx < len(DESCRIPTIONS) - 2, "kWh", ""),
+        "quantidade": quantity,
+        "preco_unitario": price,
+        "valor_total": value,
+        "pis_cofins": (value * 0.01982).round(2),
+        "base_calculo_icms": value,
+        "aliquota_icms": 20.0,
+        "valor_icms": (value * 0.2).round(2),
+        "tarifa_unitaria": (price * 0.8).round(5),
+        "mes_referencia": invoices["mes_referencia"].to_numpy()[invoice_idx],
+        "numero_cliente": invoices["cliente"].to_numpy()[invoice_idx],
+    })
+
+    start = invoices["mes"].dt.start_time
+    reading = rng.integers(1000, 90000, len(invoices)).astype(float)
+    df_medicao = pd.DataFrame({
+        "numero_medidor": "M" + invoices["cliente"].str[-6:],
+        "segmento": "Consumo Ativo",
+        "data_leitura_anterior": (start - pd.Timedelta(days=30)).dt.strftime("%d/%m/%Y"),
+        "leitura_anterior": reading,
+        "data_leitura_atual": start.dt.strftime("%d/%m/%Y"),
+        "leitura_atual": reading + kwh,
+        "fator_multiplicador": 1.0,
+        "consumo_kwh": kwh,
+        "numero_dias": rng.integers(28, 34, len(invoices)).astype(float),
+        "mes_referencia": invoices["mes_referencia"],
+        "numero_cliente": invoices["cliente"],
+    })
+    return df_faturas, df_medicao
+
+
+def write(df, path, schema=None):
+    if schema is None:
+        df.to_parquet(path, index=False)
+    else:
+        pq.write_table(to_arrow(conform(df, schema), schema), path)
+    return os.path.getsize(path)
+
+
+def read(path, schema=None):
+    """Como read_tables: DuckDB, via Arrow no esquema novo."""
+    with duckdb.connect() as con:
+        result = con.execute(f"SELECT * FROM read_parquet('{path}')")
+        return result.fetchdf() if schema is None else from_arrow(result.fetch_arrow_table(), schema)
+
+
+def timed(func, rounds=5):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def groupbys(df_faturas, df_medicao):
+    return {
+        "faturas por mês": lambda: df_faturas.groupby("mes_referencia", observed=True)[
+            "valor_total"
+        ].sum(),
+        "faturas por descrição": lambda: df_faturas.groupby("descricao", observed=True).agg(
+            {"valor_total": "sum", "valor_icms": "sum", "pis_cofins": "sum"}
+        ),
+        "medição por mês": lambda: df_medicao.groupby("mes_referencia", observed=True).agg(
+            {"consumo_kwh": "sum", "numero_dias": "max"}
+        ),
+    }
+
+
+def mib(value):
+    return value / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    tables = synthetic_tables(args.clients, args.years)
+    print(f"UCs: {args.clients:,}, anos: {args.years}, "
+          f"linhas: faturas {len(tables[0]):,}, medicao {len(tables[1]):,}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        frames = {}
+        cases = (("antes", (None, None)), ("depois", (FATURAS_SCHEMA, MEDICAO_SCHEMA)))
+        for label, schemas in cases:
+            frames[label] = []
+            print(f"\n{label}:")
+            for name, df, schema in zip(("faturas", "medicao"), tables, schemas):
+                path = os.path.join(folder, f"{name}_{label}.parquet")
+                size = write(df, path, schema)
+                seconds = timed(lambda: read(path, schema), rounds=3)
+                loaded = read(path, schema)
+                frames[label].append(loaded)
+                print(f"  {name:8s} disco {mib(size):6.1f} MiB   "
+                      f"memória {mib(loaded.memory_usage(deep=True).sum()):6.1f} MiB   "
+                      f"leitura {seconds:.2f}s")
+
+        print("\nagrupamentos (mediana de 5):")
+        before, after = (groupbys(*frames[label]) for label in ("antes", "depois"))
+        for name in before:
+            old, new = timed(before[name]), timed(after[name])
+            print(f"  {name:22s} {old * 1000:7.1f} ms -> {new * 1000:6.1f} ms ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
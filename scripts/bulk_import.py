@@ -0,0 +1,67 @@
+import argparse
+import logging
+import os
+import sys
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.bulk_import import bulk_import
+from services.pdf_backends import BACKENDS, DEFAULT_BACKEND
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa em lote faturas Enel-CE (PDF) para o banco local."
+    )
+    parser.add_argument(
+        "sources", nargs="+", help="Diretórios, padrões glob ou arquivos PDF."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processos de extração (padrão: todos os núcleos)."
+    )
+    parser.add_argument(
+        "--password", action="append", default=None,
+        help="Senha dos PDFs protegidos. Repita para testar várias candidatas por arquivo "
+             "(a senha que abrir cada UC fica salva em data/credentials.json).",
+    )
+    parser.add_argument(
+        "--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+        help=f"Backend de leitura dos PDFs (padrão: {DEFAULT_BACKEND}).",
+    )
+    parser.add_argument(
+        "--profile", metavar="JSONL", default=None,
+        help="Grava tempo/alocações por etapa de cada PDF neste arquivo JSONL.",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Apenas extrai, sem gravar no banco."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    passwords = args.password or []
+
+    report = bulk_import(
+        args.sources,
+        password=passwords[0] if len(passwords) == 1 else passwords or None,
+        max_workers=args.workers,
+        save=not args.dry_run,
+        backend=args.backend,
+        profile_path=args.profile,
+    )
+
+    if report.saved:
+        # A gravação pode ter disparado a compactação (thread): termina antes de sair
+        from database import wait_for_compaction
+
+        wait_for_compaction()
+
+    for result in report.failed:
+        print(f"FALHA  {result.path}: {result.error}")
+    print(report.summary())
+
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
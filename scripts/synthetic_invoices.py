@@ -0,0 +1,309 @@
+"""
+Gerador de faturas Enel-CE sintéticas (PDF), usado por testes e benchmarks.
+
+Os PDFs são montados diretamente com pikepdf (Helvetica, WinAnsiEncoding),
+sem dependências extras: cada linha vira um bloco BT/ET posicionado, o que
+o pdfplumber extrai como texto com layout e palavras posicionadas.
+
+- render_invoice: linhas de uma fatura 2025/2026 parametrizada
+- build_text_pdf / build_pages_pdf: grava as linhas em PDF de uma ou mais
+  páginas (opcionalmente com senha)
+- generate_corpus: lote variado e reprodutível para benchmarks
+- generate_statement: extrato consolidado (várias UCs em um PDF), com
+  faturas que continuam na página seguinte
+
+Uso via linha de comando:
+    python scripts/synthetic_invoices.py pasta/saida --count 50 --password 12345 --password-ratio 0.2
+"""
+
+import os
+import random
+
+import pikepdf
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LINE_HEIGHT = 12
+
+
+def _pdf_literal(text):
+    return (
+        text.encode("cp1252")
+        .replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+    )
+
+
+def build_text_pdf(path, lines, password=None):
+    """
+    Grava um PDF de uma página com as linhas informadas (Helvetica 8pt).
+
+    Cada linha é uma string (desenhada em x=30) ou uma lista de segmentos
+    (x, texto) desenhados na mesma altura.
+    """
+    return build_pages_pdf(path, [lines], password)
+
+
+def build_pages_pdf(path, pages, password=None):
+    """Como build_text_pdf, com uma lista de linhas por página."""
+    pdf = pikepdf.new()
+    font = pdf.make_indirect(
+        pikepdf.Dictionary(
+            Type=pikepdf.Name.Font,
+            Subtype=pikepdf.Name.Type1,
+            BaseFont=pikepdf.Name.Helvetica,
+            Encoding=pikepdf.Name.WinAnsiEncoding,
+        )
+    )
+
+    for lines in pages:
+        ops = []
+        y = PAGE_HEIGHT - 42
+        for line in lines:
+            segments = [(30, line)] if isinstance(line, str) else line
+            for x, text in segments:
+                ops.append(b"BT /F1 8 Tf %d %d Td (%s) Tj ET" % (x, y, _pdf_literal(text)))
+            y -= LINE_HEIGHT
+
+        page = pikepdf.Dictionary(
+            Type=pikepdf.Name.Page,
+            MediaBox=[0, 0, PAGE_WIDTH, PAGE_HEIGHT],
+            Resources=pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font)),
+            Contents=pdf.make_stream(b"\n".join(ops)),
+        )
+        pdf.pages.append(pikepdf.Page(page))
+
+    encryption = pikepdf.Encryption(user=password, owner=password) if password else False
+    pdf.save(path, encryption=encryption)
+    return path
+
+
+def br_number(value, decimals=2):
+    """Formata um número no padrão brasileiro (1.234,56)."""
+    text = f"{value:,.{decimals}f}"
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+# Itens adicionais (descrição, preço por kWh) usados por render_invoice(extra_items=n)
+EXTRA_ITEMS = [
+    ("Adicional Bandeira Amarela", 0.01885),
+    ("Adicional Bandeira Vermelha P1", 0.04463),
+    ("Energia Injetada Compensada", 0.52),
+    ("Adicional Bandeira Vermelha P2", 0.07877),
+]
+
+
+def render_invoice(year=2025, client_id="12345678", installation="4869679", month=1,
+                   kwh=477, meter=None, extra_items=0, cmyk=True):
+    """
+    Linhas da primeira página de uma fatura Enel-CE no formato do ano.
+
+    Tem cabeçalho (cliente, referência, vencimento), a tabela "Itens de
+    Fatura" (energia, adicionais, CIP e bônus, fechando em TOTAL) e o bloco
+    "Dados de Medição". No formato 2026 as linhas levam as marcas de cor
+    CMYK em x=0 (cmyk=False as omite), como no PDF da Enel.
+
+    Returns:
+        list: linhas para build_text_pdf.
+    """
+    previous_month, previous_year = (month - 1, year) if month > 1 else (12, year - 1)
+    next_month, next_year = (month + 1, year) if month < 12 else (1, year + 1)
+    reference = f"{month:02d}/{year}"
+    due_date = f"10/{next_month:02d}/{next_year}"
+
+    energy = round(kwh * 0.55, 2)
+    items = [
+        "Energia Ativa Fornecida kWh {} 0,55 {} {} {} 20,00 {} 0,45".format(
+            br_number(kwh), br_number(energy), br_number(energy * 0.01982),
+            br_number(energy), br_number(energy * 0.2),
+        )
+    ]
+    total = energy
+    for description, price in EXTRA_ITEMS[:extra_items]:
+        value = round(kwh * price, 2)
+        items.append(
+            "{} kWh {} {} {} {} {} 20,00 {} {}".format(
+                description, br_number(kwh), br_number(price, 5), br_number(value),
+                br_number(value * 0.01982), br_number(value), br_number(value * 0.2),
+                br_number(price * 0.8, 5),
+            )
+        )
+        total += value
+    items += ["CIP Municipal 23,01", "Bonus Itaipu 19,52-"]
+    total += 23.01 - 19.52
+
+    reading = 1000 * (year - 2024) + 12 * (month - 1)
+    measurement = "{} Consumo Ativo 01/{:02d}/{} {} 01/{:02d}/{} {} 1 {} 31".format(
+        meter or ("ABC123" if year < 2026 else "XYZ987"),
+        previous_month, previous_year, reading, month, year, reading + kwh, kwh,
+    )
+
+    if year < 2026:
+        header = [
+            f"Pague utilizando o código {client_id}",
+            f"REFERÊNCIA {reference} VENCIMENTO {due_date}",
+        ]
+    else:
+        header = [
+            f"{installation} / {client_id} R$ {br_number(total)}",
+            f"{due_date} 123456 {reference} 20/{next_month:02d}/{next_year} {br_number(total)}",
+        ]
+
+    table = ["Itens de Fatura Unid. Quant. Preço unit Valor", *items]
+    if year >= 2026 and cmyk:
+        # Marcas de registro de cor que a gráfica deixa à esquerda das linhas
+        marks = ["CMYK", "CM", "", "Y"]
+        table = [
+            [(0, marks[i % len(marks)]), (30, line)] if marks[i % len(marks)] else line
+            for i, line in enumerate(table)
+        ]
+        measurement = [(0, "K"), (30, measurement)]
+
+    return [
+        "ENEL DISTRIBUIÇÃO CEARÁ",
+        *header,
+        *table,
+        f"TOTAL {br_number(total)}",
+        "DADOS DE MEDIÇÃO",
+        measurement,
+        "MES_ANO CONSUMO",
+    ]
+
+
+INVOICE_2025_LINES = render_invoice(2025)
+INVOICE_2026_LINES = render_invoice(2026, client_id="52217494")
+
+# Texto fora das tabelas (avisos, endereço, histórico): dá à página uma
+# densidade de caracteres parecida com a de uma fatura real.
+FILLER_LINES = [
+    f"Informações ao consumidor {i:02d}: bandeira tarifária, tributos e avisos ANEEL "
+    f"- unidade consumidora residencial B1 {i * 7} kWh"
+    for i in range(40)
+]
+
+
+def invoice_lines(year=2025, dense=False):
+    """Linhas de uma fatura do formato do ano; dense=True acrescenta ruído."""
+    lines = INVOICE_2026_LINES if year >= 2026 else INVOICE_2025_LINES
+    if not dense:
+        return list(lines)
+    return FILLER_LINES[:15] + list(lines) + FILLER_LINES[15:]
+
+
+def generate_corpus(folder, count=20, seed=0, years=(2025, 2026), dense_ratio=0.5,
+                    password=None, password_ratio=0.0):
+    """
+    Gera `count` faturas sintéticas variadas (reprodutível pela seed).
+
+    Variam ano/formato, cliente, mês, consumo, número de itens e densidade;
+    uma fração `password_ratio` sai protegida com `password`.
+
+    Returns:
+        list: um dict por fatura (path, password, year, client_id,
+        reference, kwh, items).
+    """
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    corpus = []
+    for i in range(count):
+        year = years[i % len(years)]
+        client_id = str(rng.randint(10_000_000, 99_999_999))
+        month = rng.randint(1, 12)
+        kwh = rng.randint(80, 2500)
+        extra_items = rng.randint(0, len(EXTRA_ITEMS))
+        dense = rng.random() < dense_ratio
+        locked = password is not None and rng.random() < password_ratio
+
+        lines = render_invoice(year, client_id, month=month, kwh=kwh, extra_items=extra_items)
+        if dense:
+            lines = FILLER_LINES[:15] + lines + FILLER_LINES[15:]
+
+        path = os.path.join(folder, f"fatura_{i:04d}_{year}.pdf")
+        build_text_pdf(path, lines, password=password if locked else None)
+        corpus.append(
+            {
+                "path": path,
+                "password": password if locked else None,
+                "year": year,
+                "client_id": client_id,
+                "reference": f"{month:02d}/{year}",
+                "kwh": kwh,
+                "items": extra_items + 3,
+                "dense": dense,
+            }
+        )
+    return corpus
+
+
+def split_invoice(lines, items_on_first_page=1):
+    """
+    Divide a fatura em duas páginas: a tabela de itens continua na segunda
+    (sem cabeçalho de cliente), seguida do total e da medição.
+    """
+    texts = [line if isinstance(line, str) else " ".join(t for _, t in line) for line in lines]
+    table_start = next(i for i, text in enumerate(texts) if "Itens de Fatura" in text)
+    cut = table_start + 1 + items_on_first_page
+    return [lines[:cut], ["ENEL DISTRIBUIÇÃO CEARÁ", "Continuação da fatura", *lines[cut:]]]
+
+
+def generate_statement(path, invoices=200, seed=0, year=2025, split_ratio=0.25,
+                       trailing_pages=0, password=None):
+    """
+    Grava um extrato consolidado: uma fatura por UC, todas no mesmo PDF.
+
+    Uma fração `split_ratio` das faturas ocupa duas páginas (itens que
+    continuam na página seguinte); `trailing_pages` acrescenta páginas de
+    avisos no fim.
+
+    Returns:
+        list: um dict por fatura (client_id, reference, kwh, items, pages).
+    """
+    rng = random.Random(seed)
+    pages, expected = [], []
+    used_clients = set()
+
+    for _ in range(invoices):
+        client_id = str(rng.randint(10_000_000, 99_999_999))
+        while client_id in used_clients:
+            client_id = str(rng.randint(10_000_000, 99_999_999))
+        used_clients.add(client_id)
+
+        month = rng.randint(1, 12)
+        kwh = rng.randint(80, 2500)
+        extra_items = rng.randint(0, len(EXTRA_ITEMS))
+        lines = render_invoice(year, client_id, month=month, kwh=kwh, extra_items=extra_items)
+
+        invoice_pages = split_invoice(lines) if rng.random() < split_ratio else [lines]
+        pages.extend(invoice_pages)
+        expected.append(
+            {
+                "client_id": client_id,
+                "reference": f"{month:02d}/{year}",
+                "kwh": kwh,
+                "items": extra_items + 3,
+                "pages": len(invoice_pages),
+            }
+        )
+
+    pages.extend([FILLER_LINES] * trailing_pages)
+    build_pages_pdf(path, pages, password=password)
+    return expected
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera faturas Enel-CE sintéticas (PDF).")
+    parser.add_argument("folder", help="Pasta de saída.")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--password-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(
+        args.folder, args.count, args.seed,
+        password=args.password, password_ratio=args.password_ratio,
+    )
+    print(f"{len(corpus)} faturas geradas em {args.folder}")
@@ -0,0 +1,64 @@
+import argparse
+import logging
+import os
+import sys
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.pdf_backends import BACKENDS, DEFAULT_BACKEND
+from services.watcher import IngestionDaemon
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Monitora uma pasta e importa as faturas Enel-CE (PDF) que chegarem."
+    )
+    parser.add_argument("folder", help="Pasta monitorada (inclui subpastas).")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processos de extração (padrão: todos os núcleos)."
+    )
+    parser.add_argument("--password", default=None, help="Senha dos PDFs protegidos.")
+    parser.add_argument(
+        "--debounce", type=float, default=2.0,
+        help="Segundos sem alterações antes de ler um arquivo (padrão: 2).",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=20, help="Faturas por gravação no banco (padrão: 20)."
+    )
+    parser.add_argument(
+        "--batch-interval", type=float, default=5.0,
+        help="Espera máxima (s) de um lote incompleto antes de gravar (padrão: 5).",
+    )
+    parser.add_argument(
+        "--manifest", default=None,
+        help="Manifesto dos arquivos tratados (padrão: <pasta>/.sherlock-manifest.jsonl).",
+    )
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="Tenta de novo os arquivos que falharam."
+    )
+    parser.add_argument(
+        "--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+        help=f"Backend de leitura dos PDFs (padrão: {DEFAULT_BACKEND}).",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    daemon = IngestionDaemon(
+        args.folder,
+        password=args.password,
+        max_workers=args.workers,
+        debounce=args.debounce,
+        batch_size=args.batch_size,
+        batch_interval=args.batch_interval,
+        manifest_path=args.manifest,
+        retry_failed=args.retry_failed,
+        backend=args.backend,
+    )
+    daemon.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,10 @@
-import os
 from pathlib import Path
 
 import streamlit as st
 
-from database import invoice_already_imported, load_all_data, save_data
-from services.extractor import extract_data_from_pdf
+from services.jobs import STATUS_DONE, STATUS_DUPLICATE, STATUS_FAILED, IngestionQueue
+from services.pdf_probe import PDF_CORRUPT, PDF_ENCRYPTED, probe_pdf
+from services.unlocker import remove_unlocked_copies
 
 # --- CONFIGURAÇÃO ---
 st.set_page_config(page_title="Sherlock Ohms", page_icon="🕵️‍♂️", layout="wide")
@@ -22,6 +22,42 @@ pages = {
 
 nav = st.navigation(pages)
 
+JOB_ICONS = {STATUS_DONE: "✅", STATUS_DUPLICATE: "⚠️", STATUS_FAILED: "❌"}
+
+
+@st.cache_resource
+def get_ingestion_queue():
+    """Fila de importação única do servidor (threads sobrevivem aos reruns)."""
+    # Uploads são lidos da memória; apaga cópias decifradas de versões antigas
+    remove_unlocked_copies()
+    return IngestionQueue()
+
+
+def render_job_status(polling=False):
+    """Progresso dos uploads desta sessão; atualiza sozinho enquanto houver jobs ativos."""
+    queue = get_ingestion_queue()
+    jobs = queue.jobs(st.session_state.job_ids)
+    if not jobs:
+        return
+
+    st.caption("Importações")
+    for job in jobs:
+        icon = JOB_ICONS.get(job.status, "⏳")
+        st.progress(job.progress, text=f"{icon} {job.file_name} — {job.message}")
+
+    if any(job.finished for job in jobs) and st.button("Limpar concluídas"):
+        queue.forget([job.job_id for job in jobs])
+        st.session_state.job_ids = [job.job_id for job in queue.active(st.session_state.job_ids)]
+        st.rerun()
+
+    # Nova fatura gravada (as páginas precisam reler o banco) ou fila vazia
+    # (para de atualizar): roda o app inteiro
+    data_changed = queue.data_version != st.session_state.seen_data_version
+    if data_changed or (polling and all(job.finished for job in jobs)):
+        st.session_state.seen_data_version = queue.data_version
+        st.rerun()
+
+
 # --- SIDEBAR (Upload) ---
 with st.sidebar:
     current_dir = Path(__file__).parent
@@ -39,35 +75,41 @@ with st.sidebar:
 
     if "uploader_key" not in st.session_state:
         st.session_state.uploader_key = 0
+    if "job_ids" not in st.session_state:
+        st.session_state.job_ids = []
+        st.session_state.seen_data_version = get_ingestion_queue().data_version
 
-    uploaded_file = st.file_uploader("Importar Fatura (PDF)", type=["pdf"], key=f"uploader_{st.session_state.uploader_key}")
+    uploaded_files = st.file_uploader(
+        "Importar Faturas (PDF)", type=["pdf"], accept_multiple_files=True,
+        key=f"uploader_{st.session_state.uploader_key}",
+    )
     password = st.text_input("Senha (se houver)", type="password")
 
-    if uploaded_file and st.button("🔍 Processar", type="primary"):
-        with st.spinner("Lendo arquivo..."):
-            safe_name = Path(uploaded_file.name).name
-            temp_path = f"data/temp_{safe_name}"
-            with open(temp_path, "wb") as f: f.write(uploaded_file.getbuffer())
-
-            try:
-                df_fin, df_med = extract_data_from_pdf(temp_path, password)
-                if not df_fin.empty:
-                    df_faturas, df_medicao = load_all_data()
-                    new_ref = df_fin.iloc[0]["mes_referencia"]
-                    is_duplicate = invoice_already_imported(df_faturas, df_fin)
-
-                    if is_duplicate:
-                        st.warning(f"⚠️ A fatura de **{new_ref}** já foi importada anteriormente. O sistema evitou a duplicação.")
-                    else:
-                        save_data(df_fin, df_med)
-                        st.success("Salvo!")
-                        st.session_state.uploader_key += 1
-                        st.rerun()
-                else:
-                    st.error("Erro na leitura.")
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+    # Triagem pelo trailer (não abre o PDF): corrompidos e protegidos sem
+    # senha não chegam a virar job
+    probes = {f.file_id: probe_pdf(f) for f in uploaded_files or []}
+    corrupt = [f.name for f in uploaded_files or [] if probes[f.file_id] == PDF_CORRUPT]
+    locked = [f.name for f in uploaded_files or [] if probes[f.file_id] == PDF_ENCRYPTED]
+    if corrupt:
+        st.error(f"PDF corrompido ou incompleto: {', '.join(corrupt)}")
+    if locked and not password:
+        st.warning(f"🔒 Informe a senha para: {', '.join(locked)}")
+
+    if uploaded_files and st.button("🔍 Processar", type="primary"):
+        queue = get_ingestion_queue()
+        for uploaded_file in uploaded_files:
+            status = probes[uploaded_file.file_id]
+            if status == PDF_CORRUPT or (status == PDF_ENCRYPTED and not password):
+                continue
+            job_id = queue.submit(uploaded_file.name, uploaded_file.getvalue(), password or None)
+            st.session_state.job_ids.append(job_id)
+        st.session_state.uploader_key += 1
+        st.rerun()
+
+    # Só consulta a fila (não bloqueia); com jobs ativos, o fragmento se
+    # atualiza a cada segundo sem rodar a página selecionada de novo
+    has_active_jobs = bool(get_ingestion_queue().active(st.session_state.job_ids))
+    st.fragment(render_job_status, run_every=1 if has_active_jobs else None)(has_active_jobs)
 
 # --- EXECUTA A PÁGINA SELECIONADA ---
 nav.run()
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from services.extractor import parse_br_numeric
+
 
 def render_consumption_dashboard(df_medicao, df_faturas):
     """
@@ -19,13 +21,7 @@ def render_consumption_dashboard(df_medicao, df_faturas):
 
     # Garante que Consumo é numérico (trata strings como "1.234,00")
     if df_med["consumo_kwh"].dtype == object:
-        df_med["consumo_kwh"] = pd.to_numeric(
-            df_med["consumo_kwh"]
-            .astype(str)
-            .str.replace(".", "")
-            .str.replace(",", "."),
-            errors="coerce",
-        ).fillna(0)
+        df_med["consumo_kwh"] = parse_br_numeric(df_med["consumo_kwh"]).fillna(0)
 
     # Garante que N° Dias é numérico para cálculo de média diária
     if "numero_dias" in df_med.columns:
@@ -47,7 +43,7 @@ def render_consumption_dashboard(df_medicao, df_faturas):
 
     # 1. Agrupa Consumo
     df_view_cons = (
-        df_cons.groupby("mes_referencia")
+        df_cons.groupby("mes_referencia", observed=True)
         .agg(
             {
                 "consumo_kwh": "sum",
@@ -59,7 +55,7 @@ def render_consumption_dashboard(df_medicao, df_faturas):
 
     # 2. Agrupa Injeção (se houver)
     if not df_inj.empty:
-        df_view_inj = df_inj.groupby("mes_referencia")["consumo_kwh"].sum().reset_index()
+        df_view_inj = df_inj.groupby("mes_referencia", observed=True)["consumo_kwh"].sum().reset_index()
         df_view_inj.rename(columns={"consumo_kwh": "injetado_kwh"}, inplace=True)
     else:
         df_view_inj = pd.DataFrame(columns=["mes_referencia", "injetado_kwh"])
@@ -67,7 +63,7 @@ def render_consumption_dashboard(df_medicao, df_faturas):
     # 3. Merge (Consumo + Injeção)
     df_merged = pd.merge(
         df_view_cons, df_view_inj, on="mes_referencia", how="outer"
-    ).fillna(0)
+    ).fillna({"consumo_kwh": 0, "numero_dias": 0, "injetado_kwh": 0})
 
     # Ordenação Cronológica
     try:
@@ -85,7 +81,7 @@ def render_consumption_dashboard(df_medicao, df_faturas):
     # --- 2. CÁLCULO DE EFICIÊNCIA (R$/kWh) ---
     # Cruzamos com o financeiro para saber quanto custou cada kWh naquele mês
     if not df_faturas.empty:
-        df_fin_agg = df_faturas.groupby("mes_referencia")["valor_total"].sum().reset_index()
+        df_fin_agg = df_faturas.groupby("mes_referencia", observed=True)["valor_total"].sum().reset_index()
         df_merged = pd.merge(df_merged, df_fin_agg, on="mes_referencia", how="left")
 
         # Cálculo do Custo Efetivo (Conta Total / Total kWh)
@@ -98,7 +94,7 @@ def render_consumption_dashboard(df_medicao, df_faturas):
         # --- MELHORIA: TARIFA CHEIA PARA SOLAR ---
         if "preco_unitario" in df_faturas.columns:
             df_tarifa = (
-                df_faturas.groupby("mes_referencia")["preco_unitario"]
+                df_faturas.groupby("mes_referencia", observed=True)["preco_unitario"]
                 .max()
                 .reset_index()
             )
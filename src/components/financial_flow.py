@@ -22,7 +22,7 @@ def render_financial_flow(df_fin_view):
     if "pis_cofins" in df_fin_view.columns:
         agg_dict["pis_cofins"] = "sum"
 
-    df_fat = df_fin_view.groupby("descricao").agg(agg_dict).reset_index()
+    df_fat = df_fin_view.groupby("descricao", observed=True).agg(agg_dict).reset_index()
 
     # 2. Define Tipo (Despesa vs Economia) e Cores
     # Valores positivos são Cobranças (Despesa) -> Vermelho
@@ -155,7 +155,7 @@ def render_financial_flow(df_fin_view):
     st.markdown("### 📈 Evolução do Valor da Conta")
 
     # Agrupa por mês para a linha principal
-    df_evolucao = df_fin_view.groupby("mes_referencia")["valor_total"].sum().reset_index()
+    df_evolucao = df_fin_view.groupby("mes_referencia", observed=True)["valor_total"].sum().reset_index()
 
     # Ordenação Cronológica
     try:
@@ -102,7 +102,7 @@ def render_public_lighting(df_fin_view, df_med_view):
 
     # Prepara Dados Financeiros
     df_cip = (
-        df_fin_view[mask_ilum].groupby("mes_referencia")["valor_total"].sum().reset_index()
+        df_fin_view[mask_ilum].groupby("mes_referencia", observed=True)["valor_total"].sum().reset_index()
     )
     df_cip.rename(columns={"valor_total": "R$ Pago"}, inplace=True)
 
@@ -122,12 +122,12 @@ def render_public_lighting(df_fin_view, df_med_view):
         )
         df_cons = (
             df_med_view[~mask_inj]
-            .groupby("mes_referencia")["consumo_kwh"]
+            .groupby("mes_referencia", observed=True)["consumo_kwh"]
             .sum()
             .reset_index()
         )
     else:
-        df_cons = df_med_view.groupby("mes_referencia")["consumo_kwh"].sum().reset_index()
+        df_cons = df_med_view.groupby("mes_referencia", observed=True)["consumo_kwh"].sum().reset_index()
 
     # Merge (Cruzamento)
     df_audit = pd.merge(df_cip, df_cons, on="mes_referencia", how="inner")
@@ -2,9 +2,20 @@
 
 # Isso expõe as funções do manager.py quando alguém faz "from database import ..."
 from .manager import (
+    clear_data,
+    compact_store,
+    find_imported,
+    imported_keys,
     invoice_already_imported,
     load_all_data,
+    load_invoice_keys,
+    load_manifest,
+    migrate_legacy_store,
     plot_energy_chart,
     query_energy_data,
+    read_tables,
     save_data,
+    schedule_compaction,
+    store_version,
+    wait_for_compaction,
 )
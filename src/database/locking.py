@@ -0,0 +1,87 @@
+"""
+Trava de escrita da base (data/database).
+
+Quem grava (save_data, migrações, clear_data) segura um lock consultivo
+no arquivo DB_FOLDER/write.lock: vale entre threads e entre processos
+(várias sessões do Streamlit, importação em lote e monitor de pasta na
+mesma base), então a sequência dos deltas nunca se intercala. A
+compactação usa outro arquivo (compaction.lock) e não segura as gravações.
+Leitores não travam: todo arquivo é gravado num temporário e trocado
+inteiro (ver manager._write_parquet).
+
+O lock é liberado pelo sistema se o processo morrer; no mesmo processo ele
+é reentrante (init_db chama migrate_legacy_store já com o lock).
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            # LK_LOCK desiste após ~10 s: tenta de novo até conseguir
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class WriteLock:
+    """
+    Lock exclusivo sobre `path`, reentrante na mesma thread. Só a primeira
+    entrada da thread abre e trava o arquivo; as aninhadas só contam.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                f = open(self.path, "a+b")
+                try:
+                    _lock_file(f)
+                except BaseException:
+                    f.close()
+                    raise
+                self._file = f
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                f, self._file = self._file, None
+                try:
+                    _unlock_file(f)
+                finally:
+                    f.close()
+        finally:
+            self._thread_lock.release()
@@ -1,19 +1,87 @@
+import glob
 import logging
 import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import streamlit as st
 
+from .locking import WriteLock
+from .schema import (
+    FATURAS_SCHEMA,
+    MANIFEST_SCHEMA,
+    MEDICAO_SCHEMA,
+    SCHEMA_VERSION,
+    conform,
+    from_arrow,
+    to_arrow,
+)
+
 logger = logging.getLogger(__name__)
 
 # --- CONFIGURAÇÃO DE CAMINHOS ---
 # Ajusta para pegar a raiz do projeto corretamente baseada na localização deste arquivo
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DB_FOLDER = os.path.join(BASE_DIR, "data", "database")
+
+# Cada tabela é um dataset particionado (Hive) por cliente e ano de referência:
+#   faturas/numero_cliente=<uc>/ano=<aaaa>/part.parquet
+# Um upsert reescreve só as partições das faturas gravadas, e leituras
+# filtradas por cliente/ano só abrem os arquivos dessas partições.
+DIR_FATURAS = os.path.join(DB_FOLDER, "faturas")
+DIR_MEDICAO = os.path.join(DB_FOLDER, "medicao")
+PART_FILE = "part.parquet"
+
+# Gravações novas não reescrevem partições: cada save_data acrescenta um delta
+# imutável (<tabela>/_delta/<seq>.parquet) com as linhas da fatura e
+# tombstones das chaves (mes_referencia, numero_cliente) que elas substituem.
+# compact_store incorpora os deltas às partições quando passam do limite.
+DELTA_DIR = "_delta"
+DELTA_COMPACTION_THRESHOLD = 64
+# Leituras refeitas quando um arquivo listado some (compactação concorrente)
+READ_RETRIES = 3
+
+# Manifesto das faturas gravadas: uma linha por (mes_referencia,
+# numero_cliente) com o hash do PDF de origem, a versão do parser, o horário
+# e as linhas gravadas. Checagens de duplicata consultam só ele, sem abrir
+# as tabelas de fatos. Mantido por save_data com o mesmo esquema de deltas,
+# compactado num arquivo único (manifest/manifest.parquet).
+DIR_MANIFEST = os.path.join(DB_FOLDER, "manifest")
+MANIFEST_FILE = "manifest.parquet"
+MANIFEST_KEYS = ["mes_referencia", "numero_cliente"]
+
+# Arquivos únicos das versões anteriores, convertidos por migrate_legacy_store
 FILE_FATURAS = os.path.join(DB_FOLDER, "faturas.parquet")
 FILE_MEDICAO = os.path.join(DB_FOLDER, "medicao.parquet")
 
+# Versão do esquema (schema.py) em que as partições foram gravadas
+SCHEMA_VERSION_FILE = "schema_version"
+
+# Locks consultivos (ver locking.py): gravações de threads e processos
+# diferentes se revezam; leituras não travam. A compactação tem lock
+# próprio: ela só reescreve partições e apaga deltas já listados, então
+# roda em segundo plano sem segurar as gravações de faturas.
+LOCK_FILE = "write.lock"
+COMPACTION_LOCK_FILE = "compaction.lock"
+_locks = {}
+_locks_guard = threading.Lock()
+
+# Geração da base: um token novo a cada escrita que muda os dados. É a
+# chave de store_version(); listar pastas não basta, já que a compactação
+# esvazia os deltas e repete o estado anterior.
+GENERATION_FILE = "generation"
+
+# Compactação disparada por save_data, numa thread do processo
+_compaction_thread = None
+_compaction_guard = threading.Lock()
+
 
 def _get_invoice_keys(df):
     """Retorna a chave lógica usada para identificar uma fatura."""
@@ -22,15 +90,265 @@ def _get_invoice_keys(df):
         keys.append("numero_cliente")
     return keys
 
+def _partition_value(value):
+    """Valor seguro para nome de pasta (vazio vira "_")."""
+    value = re.sub(r'[\\/:*?"<>|=]', "_", str(value).strip())
+    return value or "_"
+
+
+def _partition_keys(df):
+    """Séries (numero_cliente, ano) que definem a partição de cada linha."""
+    if "numero_cliente" in df.columns:
+        clients = df["numero_cliente"].astype(object).fillna("").astype(str)
+    else:
+        clients = pd.Series("", index=df.index)
+
+    if "mes_referencia" in df.columns:
+        years = df["mes_referencia"].astype(str).str.extract(r"(\d{4})\s*$")[0].fillna("0")
+    else:
+        years = pd.Series("0", index=df.index)
+
+    return clients.map(_partition_value), years
+
+
+def _partition_path(base_dir, client, year):
+    return os.path.join(base_dir, f"numero_cliente={client}", f"ano={year}", PART_FILE)
+
+
+def _partition_files(base_dir, clients=None, years=None):
+    """
+    Arquivos das partições pedidas (None = todas). A poda é feita pelo
+    caminho: partições de outros clientes/anos nem são listadas.
+    """
+    client_dirs = ["*"] if clients is None else [_partition_value(c) for c in clients]
+    year_dirs = ["*"] if years is None else [str(y) for y in years]
+
+    files = []
+    for client in client_dirs:
+        for year in year_dirs:
+            files.extend(glob.glob(_partition_path(base_dir, client, year)))
+    return sorted(files)
+
+
+def _sql_list(paths):
+    return "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _delta_files(base_dir):
+    """Deltas da tabela, em ordem de sequência."""
+    return sorted(glob.glob(os.path.join(base_dir, DELTA_DIR, "*.parquet")))
+
+
+def _delta_seq(path):
+    return int(os.path.basename(path).split(".")[0])
+
+
+def _scan(source, hive=False):
+    if hive:
+        options = "hive_partitioning=true, hive_types={'numero_cliente': VARCHAR, 'ano': INTEGER}"
+    else:
+        options = "hive_partitioning=false"
+    return f"read_parquet({source}, {options}, union_by_name=true)"
+
+
+def _partition_value_sql(expr):
+    """_partition_value em SQL (mesmas trocas), para comparar com a pasta."""
+    value = f"regexp_replace(trim(coalesce({expr}, '')), '[\\\\/:*?\"<>|=]', '_', 'g')"
+    return f"coalesce(nullif({value}, ''), '_')"
+
+
+def _merge_sql(base_source, delta_files, hive=False):
+    """
+    SELECT das linhas vigentes da tabela: base (seq 0) unida aos deltas, sem
+    as linhas com tombstone de sequência maior (anti-join pela chave).
+
+    base_source é uma lista SQL de arquivos ou um padrão entre aspas (None se
+    ainda não há base); com hive=True a coluna ano vem das pastas e os
+    filtros por numero_cliente/ano podam as partições lidas.
+    """
+    base = f"SELECT *, 0 AS _seq FROM {_scan(base_source, hive)}" if base_source else None
+    if not delta_files:
+        return f"SELECT * EXCLUDE (_seq) FROM ({base})"
+
+    deltas = _scan(_sql_list(delta_files))
+    year = ", TRY_CAST(right(mes_referencia, 4) AS INTEGER) AS ano" if hive else ""
+    rows = f"SELECT * EXCLUDE (_tombstone){year} FROM {deltas} WHERE NOT _tombstone"
+    if base:
+        rows = f"{base} UNION ALL BY NAME {rows}"
+
+    if hive:
+        # Na base, numero_cliente vem do nome da pasta (vazio vira "_"): os
+        # dois lados passam pela mesma normalização antes de comparar
+        same_client = (
+            f"{_partition_value_sql('t.numero_cliente')} = "
+            f"{_partition_value_sql('r.numero_cliente')}"
+        )
+    else:
+        same_client = "t.numero_cliente = coalesce(r.numero_cliente, '')"
+    return (
+        f"SELECT r.* EXCLUDE (_seq) FROM ({rows}) r "
+        f"ANTI JOIN (SELECT mes_referencia, numero_cliente, _seq FROM {deltas} WHERE _tombstone) t "
+        f"ON t.mes_referencia = r.mes_referencia AND {same_client} AND t._seq > r._seq"
+    )
+
+
+def _read_table(base_dir, clients=None, years=None, columns="*", schema=None,
+                _retries=READ_RETRIES):
+    """
+    Lê a tabela (partições pedidas + deltas) num único DataFrame; com
+    schema, já nos tipos dele (lido via Arrow, ver schema.from_arrow).
+    Não trava: os arquivos são trocados inteiros pelos escritores.
+    """
+    files = _partition_files(base_dir, clients, years)
+    deltas = _delta_files(base_dir)
+    if not files and not deltas:
+        return pd.DataFrame()
+
+    base_source = _sql_list(files) if files else None
+    try:
+        with duckdb.connect() as con:
+            result = con.execute(f"SELECT {columns} FROM ({_merge_sql(base_source, deltas)})")
+            if schema is None:
+                df = result.fetchdf()
+            else:
+                df = from_arrow(result.fetch_arrow_table(), schema)
+    except duckdb.IOException:
+        if _retries <= 0:
+            raise
+        # Compactação concorrente apagou um arquivo listado: lista de novo
+        return _read_table(base_dir, clients, years, columns, schema, _retries - 1)
+
+    if deltas and (clients is not None or years is not None):
+        # Linhas dos deltas ainda não estão nas pastas de partição: filtra aqui
+        row_clients, row_years = _partition_keys(df)
+        mask = pd.Series(True, index=df.index)
+        if clients is not None:
+            mask &= row_clients.isin([_partition_value(c) for c in clients])
+        if years is not None:
+            mask &= row_years.isin([str(y) for y in years])
+        df = df[mask].reset_index(drop=True)
+    return df
+
+
+def _tables():
+    """Pares (pasta, esquema) das tabelas faturas e medicao."""
+    return ((DIR_FATURAS, FATURAS_SCHEMA), (DIR_MEDICAO, MEDICAO_SCHEMA))
+
+
+def _lock(name):
+    path = os.path.join(DB_FOLDER, name)
+    with _locks_guard:
+        if path not in _locks:
+            _locks[path] = WriteLock(path)
+        return _locks[path]
+
+
+def write_lock():
+    """Lock de escrita da base em DB_FOLDER (reentrante; ver locking.py)."""
+    return _lock(LOCK_FILE)
+
+
+def compaction_lock():
+    """
+    Lock das reescritas de partições (compactação). Quem precisa dos dois
+    pega write_lock() primeiro; a compactação só pega este.
+    """
+    return _lock(COMPACTION_LOCK_FILE)
+
+
 def init_db():
-    """Garante que a pasta e os arquivos existam."""
+    """Garante que a pasta exista e converte bases no formato antigo."""
     os.makedirs(DB_FOLDER, exist_ok=True)
+    if _store_ready():
+        # Caminho das leituras: sem lock
+        return
 
-    if not os.path.exists(FILE_FATURAS):
-        pd.DataFrame().to_parquet(FILE_FATURAS)
+    with write_lock():
+        migrate_legacy_store()
+        upgrade_store_schema()
+        if not _has_manifest() and _has_invoices():
+            # Base gravada antes do manifesto (ou gravação interrompida antes dele)
+            _rebuild_manifest()
+        if store_version() is None:
+            _bump_generation()
 
-    if not os.path.exists(FILE_MEDICAO):
-        pd.DataFrame().to_parquet(FILE_MEDICAO)
+
+def _store_ready():
+    """True se init_db não tem nada a converter (checagens só de metadados)."""
+    if any(os.path.exists(path) for path in (FILE_FATURAS, FILE_MEDICAO)):
+        return False
+    if _schema_version() != str(SCHEMA_VERSION) or store_version() is None:
+        return False
+    return _has_manifest() or not _has_invoices()
+
+
+def _schema_version():
+    try:
+        with open(os.path.join(DB_FOLDER, SCHEMA_VERSION_FILE), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def migrate_legacy_store():
+    """
+    Converte faturas.parquet/medicao.parquet (um arquivo por tabela) para o
+    dataset particionado. O arquivo antigo é renomeado para *.migrated
+    depois da conversão, então a migração roda uma vez só.
+
+    Returns:
+        int: Linhas convertidas.
+    """
+    migrated = 0
+    with write_lock(), compaction_lock():
+        for legacy_path, (base_dir, schema) in zip((FILE_FATURAS, FILE_MEDICAO), _tables()):
+            if not os.path.exists(legacy_path):
+                continue
+
+            df_legacy = pd.read_parquet(legacy_path)
+            if not df_legacy.empty:
+                keys = _get_invoice_keys(df_legacy)
+                if not _upsert_partitioned(df_legacy, base_dir, keys, schema):
+                    logger.error("Migração de %s interrompida", legacy_path)
+                    continue
+                migrated += len(df_legacy)
+
+            os.replace(legacy_path, legacy_path + ".migrated")
+            logger.info("Base %s convertida para %s (%d linhas)",
+                        legacy_path, base_dir, len(df_legacy))
+        if migrated:
+            _bump_generation()
+    return migrated
+
+
+def upgrade_store_schema():
+    """
+    Regrava as partições gravadas antes do esquema atual (schema.py) com os
+    tipos dele. A versão fica em DB_FOLDER/schema_version, então cada base
+    é convertida uma vez só; deltas antigos são convertidos na compactação.
+
+    Returns:
+        int: Partições regravadas.
+    """
+    with write_lock(), compaction_lock():
+        if _schema_version() == str(SCHEMA_VERSION):
+            return 0
+
+        upgraded = 0
+        for base_dir, schema in _tables():
+            for path in _partition_files(base_dir):
+                # pandas devolve as colunas de dicionário como category
+                _write_parquet(pd.read_parquet(path), path, schema)
+                upgraded += 1
+
+        marker = os.path.join(DB_FOLDER, SCHEMA_VERSION_FILE)
+        _atomic_write(marker, lambda f: f.write(str(SCHEMA_VERSION).encode("utf-8")))
+        if upgraded:
+            _bump_generation()
+    if upgraded:
+        logger.info("Esquema da base atualizado para a versão %s (%d partições)",
+                    SCHEMA_VERSION, upgraded)
+    return upgraded
 
 def invoice_already_imported(df_existing, df_new):
     """
@@ -55,7 +373,201 @@ def invoice_already_imported(df_existing, df_new):
     return not matches.empty
 
 
-def _upsert_dataframe(df_new, file_path, keys=None):
+def load_invoice_keys():
+    """
+    Conjunto de chaves (mes_referencia, numero_cliente) das faturas já
+    gravadas, lido do manifesto (sem abrir as tabelas de fatos). Bases
+    antigas sem numero_cliente devolvem "" no lugar do cliente.
+    """
+    try:
+        init_db()
+        df_keys = _read_manifest(columns=", ".join(MANIFEST_KEYS))
+    except Exception as e:
+        logger.error("Erro ao ler chaves das faturas: %s", e)
+        return set()
+
+    if df_keys.empty:
+        return set()
+    return set(zip(df_keys["mes_referencia"], df_keys["numero_cliente"]))
+
+
+def find_imported(key=None, content_hash=None):
+    """
+    Entrada do manifesto de uma fatura já gravada, procurada pela chave
+    (mes_referencia, numero_cliente) ou pelo hash do PDF de origem (o mesmo
+    PDF enviado com outro nome). Consulta só o manifesto.
+
+    Returns:
+        dict | None: mes_referencia, numero_cliente, content_hash,
+        parser_version, imported_at, rows_financeiro e rows_medicao.
+    """
+    conditions, params = [], []
+    if key is not None:
+        conditions.append("(mes_referencia = ? AND numero_cliente = ?)")
+        params += [str(key[0]), str(key[1] or "")]
+    if content_hash:
+        conditions.append("content_hash = ?")
+        params.append(content_hash)
+    if not conditions:
+        return None
+
+    init_db()
+    df = _read_manifest(where=f"WHERE {' OR '.join(conditions)} LIMIT 1", params=params)
+    return None if df.empty else df.iloc[0].to_dict()
+
+
+def imported_keys(keys):
+    """
+    Quais das chaves (mes_referencia, numero_cliente) já estão gravadas,
+    numa única consulta ao manifesto (extratos consolidados têm uma chave
+    por UC).
+
+    Returns:
+        set: Subconjunto de keys.
+    """
+    if not keys:
+        return set()
+    init_db()
+    return set(_manifest_entries(keys, columns=", ".join(MANIFEST_KEYS)))
+
+
+def load_manifest():
+    """Manifesto completo: uma linha por fatura gravada."""
+    init_db()
+    return _read_manifest()
+
+
+def _manifest_path():
+    return os.path.join(DIR_MANIFEST, MANIFEST_FILE)
+
+
+def _has_manifest():
+    return os.path.exists(_manifest_path()) or bool(_delta_files(DIR_MANIFEST))
+
+
+def _has_invoices():
+    return any(_has_partitions(d) or _delta_files(d) for d in (DIR_FATURAS, DIR_MEDICAO))
+
+
+def _read_manifest(columns="*", where="", params=(), _retries=READ_RETRIES):
+    base = _manifest_path()
+    files = [base] if os.path.exists(base) else []
+    deltas = _delta_files(DIR_MANIFEST)
+    if not files and not deltas:
+        return pd.DataFrame()
+
+    query = f"SELECT {columns} FROM ({_merge_sql(_sql_list(files) if files else None, deltas)})"
+    try:
+        with duckdb.connect() as con:
+            table = con.execute(f"{query} {where}", list(params)).fetch_arrow_table()
+    except duckdb.IOException:
+        if _retries <= 0:
+            raise
+        return _read_manifest(columns, where, params, _retries - 1)
+    return from_arrow(table, MANIFEST_SCHEMA)
+
+
+def _manifest_entries(keys, columns="*"):
+    """Chave -> entrada atual do manifesto (dict), para as chaves já gravadas."""
+    keys = {(str(reference), str(client or "")) for reference, client in keys}
+    if not keys:
+        return {}
+
+    references, clients = (sorted(set(values)) for values in zip(*keys))
+    df = _read_manifest(
+        columns=columns,
+        where="WHERE mes_referencia IN (SELECT unnest(?)) AND numero_cliente IN (SELECT unnest(?))",
+        params=[references, clients],
+    )
+    entries = {}
+    for entry in df.to_dict("records"):
+        key = (entry["mes_referencia"], entry["numero_cliente"])
+        if key in keys:
+            entries[key] = entry
+    return entries
+
+
+def _invoice_counts(df):
+    """Linhas por chave (mes_referencia, numero_cliente) de df."""
+    if df.empty or "mes_referencia" not in df.columns:
+        return Counter()
+    if "numero_cliente" in df.columns:
+        clients = df["numero_cliente"].astype(object).fillna("").astype(str)
+    else:
+        clients = [""] * len(df)
+    return Counter(zip(df["mes_referencia"].astype(str), clients))
+
+
+def _manifest_rows(df_financeiro, df_medicao, sources=None, imported_at=None, previous=None):
+    """
+    Uma linha de manifesto por fatura presente em df_financeiro/df_medicao.
+
+    previous (dict, opcional): chave -> entrada atual do manifesto. A tabela
+    em que a fatura não veio não é regravada (save_data só troca as chaves
+    de cada DataFrame), então a contagem dela é mantida da entrada atual.
+    """
+    counts = {}
+    for column, df in (("rows_financeiro", df_financeiro), ("rows_medicao", df_medicao)):
+        for key, rows in _invoice_counts(df).items():
+            counts.setdefault(key, {"rows_financeiro": None, "rows_medicao": None})[column] = rows
+
+    sources = sources or {}
+    previous = previous or {}
+    records = []
+    for (reference, client), rows in counts.items():
+        entry = previous.get((reference, client), {})
+        rows = {
+            column: entry.get(column, 0) if count is None else count
+            for column, count in rows.items()
+        }
+        content_hash, parser_version = sources.get((reference, client), (None, None))
+        records.append({
+            "mes_referencia": reference,
+            "numero_cliente": client,
+            "content_hash": content_hash,
+            "parser_version": parser_version,
+            "imported_at": imported_at,
+            **rows,
+        })
+    return pd.DataFrame(records, columns=MANIFEST_SCHEMA.names)
+
+
+def _rebuild_manifest():
+    """
+    Monta o manifesto a partir das chaves das tabelas de fatos. Hash, versão
+    do parser e horário de importação dessas faturas não são conhecidos.
+    """
+    frames = []
+    for base_dir in (DIR_FATURAS, DIR_MEDICAO):
+        files = _partition_files(base_dir) + _delta_files(base_dir)
+        names = set().union(*(pq.read_schema(f).names for f in files)) if files else set()
+        columns = [c for c in MANIFEST_KEYS if c in names]
+        if "mes_referencia" in columns:
+            frames.append(_read_table(base_dir, columns=", ".join(columns)))
+        else:
+            frames.append(pd.DataFrame())
+
+    manifest = _manifest_rows(*frames)
+    if not manifest.empty:
+        _write_parquet(manifest, _manifest_path(), MANIFEST_SCHEMA)
+    logger.info("Manifesto refeito a partir da base (%d faturas)", len(manifest))
+    return len(manifest)
+
+
+def _compact_manifest():
+    """Incorpora os deltas do manifesto ao arquivo único dele."""
+    deltas = _delta_files(DIR_MANIFEST)
+    if not deltas:
+        return 0
+
+    _write_parquet(_read_manifest(), _manifest_path(), MANIFEST_SCHEMA)
+    # Deltas gravados depois da leitura continuam lá e valem sobre a base
+    for path in deltas:
+        os.remove(path)
+    return len(deltas)
+
+
+def _upsert_dataframe(df_new, file_path, keys=None, schema=None):
     if keys is None:
         keys = ["mes_referencia"]
 
@@ -63,19 +575,19 @@ def _upsert_dataframe(df_new, file_path, keys=None):
         return False
 
     if not os.path.exists(file_path):
-        df_new.to_parquet(file_path, index=False)
+        _write_parquet(df_new, file_path, schema)
         return True
 
     try:
         df_old = pd.read_parquet(file_path)
         if df_old.empty:
-            df_new.to_parquet(file_path, index=False)
+            _write_parquet(df_new, file_path, schema)
             return True
 
         missing_keys = [k for k in keys if k not in df_old.columns]
         if missing_keys:
             df_final = pd.concat([df_old, df_new], ignore_index=True)
-            df_final.to_parquet(file_path, index=False)
+            _write_parquet(df_final, file_path, schema)
             return True
 
         refs_to_update = df_new[keys].drop_duplicates()
@@ -83,65 +595,389 @@ def _upsert_dataframe(df_new, file_path, keys=None):
         df_kept = df_old[df_merged["_merge"] == "left_only"]
         df_final = pd.concat([df_kept, df_new], ignore_index=True)
 
-        df_final.to_parquet(file_path, index=False)
+        _write_parquet(df_final, file_path, schema)
         return True
 
     except Exception as e:
         logger.error("Erro ao salvar parquet: %s", e)
         return False
 
-def save_data(df_financeiro, df_medicao):
-    """Salva os dados no banco."""
+
+def _write_parquet(data, file_path, schema=None):
+    """
+    Grava (DataFrame ou tabela Arrow) atomicamente (ver _atomic_write).
+    Com schema, o DataFrame é gravado com os tipos dele.
+    """
+    if schema is not None and not isinstance(data, pa.Table):
+        data = to_arrow(conform(data, schema), schema)
+
+    if isinstance(data, pa.Table):
+        _atomic_write(file_path, lambda f: pq.write_table(data, f))
+    else:
+        _atomic_write(file_path, lambda f: data.to_parquet(f, index=False))
+
+
+def _atomic_write(file_path, write):
+    """
+    Chama write(f) num temporário da mesma pasta, faz fsync e troca o
+    arquivo de uma vez (os.replace): leitores veem o arquivo antigo ou o
+    novo, nunca meio arquivo, e uma queda de energia não deixa um arquivo
+    truncado no lugar do antigo.
+    """
+    folder = os.path.dirname(file_path) or "."
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        _fsync_dir(folder)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _fsync_dir(folder):
+    """Persiste a troca de nome (POSIX); no Windows não há fsync de pasta."""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _upsert_partitioned(df_new, base_dir, keys, schema=None):
+    """Upsert no dataset: só as partições (cliente, ano) de df_new são reescritas."""
+    if df_new.empty:
+        return False
+
+    clients, years = _partition_keys(df_new)
+    success = True
+    for (client, year), df_part in df_new.groupby([clients.to_numpy(), years.to_numpy()], sort=False):
+        path = _partition_path(base_dir, client, year)
+        df_part = df_part.reset_index(drop=True)
+        success = _upsert_dataframe(df_part, path, keys=keys, schema=schema) and success
+    return success
+
+def _append_delta(df_new, base_dir, keys, schema):
+    """
+    Grava df_new como o próximo delta da tabela: as linhas novas mais um
+    tombstone por chave (mes_referencia, numero_cliente), que esconde as
+    versões anteriores dessas faturas. O custo é o da fatura, não o da base.
+    Chamar com write_lock(): a sequência é o último delta + 1.
+    """
+    if df_new.empty:
+        return False
+
+    try:
+        deltas = _delta_files(base_dir)
+        seq = _delta_seq(deltas[-1]) + 1 if deltas else 1
+
+        tombstones = df_new[keys].drop_duplicates()
+        if "numero_cliente" not in tombstones.columns:
+            tombstones["numero_cliente"] = ""
+        tombstones["numero_cliente"] = tombstones["numero_cliente"].fillna("").astype(str)
+
+        # Concatena em Arrow: colunas inteiras ficam nulas nos tombstones sem virar float
+        rows = to_arrow(conform(df_new, schema).assign(_tombstone=False), schema)
+        tombs = to_arrow(tombstones.assign(_tombstone=True), schema)
+        delta = pa.concat_tables([rows, tombs], promote_options="default")
+        delta = delta.append_column("_seq", pa.array([seq] * delta.num_rows, pa.int64()))
+
+        _write_parquet(delta, os.path.join(base_dir, DELTA_DIR, f"{seq:012d}.parquet"))
+        return True
+
+    except Exception as e:
+        logger.error("Erro ao gravar delta: %s", e)
+        return False
+
+
+def _compact_table(base_dir, schema):
+    """Incorpora os deltas atuais às partições afetadas e remove os deltas."""
+    deltas = _delta_files(base_dir)
+    if not deltas:
+        return 0
+
+    with duckdb.connect() as con:
+        df_tombs = con.execute(
+            f"SELECT DISTINCT mes_referencia, numero_cliente FROM {_scan(_sql_list(deltas))} "
+            "WHERE _tombstone"
+        ).fetchdf()
+        affected = set(zip(*_partition_keys(df_tombs)))
+        files = [_partition_path(base_dir, c, y) for c, y in sorted(affected)]
+        files = [f for f in files if os.path.exists(f)]
+        base_source = _sql_list(files) if files else None
+        df_merged = con.execute(_merge_sql(base_source, deltas)).fetchdf()
+
+    clients, years = _partition_keys(df_merged)
+    for (client, year), df_part in df_merged.groupby(
+        [clients.to_numpy(), years.to_numpy()], sort=False
+    ):
+        path = _partition_path(base_dir, client, year)
+        _write_parquet(df_part.reset_index(drop=True), path, schema)
+        affected.discard((client, year))
+
+    # Partições que ficaram sem linhas
+    for client, year in affected:
+        path = _partition_path(base_dir, client, year)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # Só depois das partições: se parar no meio, reaplicar os deltas dá o mesmo resultado
+    for path in deltas:
+        os.remove(path)
+    return len(deltas)
+
+
+def compact_store(threshold=None):
+    """
+    Incorpora os deltas à base das tabelas com pelo menos `threshold`
+    deltas pendentes (padrão DELTA_COMPACTION_THRESHOLD; 0 compacta tudo).
+    Cada partição afetada é reescrita uma vez, com todas as faturas novas.
+
+    Só segura compaction_lock(): save_data continua gravando deltas (de
+    sequência maior, que a compactação não apaga) enquanto ela roda.
+    save_data a dispara em segundo plano (ver schedule_compaction).
+
+    Returns:
+        int: Deltas incorporados.
+    """
+    if threshold is None:
+        threshold = DELTA_COMPACTION_THRESHOLD
+    compacted = 0
+    with compaction_lock():
+        for base_dir, schema in _tables():
+            if len(_delta_files(base_dir)) >= max(threshold, 1):
+                compacted += _compact_table(base_dir, schema)
+        if len(_delta_files(DIR_MANIFEST)) >= max(threshold, 1):
+            compacted += _compact_manifest()
+        if compacted:
+            _bump_generation()
+    return compacted
+
+
+def _compaction_due(threshold=None):
+    if threshold is None:
+        threshold = DELTA_COMPACTION_THRESHOLD
+    folders = [base_dir for base_dir, _ in _tables()] + [DIR_MANIFEST]
+    return any(len(_delta_files(folder)) >= max(threshold, 1) for folder in folders)
+
+
+def _compact_in_background():
+    try:
+        compact_store()
+    except Exception as e:
+        # Os deltas continuam válidos; a compactação é tentada de novo na próxima gravação
+        logger.error("Erro ao compactar deltas: %s", e)
+
+
+def schedule_compaction():
+    """
+    Inicia compact_store() numa thread (daemon) se alguma tabela passou de
+    DELTA_COMPACTION_THRESHOLD deltas e não há outra compactação em curso
+    no processo. Interromper a thread no meio é seguro: os deltas só são
+    apagados depois das partições gravadas.
+
+    Returns:
+        threading.Thread | None: A thread iniciada.
+    """
+    global _compaction_thread
+
+    if not _compaction_due():
+        return None
+    with _compaction_guard:
+        if _compaction_thread is not None and _compaction_thread.is_alive():
+            return None
+        _compaction_thread = threading.Thread(
+            target=_compact_in_background, name="sherlock-compaction", daemon=True
+        )
+        _compaction_thread.start()
+        return _compaction_thread
+
+
+def wait_for_compaction(timeout=None):
+    """Espera a compactação em segundo plano deste processo (scripts e testes)."""
+    with _compaction_guard:
+        thread = _compaction_thread
+    if thread is not None:
+        thread.join(timeout)
+
+
+def save_data(df_financeiro, df_medicao, sources=None):
+    """
+    Salva os dados no banco, com os tipos de FATURAS_SCHEMA/MEDICAO_SCHEMA,
+    e registra as faturas gravadas no manifesto.
+
+    Args:
+        sources (dict, opcional): (mes_referencia, numero_cliente) ->
+            (content_hash, parser_version) do PDF de cada fatura, guardados
+            no manifesto (ver services.cache.invoice_sources).
+    """
     init_db()
-    success_fin = True
-    success_med = True
+    # Sequência dos deltas e manifesto sem outro escritor no meio
+    with write_lock():
+        success_fin = True
+        success_med = True
 
-    keys_fin = _get_invoice_keys(df_financeiro)
+        keys_fin = _get_invoice_keys(df_financeiro)
 
-    if not df_financeiro.empty:
-        success_fin = _upsert_dataframe(df_financeiro, FILE_FATURAS, keys=keys_fin)
+        if not df_financeiro.empty:
+            success_fin = _append_delta(df_financeiro, DIR_FATURAS, keys_fin, FATURAS_SCHEMA)
 
-    keys_med = _get_invoice_keys(df_medicao)
+        keys_med = _get_invoice_keys(df_medicao)
 
-    if not df_medicao.empty:
-        success_med = _upsert_dataframe(df_medicao, FILE_MEDICAO, keys=keys_med)
+        if not df_medicao.empty:
+            success_med = _append_delta(df_medicao, DIR_MEDICAO, keys_med, MEDICAO_SCHEMA)
 
-    return success_fin and success_med
+        success = success_fin and success_med
+        if success:
+            # Depois dos fatos: o manifesto nunca lista uma fatura que não foi gravada.
+            # Chave que veio em só uma das tabelas mantém a contagem da outra.
+            partial = set(_invoice_counts(df_financeiro)) ^ set(_invoice_counts(df_medicao))
+            manifest = _manifest_rows(
+                df_financeiro, df_medicao, sources, imported_at=pd.Timestamp.now(tz="UTC"),
+                previous=_manifest_entries(partial),
+            )
+            if not manifest.empty:
+                success = _append_delta(manifest, DIR_MANIFEST, MANIFEST_KEYS, MANIFEST_SCHEMA)
 
-def load_all_data():
+        # Mesmo após falha parcial: algum delta pode ter sido gravado
+        _bump_generation()
+
+    if success:
+        # Fora do lock e da chamada: o custo de save_data é o da fatura
+        schedule_compaction()
+    return success
+
+def load_all_data(clients=None, years=None):
     """
     Carrega os dados dos arquivos Parquet para memória.
     Renomeado para 'load_all_data' para manter compatibilidade com app.py
+
+    clients/years (opcionais) restringem a leitura às partições desses
+    clientes e anos de referência.
     """
-    init_db()
     try:
-        df_fat = pd.read_parquet(FILE_FATURAS)
-        df_med = pd.read_parquet(FILE_MEDICAO)
-        return df_fat, df_med
+        return read_tables(clients, years)
     except Exception as e:
         st.error(f"Erro ao ler banco de dados: {e}")
         return pd.DataFrame(), pd.DataFrame()
 
+
+def read_tables(clients=None, years=None):
+    """Como load_all_data, mas propaga erros de leitura em vez de exibi-los."""
+    init_db()
+    return tuple(
+        _read_table(base_dir, clients, years, schema=schema) for base_dir, schema in _tables()
+    )
+
+
+def clear_data():
+    """Apaga todas as faturas e medições gravadas."""
+    with write_lock(), compaction_lock():
+        for base_dir in (DIR_FATURAS, DIR_MEDICAO, DIR_MANIFEST):
+            shutil.rmtree(base_dir, ignore_errors=True)
+        for legacy_path in (FILE_FATURAS, FILE_MEDICAO):
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        _bump_generation()
+
 # ==============================================================================
 # PARTE NOVA: FERRAMENTAS DO AGENTE (DuckDB/SQL)
 # ==============================================================================
 
-def _get_connection():
-    """Cria conexão DuckDB em memória com os dados atuais."""
-    df_fat, df_med = load_all_data()
+# Conexão DuckDB única do processo: as views sobre o Parquet são criadas uma
+# vez e cada chamada das ferramentas usa um cursor próprio (thread-safe).
+_connection = None
+_connection_version = None
+_connection_lock = threading.Lock()
 
-    if df_fat.empty and df_med.empty:
+
+def _has_partitions(base_dir):
+    try:
+        return any(name.startswith("numero_cliente=") for name in os.listdir(base_dir))
+    except FileNotFoundError:
+        return False
+
+
+def store_version():
+    """
+    Assinatura barata do que está gravado: muda a cada save_data,
+    compactação, migração ou limpeza da base, inclusive feitos por outro
+    processo (importação em lote, monitor de pasta). Só lê o arquivo de
+    geração (None em base nunca gravada).
+    """
+    try:
+        with open(os.path.join(DB_FOLDER, GENERATION_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
         return None
 
-    con = duckdb.connect(database=':memory:')
 
-    if not df_fat.empty:
-        con.register('faturas', df_fat)
+def _bump_generation():
+    """Nova geração da base; chamar com o lock da escrita, depois de gravar."""
+    token = uuid.uuid4().hex
+    _atomic_write(os.path.join(DB_FOLDER, GENERATION_FILE), lambda f: f.write(token.encode()))
+
+
+def _sync_views(con):
+    """(Re)cria as views faturas/medicao com os deltas atuais; False se não há dados."""
+    has_data = False
+    for name, base_dir in (("faturas", DIR_FATURAS), ("medicao", DIR_MEDICAO)):
+        has_base = _has_partitions(base_dir)
+        deltas = _delta_files(base_dir)
+        if not has_base and not deltas:
+            con.execute(f"DROP VIEW IF EXISTS {name}")
+            continue
+
+        # O padrão é expandido a cada consulta: partições novas entram sozinhas
+        pattern = _partition_path(base_dir, "*", "*").replace("'", "''")
+        base_source = f"'{pattern}'" if has_base else None
+        con.execute(
+            f"CREATE OR REPLACE VIEW {name} AS {_merge_sql(base_source, deltas, hive=True)}"
+        )
+        has_data = True
+    return has_data
+
+
+def _get_connection():
+    """
+    Cursor da conexão DuckDB do processo, com views sobre os datasets (ou
+    None se não há dados). As views só são recriadas quando store_version()
+    muda, ou seja, depois de um save_data. Com hive_partitioning, filtros
+    por numero_cliente/ano só leem os dados das partições correspondentes.
+    """
+    global _connection, _connection_version
+
+    init_db()
+    version = store_version()
+    with _connection_lock:
+        if _connection is None:
+            _connection = duckdb.connect(database=':memory:')
+            _connection_version = None
+
+        if version != _connection_version:
+            has_data = _sync_views(_connection)
+            _connection_version = version if has_data else None
+            if not has_data:
+                return None
+
+        return _connection.cursor()
+
 
-    if not df_med.empty:
-        con.register('medicao', df_med)
+def _invalidate_connection():
+    """Força recriar as views na próxima chamada (ex.: após SQL com erro)."""
+    global _connection_version
 
-    return con
+    with _connection_lock:
+        _connection_version = None
 
 def query_energy_data(query: str) -> str:
     """Executa consultas SQL para o Agente."""
@@ -153,7 +989,10 @@ def query_energy_data(query: str) -> str:
         result = con.execute(query).fetchdf()
         return result.to_markdown(index=False)
     except Exception as e:
+        _invalidate_connection()
         return f"Erro ao executar SQL: {e}"
+    finally:
+        con.close()
 
 def plot_energy_chart(query: str, chart_type: str = "bar") -> str:
     """Gera gráficos baseados em SQL."""
@@ -181,4 +1020,7 @@ def plot_energy_chart(query: str, chart_type: str = "bar") -> str:
         return "Gráfico gerado com sucesso."
 
     except Exception as e:
+        _invalidate_connection()
         return f"Erro ao plotar gráfico: {e}"
+    finally:
+        con.close()
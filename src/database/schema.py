@@ -0,0 +1,180 @@
+"""
+Esquema explícito das tabelas faturas e medicao (e do manifesto de faturas
+importadas).
+
+Sem ele, cada Parquet herdava os tipos que o pandas inferiu: textos
+repetidos como object, datas de leitura como texto e numero_dias como
+float. Os tipos escolhidos:
+
+- textos de baixa cardinalidade (referência, cliente, descrição, unidade,
+  medidor, segmento): dicionário no Parquet/Arrow e category no pandas;
+- valores em R$ e preços unitários: float64;
+- quantidades, consumo, alíquota e fator multiplicador: float32;
+- leituras do medidor (contadores acumulados): float64;
+- datas de leitura: DATE; numero_dias: int16 (nulo quando ausente).
+
+mes_referencia continua o texto "MM/AAAA" (é a chave das faturas e das
+partições); data_referencia traz o mesmo mês como DATE (dia 1), para
+ordenar e filtrar períodos sem converter texto.
+"""
+
+import pandas as pd
+import pyarrow as pa
+
+# Incrementar quando os tipos mudarem: init_db regrava as partições antigas
+SCHEMA_VERSION = 1
+
+TEXT = pa.dictionary(pa.int32(), pa.string())
+
+_KEYS = [
+    ("mes_referencia", TEXT),
+    ("numero_cliente", TEXT),
+    ("data_referencia", pa.date32()),
+]
+
+FATURAS_SCHEMA = pa.schema(
+    _KEYS
+    + [
+        ("descricao", TEXT),
+        ("unidade", TEXT),
+        ("quantidade", pa.float32()),
+        ("preco_unitario", pa.float64()),
+        ("valor_total", pa.float64()),
+        ("pis_cofins", pa.float64()),
+        ("base_calculo_icms", pa.float64()),
+        ("aliquota_icms", pa.float32()),
+        ("valor_icms", pa.float64()),
+        ("tarifa_unitaria", pa.float64()),
+    ]
+)
+
+MEDICAO_SCHEMA = pa.schema(
+    _KEYS
+    + [
+        ("numero_medidor", TEXT),
+        ("segmento", TEXT),
+        ("data_leitura_anterior", pa.date32()),
+        ("leitura_anterior", pa.float64()),
+        ("data_leitura_atual", pa.date32()),
+        ("leitura_atual", pa.float64()),
+        ("fator_multiplicador", pa.float32()),
+        ("consumo_kwh", pa.float32()),
+        ("numero_dias", pa.int16()),
+    ]
+)
+
+# Manifesto: uma linha por fatura gravada (ver database.manager)
+MANIFEST_SCHEMA = pa.schema(
+    [
+        ("mes_referencia", TEXT),
+        ("numero_cliente", TEXT),
+        ("content_hash", pa.string()),
+        ("parser_version", TEXT),
+        ("imported_at", pa.timestamp("us", tz="UTC")),
+        ("rows_financeiro", pa.int32()),
+        ("rows_medicao", pa.int32()),
+    ]
+)
+
+_PANDAS_DTYPES = {
+    pa.float32(): "float32",
+    pa.float64(): "float64",
+    pa.int16(): "Int16",
+    pa.int32(): "Int32",
+}
+
+
+def reference_dates(references):
+    """Primeiro dia do mês de cada mes_referencia ("MM/AAAA"); NaT se inválido."""
+    references = _to_category(references)
+    # Converte só os valores distintos (poucos meses para muitas linhas)
+    months = pd.to_datetime(references.cat.categories, format="%m/%Y", errors="coerce")
+    dates = months.take(references.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(dates, index=references.index)
+
+
+def _to_category(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    try:
+        text = pa.array(values, from_pandas=True)
+        if not pa.types.is_string(text.type):
+            text = text.cast(pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Coluna mista (str + números)
+        text = values.where(values.isna(), values.astype(str))
+        text = pa.array(text, pa.string(), from_pandas=True)
+    # Codificação em Arrow: bem mais rápida que astype("category") sobre object
+    return pd.Series(text.dictionary_encode().to_pandas(), index=values.index, name=values.name)
+
+
+def _parse_dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.dt.normalize()
+    # Texto da fatura (dd/mm/aaaa) ou datas já gravadas como texto ISO
+    text = values.astype("string")
+    dates = pd.to_datetime(text, format="%d/%m/%Y", errors="coerce")
+    return dates.fillna(pd.to_datetime(text, format="ISO8601", errors="coerce"))
+
+
+def _convert(values, arrow_type):
+    if pa.types.is_dictionary(arrow_type):
+        return _to_category(values)
+    if pa.types.is_date32(arrow_type):
+        return _parse_dates(values)
+    if pa.types.is_timestamp(arrow_type):
+        return pd.to_datetime(values, utc=True)
+    if pa.types.is_string(arrow_type):
+        return values
+
+    numbers = pd.to_numeric(values, errors="coerce")
+    if pa.types.is_integer(arrow_type):
+        numbers = numbers.round()
+    return numbers.astype(_PANDAS_DTYPES[arrow_type])
+
+
+def conform(df, schema):
+    """
+    Cópia de df com os tipos do esquema. data_referencia é derivada de
+    mes_referencia; colunas fora do esquema ficam como estão e colunas do
+    esquema ausentes em df não são criadas.
+    """
+    if df.empty:
+        return df
+
+    df = df.copy(deep=False)
+    for field in schema:
+        if field.name in df.columns:
+            df[field.name] = _convert(df[field.name], field.type)
+    if "mes_referencia" in df.columns and "data_referencia" in schema.names:
+        df["data_referencia"] = reference_dates(df["mes_referencia"])
+    return df
+
+
+def _cast(table, schema, strict=True):
+    for field in schema:
+        index = table.schema.get_field_index(field.name)
+        if index < 0 or table.schema.field(index).type == field.type:
+            continue
+        try:
+            table = table.set_column(index, field, table.column(index).cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            if strict:
+                raise
+            # Ex.: datas de partições antigas em texto dd/mm/aaaa; conform converte
+    return table
+
+
+def to_arrow(df, schema):
+    """Tabela Arrow de df com as colunas do esquema já nos tipos de disco."""
+    return _cast(pa.Table.from_pandas(df, preserve_index=False), schema)
+
+
+def from_arrow(table, schema):
+    """
+    DataFrame conformado a partir de uma tabela Arrow (ex.: resultado do
+    DuckDB). Os textos viram dicionário ainda em Arrow, sem criar um objeto
+    str do Python por célula.
+    """
+    df = _cast(table, schema, strict=False).to_pandas(date_as_object=False)
+    return conform(df, schema)
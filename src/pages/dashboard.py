@@ -1,11 +1,10 @@
 import streamlit as st
 
-from database import load_all_data
+from services.data_service import get_store_data
 from views.dashboard import render_dashboard_tab
 
-df_faturas, df_medicao = load_all_data()
-st.session_state["df_faturas"] = df_faturas
-st.session_state["df_medicao"] = df_medicao
+# Cópia compartilhada (cache por versão da base): não alterar in-place
+df_faturas, df_medicao = get_store_data()
 
 if df_faturas.empty:
     st.info("👋 Bem-vindo! Comece importando uma fatura no menu lateral.")
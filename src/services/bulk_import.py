@@ -0,0 +1,277 @@
+"""
+Importação em lote de faturas Enel-CE.
+
+Recebe um diretório, um padrão glob ou uma lista de arquivos, distribui a
+extração dos PDFs entre processos (ProcessPoolExecutor) e grava todos os
+DataFrames resultantes em uma única escrita via save_data.
+
+Uso via linha de comando (a partir da raiz do projeto):
+    python scripts/bulk_import.py data/faturas --workers 8
+"""
+
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from services.cache import (
+    CACHE_FOLDER,
+    ExtractionCache,
+    extract_data_cached,
+    hash_pdf_file,
+    invoice_sources,
+)
+from services.extractor import extract_data_from_pdf, invoice_keys, select_invoices
+from services.password_resolver import resolve_passwords
+from services.pdf_probe import PDF_CORRUPT, PDF_ENCRYPTED, probe_pdf
+from services.profiling import ExtractionProfiler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileResult:
+    """Resultado da extração de um único PDF."""
+
+    path: str
+    ok: bool
+    rows_financeiro: int = 0
+    rows_medicao: int = 0
+    invoices: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class BulkImportReport:
+    """Resumo de uma importação em lote."""
+
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+    saved: bool = False
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def pdfs_per_second(self):
+        if self.elapsed <= 0:
+            return 0.0
+        return len(self.results) / self.elapsed
+
+    def summary(self):
+        return (
+            f"{len(self.results)} PDFs em {self.elapsed:.2f}s "
+            f"({self.pdfs_per_second:.1f} PDFs/s): "
+            f"{len(self.succeeded)} ok, {len(self.failed)} com falha, "
+            f"{sum(r.invoices for r in self.results)} faturas"
+        )
+
+
+def collect_pdf_paths(sources):
+    """
+    Resolve as fontes em uma lista ordenada e sem repetição de PDFs.
+
+    Cada fonte pode ser um diretório (busca recursiva por *.pdf), um padrão
+    glob ou o caminho de um arquivo.
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+
+    paths = []
+    for source in sources:
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            pattern = os.path.join(source, "**", "*")
+            matches = [
+                p for p in glob.glob(pattern, recursive=True)
+                if p.lower().endswith(".pdf") and os.path.isfile(p)
+            ]
+        elif glob.has_magic(source):
+            matches = [p for p in glob.glob(source, recursive=True) if os.path.isfile(p)]
+        else:
+            matches = [source]
+        paths.extend(sorted(matches))
+
+    return list(dict.fromkeys(paths))
+
+
+def triage_pdf(path, password=None):
+    """
+    Motivo para não extrair o PDF ("" se pode seguir), decidido só pelo
+    trailer: arquivos corrompidos/incompletos e protegidos sem senha
+    informada falham sem ocupar um processo do pool.
+    """
+    status = probe_pdf(path)
+    if status == PDF_CORRUPT:
+        return "PDF corrompido ou incompleto"
+    if status == PDF_ENCRYPTED and not password:
+        return "PDF protegido por senha (informe a senha)"
+    return ""
+
+
+def _extract_file(path, password=None, cache_folder=None, backend=None, profile_path=None):
+    """Extrai um PDF. Roda dentro dos processos do pool."""
+    if profile_path:
+        # Cada processo acrescenta seus registros ao mesmo JSONL
+        with ExtractionProfiler(jsonl_path=profile_path):
+            return _extract_file(path, password, cache_folder, backend)
+
+    start = time.perf_counter()
+    try:
+        if cache_folder:
+            df_fin, df_med = extract_data_cached(
+                path, password, cache=ExtractionCache(cache_folder), backend=backend
+            )
+        else:
+            df_fin, df_med = extract_data_from_pdf(path, password, backend)
+        error = "" if not df_fin.empty else "Nenhum item financeiro extraído"
+    except Exception as e:
+        df_fin, df_med = pd.DataFrame(), pd.DataFrame()
+        error = str(e) or type(e).__name__
+    return path, df_fin, df_med, error, time.perf_counter() - start
+
+
+def _iter_extractions(passwords, max_workers, cache_folder=None, backend=None,
+                      profile_path=None):
+    """Extrai cada caminho do dict passwords (caminho -> senha)."""
+    if not passwords:
+        return
+    if max_workers == 1:
+        for path, password in passwords.items():
+            yield _extract_file(path, password, cache_folder, backend, profile_path)
+        return
+
+    # "spawn" evita fork() de um processo com threads (pyarrow/streamlit)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(_extract_file, path, password, cache_folder, backend, profile_path)
+            for path, password in passwords.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def bulk_import(sources, password=None, max_workers=None, save=True,
+                use_cache=True, cache_folder=CACHE_FOLDER, backend=None,
+                profile_path=None, credentials=None):
+    """
+    Importa todos os PDFs das fontes informadas.
+
+    Args:
+        sources: Diretório, padrão glob, caminho ou lista desses.
+        password (str | list, opcional): Senha usada para os PDFs
+            protegidos. Uma lista é tratada como senhas candidatas: a de
+            cada PDF é descoberta por services.password_resolver antes da
+            extração, e os que nenhuma abre entram como falha.
+        max_workers (int, opcional): Número de processos. None usa todos os
+            núcleos; 1 extrai no processo atual, sem pool.
+        save (bool): Se False, apenas extrai (útil para validação/dry-run).
+        use_cache (bool): Consulta/alimenta o cache de extrações por hash
+            do PDF antes de abrir cada arquivo.
+        cache_folder (str): Pasta do cache de extrações.
+        backend (str, opcional): Backend de leitura dos PDFs ("pdfplumber"
+            ou "pdfium"). None usa o padrão de services.pdf_backends.
+        profile_path (str, opcional): Grava o perfil por etapa de cada PDF
+            extraído (services.profiling) neste arquivo JSONL. Acertos de
+            cache não geram registro.
+        credentials (CredentialMap, opcional): Mapa UC -> senha usado com
+            senhas candidatas; padrão o arquivo local do resolver.
+
+    Antes da extração, cada PDF passa por triage_pdf: corrompidos e
+    protegidos (sem password) entram no relatório como falha direto.
+
+    Returns:
+        BulkImportReport com o resultado por arquivo e a vazão em PDFs/s.
+    """
+    paths = collect_pdf_paths(sources)
+    report = BulkImportReport()
+
+    if not paths:
+        return report
+
+    start = time.perf_counter()
+    extracted = {}
+    to_extract = []
+    for path in paths:
+        error = triage_pdf(path, password)
+        if error:
+            extracted[path] = (pd.DataFrame(), pd.DataFrame(), error, 0.0)
+        else:
+            to_extract.append(path)
+
+    if isinstance(password, (list, tuple)):
+        resolution = resolve_passwords(to_extract, password, credentials, max_workers)
+        for result in resolution.unresolved:
+            extracted[result.path] = (pd.DataFrame(), pd.DataFrame(), result.error, 0.0)
+        passwords = resolution.passwords
+    else:
+        passwords = dict.fromkeys(to_extract, password)
+
+    for path, df_fin, df_med, error, seconds in _iter_extractions(
+        passwords, max_workers, cache_folder if use_cache else None, backend, profile_path,
+    ):
+        extracted[path] = (df_fin, df_med, error, seconds)
+
+    # Percorre na ordem das fontes (o pool devolve na ordem de conclusão),
+    # assim a primeira ocorrência de uma fatura repetida é a que fica
+    frames_fin, frames_med, kept = [], [], []
+    seen_invoices = {}
+
+    for path in paths:
+        df_fin, df_med, error, seconds = extracted[path]
+        result = FileResult(path=path, ok=not error, seconds=seconds, error=error)
+
+        if result.ok:
+            # Extratos consolidados trazem várias UCs: a repetição é por fatura
+            keys = invoice_keys(df_fin)
+            new_keys = [key for key in keys if key not in seen_invoices]
+            if not new_keys:
+                result.ok = False
+                result.error = f"Fatura duplicada no lote ({seen_invoices[keys[0]]})"
+            else:
+                if len(new_keys) < len(keys):
+                    df_fin = select_invoices(df_fin, new_keys)
+                    df_med = select_invoices(df_med, new_keys)
+                seen_invoices.update(dict.fromkeys(new_keys, path))
+                frames_fin.append(df_fin)
+                if not df_med.empty:
+                    frames_med.append(df_med)
+                kept.append((path, df_fin))
+                result.invoices = len(new_keys)
+                result.rows_financeiro = len(df_fin)
+                result.rows_medicao = len(df_med)
+
+        if result.ok:
+            logger.info("Importado: %s (%.2fs)", path, seconds)
+        else:
+            logger.warning("Falha ao importar %s: %s", path, result.error)
+
+        report.results.append(result)
+
+    if save and frames_fin:
+        # Import tardio: evita carregar streamlit nos processos do pool
+        from database import save_data
+
+        df_fin_all = pd.concat(frames_fin, ignore_index=True)
+        df_med_all = pd.concat(frames_med, ignore_index=True) if frames_med else pd.DataFrame()
+        # Hash de origem no manifesto: o mesmo PDF com outro nome é reconhecido depois
+        sources = {}
+        for path, df_fin in kept:
+            sources.update(invoice_sources(df_fin, hash_pdf_file(path)))
+        report.saved = save_data(df_fin_all, df_med_all, sources)
+
+    report.elapsed = time.perf_counter() - start
+    logger.info("Importação em lote: %s", report.summary())
+    return report
@@ -0,0 +1,191 @@
+"""
+Cache em disco de extrações de faturas, endereçado pelo conteúdo do PDF.
+
+A chave é o SHA-256 dos bytes do PDF; cada entrada guarda os dois
+DataFrames de extract_data_from_pdf em Parquet, dentro de uma pasta por
+PARSER_VERSION. Mudou a lógica de Parser2025/Parser2026 (e a versão foi
+incrementada)? As entradas antigas deixam de ser encontradas e são
+removidas na próxima abertura do cache.
+
+Estrutura:
+    data/cache/<PARSER_VERSION>/<sha256>/faturas.parquet
+    data/cache/<PARSER_VERSION>/<sha256>/medicao.parquet
+
+A evicção é LRU por tamanho: cada acerto atualiza o mtime da entrada e,
+quando o total passa de max_bytes, as entradas menos recentes saem.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+from services.extractor import PARSER_VERSION, extract_data_from_pdf, invoice_keys
+from services.pdf_backends import read_source
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_FOLDER = os.path.join(BASE_DIR, "data", "cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_FILE_FIN = "faturas.parquet"
+_FILE_MED = "medicao.parquet"
+
+
+def hash_pdf_bytes(data):
+    """SHA-256 (hex) dos bytes do PDF."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_pdf_file(file_path):
+    """SHA-256 (hex) de um PDF em disco, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def invoice_sources(df_financeiro, content_hash, parser_version=PARSER_VERSION):
+    """
+    Origem das faturas extraídas de um PDF, no formato de
+    database.save_data(sources=...): (mes_referencia, numero_cliente) ->
+    (content_hash, parser_version).
+    """
+    return {key: (content_hash, parser_version) for key in invoice_keys(df_financeiro)}
+
+
+class ExtractionCache:
+    """Cache LRU, limitado por tamanho, de resultados de extração."""
+
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES,
+                 parser_version=PARSER_VERSION):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+        self.version_folder = os.path.join(folder, parser_version)
+        os.makedirs(self.version_folder, exist_ok=True)
+        self._purge_stale_versions()
+
+    def _entry_path(self, key):
+        return os.path.join(self.version_folder, key)
+
+    def _purge_stale_versions(self):
+        """Remove entradas geradas por versões anteriores dos parsers."""
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name != self.parser_version and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def get(self, key):
+        """Retorna (df_financeiro, df_medicao) ou None se não estiver em cache."""
+        entry = self._entry_path(key)
+        try:
+            df_fin = pd.read_parquet(os.path.join(entry, _FILE_FIN))
+            df_med = pd.read_parquet(os.path.join(entry, _FILE_MED))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except Exception as e:
+            logger.warning("Entrada de cache inválida %s: %s", key, e)
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        # Marca como usada recentemente (LRU)
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return df_fin, df_med
+
+    def put(self, key, df_financeiro, df_medicao):
+        """Grava a entrada de forma atômica e aplica a evicção."""
+        entry = self._entry_path(key)
+        tmp_entry = os.path.join(self.version_folder, f".tmp-{key}-{uuid.uuid4().hex}")
+        os.makedirs(tmp_entry)
+        try:
+            df_financeiro.to_parquet(os.path.join(tmp_entry, _FILE_FIN), index=False)
+            df_medicao.to_parquet(os.path.join(tmp_entry, _FILE_MED), index=False)
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Outro processo gravou a mesma entrada primeiro
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            if not os.path.isdir(entry):
+                raise
+        self.evict()
+
+    def _entries(self):
+        """Lista (mtime, tamanho, caminho) das entradas da versão atual."""
+        entries = []
+        for name in os.listdir(self.version_folder):
+            path = os.path.join(self.version_folder, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove as entradas menos usadas até caber em max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def invalidate(self):
+        """Descarta todas as entradas (de todas as versões)."""
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.makedirs(self.version_folder, exist_ok=True)
+
+    def __contains__(self, key):
+        return os.path.isdir(self._entry_path(key))
+
+    def __len__(self):
+        return len(self._entries())
+
+
+def extract_data_cached(file_path, password=None, cache=None, content_hash=None,
+                        backend=None):
+    """
+    Igual a extract_data_from_pdf, mas consulta o cache antes de abrir o PDF.
+
+    Só extrações bem-sucedidas (com itens financeiros) são gravadas, para
+    que uma senha errada não fique registrada como resultado vazio.
+    file_path pode ser um caminho ou o PDF em memória (bytes, BytesIO).
+    """
+    if cache is None:
+        cache = ExtractionCache()
+
+    source = read_source(file_path)
+    if content_hash:
+        key = content_hash
+    elif isinstance(source, str):
+        key = hash_pdf_file(source)
+    else:
+        key = hash_pdf_bytes(source)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    df_fin, df_med = extract_data_from_pdf(source, password, backend)
+
+    if not df_fin.empty:
+        try:
+            cache.put(key, df_fin, df_med)
+        except Exception as e:
+            logger.warning("Não foi possível gravar no cache: %s", e)
+
+    return df_fin, df_med
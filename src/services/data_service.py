@@ -0,0 +1,43 @@
+"""
+Dados das páginas do app, lidos uma vez por versão da base.
+
+As páginas rodam de novo a cada interação com um widget. Em vez de cada
+rerun (de cada sessão) reler o Parquet, get_store_data() devolve os
+DataFrames guardados em st.cache_resource sob a versão atual da base
+(database.store_version: a geração da base, renovada a cada save_data,
+compactação ou limpeza, inclusive feitas por outro processo). Enquanto
+nada é gravado, o rerun só lê a geração; todas as sessões compartilham a
+mesma cópia.
+
+Os DataFrames devolvidos são compartilhados: trate-os como somente
+leitura e faça .copy() antes de alterar colunas.
+"""
+
+import logging
+
+import pandas as pd
+import streamlit as st
+
+from database import read_tables, store_version
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_snapshot(version):
+    # max_entries=1: a versão anterior sai do cache assim que a nova é lida
+    logger.info("Carregando dados da base (versão nova)")
+    return read_tables()
+
+
+def get_store_data():
+    """
+    (df_faturas, df_medicao) da versão atual da base, compartilhados entre
+    reruns e sessões. Em caso de erro de leitura, exibe o erro e devolve
+    DataFrames vazios (sem guardar no cache).
+    """
+    try:
+        return _load_snapshot(store_version())
+    except Exception as e:
+        st.error(f"Erro ao ler banco de dados: {e}")
+        return pd.DataFrame(), pd.DataFrame()
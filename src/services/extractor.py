@@ -3,6 +3,11 @@ Módulo de extração de dados de faturas de energia Enel-CE.
 
 Arquitetura:
 - Helper functions (módulo level): normalize_negative_value, clean_line, process_values, etc.
+- ColumnBuffer: acumulador colunar das linhas extraídas (sem dict por linha)
+- ParseContext: documento aberto uma única vez, percorrido página a página,
+  com texto/palavras da página corrente em cache (leitura delegada a um
+  backend de services.pdf_backends)
+- Registro de parsers: cada parser declara um fingerprint barato (matches)
 - InvoiceParser (base): lógica compartilhada (template method pattern)
 - Parser2025 / Parser2026: implementações específicas por formato
 - extract_data_from_pdf: interface pública (roteia para o parser correto)
@@ -12,12 +17,74 @@ import logging
 import re
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from dataclasses import replace
 
 import pandas as pd
-import pdfplumber
+import pyarrow as pa
+import pyarrow.compute as pc
+from pdfplumber.utils import extract_words
+
+from services.pdf_backends import get_backend, source_label
+from services.profiling import annotate, note_error, profile_file, profile_stage
 
 logger = logging.getLogger(__name__)
 
+# ==============================================================================
+# PADRÕES PRÉ-COMPILADOS
+# ==============================================================================
+# Todos os regex usados no parsing ficam compilados aqui, uma única vez na
+# importação do módulo, em vez de serem passados como string a cada chamada.
+
+MONTHS_PATTERN = r"(?:JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)"
+
+# clean_line
+HISTORY_SUFFIX_REGEX = re.compile(
+    r"\s" + MONTHS_PATTERN + r"[\s\/]*\d{2,4}.*$", re.IGNORECASE
+)
+UNIT_LINE_REGEX = re.compile(
+    r"^(.*?)\s+(kWh|kW|dias|unid|un)\s+(.*)$", re.IGNORECASE
+)
+SIMPLE_LINE_REGEX = re.compile(r"^(.*?)\s+(\d+[.,]\d{2}.*)$")
+
+# process_values
+VALUES_TRAILER_REGEX = re.compile(
+    r"\s(I\s?CMS|LID|DE|FATURAMENTO|TRIBUTOS|COFINS|PIS).*", re.IGNORECASE
+)
+
+# Artefatos CMYK (formato 2026)
+CMYK_PREFIX_REGEX = re.compile(r"^(?:[CMYK]{1,8}\s+)+")
+CMYK_WORD_REGEX = re.compile(r"^[CMYK]+$")
+
+# Referência e código do cliente
+CLIENT_CODE_REGEX = re.compile(r"utilizando\s+o\s+código\s+(\d+)", re.IGNORECASE)
+CLIENT_VISUAL_REGEX = re.compile(r"\b(\d{7,12})\s*\n\s*\d{2}/\d{4}")
+CLIENT_ID_2026_REGEX = re.compile(r"(\d{7,12})\s*/\s*(\d{7,12})\s+R\$")
+REFERENCE_REGEX = re.compile(r"(?<!\d/)\b(\d{2}/(\d{4}))\b")
+PAYMENT_LINE_REGEX = re.compile(
+    r"\d{2}/\d{2}/(\d{4})\s+\d+\s+(\d{2}/(\d{4}))\s+\d{2}/\d{2}/\d{4}\s+[\d.,]+"
+)
+DUE_DATE_REGEX = re.compile(r"(\d{2}/(\d{4}))\s+\d{2}/\d{2}/\d{4}\s+R\$")
+
+# Âncoras das seções no texto com layout (linhas podem ter prefixo CMYK)
+FINANCIAL_START_ANCHOR = re.compile(r"(?:ITENS|DESCRI\S*)\s+DE\s+FATURA", re.IGNORECASE)
+FINANCIAL_END_ANCHOR = re.compile(
+    r"^[ CMYK]*TOTAL\b|EQUIPAMENTOS\s+DE\s+MEDIÇÃO", re.MULTILINE
+)
+MEASUREMENT_START_ANCHOR = re.compile(
+    r"(?:EQUIPAMENTOS|DADOS)\s+DE\s+MEDIÇÃO", re.IGNORECASE
+)
+MEASUREMENT_END_ANCHOR = re.compile(r"MES_ANO|HISTÓRICO|NOTIFICAÇÃO", re.IGNORECASE)
+
+# Fingerprint das faturas Enel-CE no texto cru: cabeçalho da tabela de itens
+# (mesmo critério de início de captura de _extract_financial_items)
+INVOICE_TABLE_ANCHOR = re.compile(r"(?:ITENS|DESCRI)[^\n]*FATURA", re.IGNORECASE)
+
+# Código do cliente no texto cru de uma página: marca o início de uma fatura
+# (em extratos consolidados, cada UC começa em uma página nova)
+INVOICE_HEADER_REGEX = re.compile(
+    CLIENT_CODE_REGEX.pattern + "|" + CLIENT_ID_2026_REGEX.pattern, re.IGNORECASE
+)
+
 # ==============================================================================
 # HELPER FUNCTIONS (Pure, sem dependência de estado)
 # ==============================================================================
@@ -55,21 +122,58 @@ def normalize_negative_value(value_str):
     return value_str
 
 
+def parse_br_numeric(values):
+    """
+    Converte uma coluna inteira de números no formato brasileiro para float64.
+
+    Vetorizado com pyarrow.compute (sem chamada Python por célula). Trata:
+    - negativos com sinal no fim ou no início ("19,52-" e "-19,52")
+    - separador de milhar com ponto e decimal com vírgula ("1.234,56")
+    - valores já normalizados ("262.35") e números nativos
+    Valores que não são números viram NaN (como pd.to_numeric errors="coerce").
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.astype("float64")
+
+    try:
+        arr = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Coluna mista (str + números): cai para a conversão célula a célula
+        arr = pa.array(series.astype(str), type=pa.string())
+
+    arr = pc.utf8_trim_whitespace(arr)
+    negative = pc.or_(pc.starts_with(arr, "-"), pc.ends_with(arr, "-"))
+    arr = pc.utf8_trim(arr, "-")
+
+    # Com vírgula (ou mais de um ponto), os pontos são separadores de milhar
+    thousands = pc.or_(
+        pc.match_substring(arr, ","),
+        pc.greater(pc.count_substring(arr, "."), 1),
+    )
+    arr = pc.if_else(thousands, pc.replace_substring(arr, ".", ""), arr)
+    arr = pc.replace_substring(arr, ",", ".")
+
+    valid = pc.match_substring_regex(arr, r"^(\d+\.?\d*|\.\d+)$")
+    numbers = pc.cast(pc.if_else(valid, arr, pa.scalar(None, pa.string())), pa.float64())
+    numbers = pc.if_else(negative, pc.negate(numbers), numbers)
+
+    return pd.Series(
+        numbers.to_numpy(zero_copy_only=False), index=series.index, name=series.name
+    )
+
+
 def clean_line(line):
     """
     Tenta separar a linha em: Descrição | Unidade | Valores
     """
-    history_pattern = (
-        r"\s(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)[\s\/]*\d{2,4}.*$"
-    )
-    cleaned_line = re.sub(history_pattern, "", line, flags=re.IGNORECASE).strip()
+    cleaned_line = HISTORY_SUFFIX_REGEX.sub("", line).strip()
 
     if not cleaned_line:
         return None
 
-    unit_match = re.search(
-        r"^(.*?)\s+(kWh|kW|dias|unid|un)\s+(.*)$", cleaned_line, re.IGNORECASE
-    )
+    unit_match = UNIT_LINE_REGEX.search(cleaned_line)
     if unit_match:
         return {
             "description": unit_match.group(1).strip(),
@@ -78,7 +182,7 @@ def clean_line(line):
             "type": "standard",
         }
 
-    number_match = re.search(r"^(.*?)\s+(\d+[.,]\d{2}.*)$", cleaned_line)
+    number_match = SIMPLE_LINE_REGEX.search(cleaned_line)
     if number_match:
         return {
             "description": number_match.group(1).strip(),
@@ -90,65 +194,34 @@ def clean_line(line):
     return None
 
 
-def process_values(values_str, item_type):
+def _value_row(values_str, item_type):
     """
-    Mapeia a string de números para as colunas corretas.
+    Tokens numéricos da linha já posicionados, na ordem de VALUE_FIELDS
+    (tupla de 8 strings, "" nas colunas ausentes).
     """
-    clean_values = re.sub(
-        r"\s(I\s?CMS|LID|DE|FATURAMENTO|TRIBUTOS|COFINS|PIS).*",
-        "",
-        values_str,
-        flags=re.IGNORECASE,
-    ).strip()
-    tokens = clean_values.split()
-
-    tokens = [normalize_negative_value(token) for token in tokens]
-
-    columns = {
-        "quantidade": "",
-        "preco_unitario": "",
-        "valor_total": "",
-        "pis_cofins": "",
-        "base_calculo_icms": "",
-        "aliquota_icms": "",
-        "valor_icms": "",
-        "tarifa_unitaria": "",
-    }
-
-    if not tokens:
-        return columns
-
-    if item_type == "standard":
-        fields = [
-            "quantidade",
-            "preco_unitario",
-            "valor_total",
-            "pis_cofins",
-            "base_calculo_icms",
-            "aliquota_icms",
-            "valor_icms",
-            "tarifa_unitaria",
-        ]
+    clean_values = VALUES_TRAILER_REGEX.sub("", values_str).strip()
+    tokens = [normalize_negative_value(token) for token in clean_values.split()]
 
-        if len(tokens) >= 8:
-            for i, field in enumerate(fields):
-                columns[field] = tokens[i]
-        elif len(tokens) >= 3:
-            columns["quantidade"] = tokens[0]
-            columns["preco_unitario"] = tokens[1]
-            columns["valor_total"] = tokens[2]
-            for i, val in enumerate(tokens[3:]):
-                if i < len(fields[3:]):
-                    columns[fields[3 + i]] = val
+    row = [""] * len(VALUE_FIELDS)
 
-    elif item_type == "simple":
-        columns["valor_total"] = tokens[0]
-        fields = ["pis_cofins", "base_calculo_icms", "aliquota_icms", "valor_icms"]
-        for i, val in enumerate(tokens[1:]):
-            if i < len(fields):
-                columns[fields[i]] = val
+    if item_type == "standard" and len(tokens) >= 3:
+        # quantidade, preço, valor e o que vier a seguir, na ordem das colunas
+        count = min(len(tokens), len(VALUE_FIELDS))
+        row[:count] = tokens[:count]
 
-    return columns
+    elif item_type == "simple" and tokens:
+        # valor_total seguido de pis_cofins, base, alíquota e valor do ICMS
+        count = min(len(tokens), 5)
+        row[2:2 + count] = tokens[:count]
+
+    return tuple(row)
+
+
+def process_values(values_str, item_type):
+    """
+    Mapeia a string de números para as colunas corretas.
+    """
+    return dict(zip(VALUE_FIELDS, _value_row(values_str, item_type)))
 
 
 def clean_cmyk_artifacts(line):
@@ -159,11 +232,7 @@ def clean_cmyk_artifacts(line):
     if not line:
         return line
 
-    cleaned = re.sub(
-        r"^(?:[CMYK]{1,8}\s+)+",
-        "",
-        line.strip(),
-    )
+    cleaned = CMYK_PREFIX_REGEX.sub("", line.strip())
 
     return cleaned.strip()
 
@@ -225,6 +294,22 @@ HISTORY_REGEX = re.compile(
     r"^(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)[\s\/\-]*\d{2,4}$"
 )
 
+# Filtro de ruído em uma única passada sobre a linha (em maiúsculas):
+# termos ignorados em qualquer posição, códigos numéricos longos, linhas de
+# histórico soltas (ex: "AGO25 477.00 30 LID") e linhas de totalização.
+NOISE_LINE_REGEX = re.compile(
+    "|".join(re.escape(term) for term in IGNORED_TERMS)
+    + r"|^\d{5,}"
+    + r"|^" + MONTHS_PATTERN + r"\d{2}\s"
+    + r"|^\d+[.,]\d{2}\s+\d+[.,]\d{2}"
+)
+
+# Descrições descartadas: impostos/totais soltos ou rótulos de histórico.
+JUNK_DESCRIPTION_REGEX = re.compile(
+    "(?:" + "|".join(re.escape(term) for term in JUNK_DESCRIPTIONS) + ")$"
+    + "|" + HISTORY_REGEX.pattern
+)
+
 MEASUREMENT_REGEX = re.compile(
     r"(\S+)\s+(.+?)\s+(\d{2}/\d{2}/\d{4})\s+([\d.]+)\s+(\d{2}/\d{2}/\d{4})\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+(\d+)"
 )
@@ -251,11 +336,308 @@ MAP_COLS = {
     "N° Dias": "numero_dias",
 }
 
+# Colunas das linhas extraídas, na ordem em que os parsers as produzem
+VALUE_FIELDS = (
+    "quantidade",
+    "preco_unitario",
+    "valor_total",
+    "pis_cofins",
+    "base_calculo_icms",
+    "aliquota_icms",
+    "valor_icms",
+    "tarifa_unitaria",
+)
+FINANCIAL_FIELDS = ("descricao", "unidade", *VALUE_FIELDS)
+MEASUREMENT_FIELDS = (
+    "numero_medidor",
+    "segmento",
+    "data_leitura_anterior",
+    "leitura_anterior",
+    "data_leitura_atual",
+    "leitura_atual",
+    "fator_multiplicador",
+    "consumo_kwh",
+    "numero_dias",
+)
+MEASUREMENT_NUMERIC_FIELDS = (
+    "leitura_anterior",
+    "leitura_atual",
+    "fator_multiplicador",
+    "consumo_kwh",
+    "numero_dias",
+)
+
+
+# ==============================================================================
+# ACUMULADOR COLUNAR
+# ==============================================================================
+
+
+class ColumnBuffer:
+    """
+    Acumulador colunar das linhas extraídas: uma lista por coluna.
+
+    Os parsers anexam tuplas (na ordem de `fields`) direto nas colunas, sem
+    um dict por linha, e o DataFrame é montado a partir das colunas prontas.
+    Iterar (ou indexar) devolve as linhas como dict, para inspeção.
+    """
+
+    __slots__ = ("fields", "_columns")
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._columns = tuple([] for _ in self.fields)
+
+    @classmethod
+    def from_rows(cls, fields, rows):
+        buffer = cls(fields)
+        buffer.extend(rows)
+        return buffer
+
+    def append(self, row):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+
+    def extend(self, rows):
+        """Anexa outro ColumnBuffer (coluna a coluna) ou um iterável de tuplas."""
+        if isinstance(rows, ColumnBuffer):
+            for column, other in zip(self._columns, rows._columns):
+                column.extend(other)
+        else:
+            for row in rows:
+                self.append(row)
+
+    def column(self, name):
+        return self._columns[self.fields.index(name)]
+
+    def columns(self):
+        """Dict coluna -> lista (sem cópia)."""
+        return dict(zip(self.fields, self._columns))
+
+    def rows(self):
+        """Linhas como tuplas, na ordem de `fields`."""
+        return zip(*self._columns)
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns(), columns=list(self.fields))
+
+    def __len__(self):
+        return len(self._columns[0]) if self._columns else 0
+
+    def __iter__(self):
+        for row in self.rows():
+            yield dict(zip(self.fields, row))
+
+    def __getitem__(self, index):
+        return dict(zip(self.fields, (column[index] for column in self._columns)))
+
+    def __eq__(self, other):
+        if not isinstance(other, ColumnBuffer):
+            return NotImplemented
+        return self.fields == other.fields and self._columns == other._columns
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ColumnBuffer({len(self)} linhas, fields={self.fields})"
+
+
+# ==============================================================================
+# CONTEXTO DE PARSING (PDF aberto uma única vez)
+# ==============================================================================
+
+
+class ParseContext:
+    """
+    Mantém o PDF aberto durante toda a extração e guarda em cache o texto
+    com layout e a lista de palavras da página corrente.
+
+    A extração de texto com layout é a etapa mais cara por fatura; com o
+    contexto ela roda uma única vez por página e é compartilhada entre a
+    detecção de ano e o parser. A leitura do PDF é delegada a um backend
+    (services.pdf_backends), escolhido por nome: "pdfplumber" ou "pdfium".
+
+    O contexto abre na primeira página; next_page() avança e descarta os
+    caches da página anterior (no contexto e no backend).
+    """
+
+    def __init__(self, file_path, password=None, backend=None):
+        self.file_path = file_path
+        self.password = password
+        self.backend = get_backend(backend)(file_path, password)
+        self._fingerprint = None
+        self._reset_page()
+
+    def _reset_page(self):
+        self._page_text = None
+        self._layout_text = None
+        self._words = None
+
+    @property
+    def page_index(self):
+        """Índice (a partir de 0) da página corrente."""
+        return self.backend.page_index
+
+    def next_page(self):
+        """Avança para a próxima página. False no fim do documento."""
+        if not self.backend.next_page():
+            return False
+        self._reset_page()
+        return True
+
+    @property
+    def fingerprint(self):
+        """DocumentFingerprint do PDF (lazy, barato: sem layout)."""
+        if self._fingerprint is None:
+            self._fingerprint = self.backend.fingerprint()
+        return self._fingerprint
+
+    @property
+    def page_text(self):
+        """Texto cru da página corrente (lazy, barato: sem layout)."""
+        if self._page_text is None:
+            self._page_text = self.backend.page_text()
+        return self._page_text
+
+    @property
+    def layout_text(self):
+        """Texto da página corrente com layout preservado (lazy)."""
+        if self._layout_text is None:
+            with profile_stage("layout_text"):
+                self._layout_text = self.backend.layout_text()
+        return self._layout_text
+
+    @property
+    def words(self):
+        """Palavras posicionadas da página corrente (lazy)."""
+        if self._words is None:
+            self._words = self._extract_words(self.backend.chars)
+        return self._words
+
+    @staticmethod
+    def _extract_words(chars):
+        return extract_words(chars, x_tolerance=1, y_tolerance=1, keep_blank_chars=False)
+
+    def search(self, pattern):
+        """
+        Procura um regex no texto com layout. O backend reaproveita o
+        mesmo textmap (em cache) de layout_text, então não há nova extração.
+        """
+        return self.backend.search(pattern)
+
+    def section_bbox(self, start_pattern, end_pattern, continued=False):
+        """
+        Retorna o bbox (largura total da página) que vai da primeira ocorrência
+        de start_pattern até a primeira ocorrência de end_pattern abaixo dela
+        (ou até o fim da página). None se a seção não for encontrada.
+
+        continued=True: a seção vem da página anterior; sem start_pattern na
+        página, o recorte parte do topo.
+        """
+        x0, top, x1, bottom = self.backend.bbox
+        starts = self.search(start_pattern)
+        if starts:
+            start_top, start_bottom = starts[0]["top"], starts[0]["bottom"]
+        elif continued:
+            start_top = start_bottom = top
+        else:
+            return None
+
+        ends = [m for m in self.search(end_pattern) if m["top"] >= start_bottom]
+        if ends:
+            bottom = min(bottom, min(m["bottom"] for m in ends) + 1)
+
+        return (x0, max(top, start_top - 1), x1, bottom)
+
+    def words_in(self, bbox):
+        """
+        Palavras posicionadas apenas dentro do bbox.
+
+        Equivale a page.within_bbox(bbox).extract_words(), mas filtra só os
+        caracteres: o CroppedPage do pdfplumber recorta todos os objetos da
+        página e custava mais que a extração de palavras que economiza.
+        """
+        x0, top, x1, bottom = bbox
+        chars = [
+            c for c in self.backend.chars
+            if c["top"] >= top and c["bottom"] <= bottom and c["x0"] >= x0 and c["x1"] <= x1
+        ]
+        return self._extract_words(chars)
+
+    def close(self):
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _log_extraction_error(error, file_path=None):
+    note_error(error)
+    source = f" ({source_label(file_path)})" if file_path is not None else ""
+    # pdfplumber embrulha o PDFPasswordIncorrect (mensagem vazia) em um
+    # PdfminerException; o PDFium avisa na mensagem. O repr cobre os dois.
+    if "password" in f"{type(error).__name__} {error!r}".lower():
+        logger.error("Erro de Senha%s: %s", source, error)
+    else:
+        logger.error("Erro Crítico na extração%s: %s", source, error)
+
+
+# ==============================================================================
+# REGISTRO DE PARSERS
+# ==============================================================================
+# Cada parser registrado declara matches(fingerprint), uma checagem barata
+# sobre metadados, tamanho da página e texto cru (sem layout). Novos layouts
+# (ou distribuidoras) entram com @register_parser, sem alterar
+# extract_data_from_pdf.
+
+PARSER_REGISTRY = []
+
+
+def register_parser(parser_cls):
+    """
+    Decorator: registra um InvoiceParser para o roteamento automático.
+    Parsers com maior `priority` são testados primeiro.
+    """
+    if parser_cls not in PARSER_REGISTRY:
+        PARSER_REGISTRY.append(parser_cls)
+        PARSER_REGISTRY.sort(key=lambda cls: cls.priority, reverse=True)
+    return parser_cls
+
+
+def select_parser(fingerprint):
+    """Primeiro parser registrado cujo fingerprint confere, ou None."""
+    for parser_cls in PARSER_REGISTRY:
+        if parser_cls.matches(fingerprint):
+            return parser_cls
+    return None
+
+
+def select_parser_by_layout(context):
+    """
+    Fallback do roteamento, quando o fingerprint não bate com nenhum parser.
+
+    O texto cru segue a ordem do content stream: em alguns PDFs o cabeçalho
+    da tabela de itens sai quebrado, intercalado com outros blocos. Repete a
+    escolha com o texto com layout da primeira página (que o parser
+    reaproveita depois pelo ParseContext).
+    """
+    return select_parser(replace(context.fingerprint, text=context.layout_text))
+
 
 # ==============================================================================
 # BASE CLASS: InvoiceParser (Template Method)
 # ==============================================================================
 
+NOT_FOUND = "Not Found"
+
+# Estado das seções em tabela (itens e medição) ao fim de cada página
+SECTION_PENDING = "pending"  # início ainda não visto
+SECTION_OPEN = "open"  # começou e continua na próxima página
+SECTION_CLOSED = "closed"  # terminou
+
 
 class InvoiceParser(ABC):
     """
@@ -264,49 +646,145 @@ class InvoiceParser(ABC):
     e subclasses implementam as diferenças específicas.
     """
 
+    # Versão da lógica de parsing. Incremente ao mudar o parser: invalida o
+    # cache de extrações (ver PARSER_VERSION e services.cache).
+    version = "3"
+
+    # Ordem de teste no registro (maior primeiro)
+    priority = 0
+
     def __init__(self, file_path, password=None):
         self.file_path = file_path
         self.password = password
+        self._sections = {}
+        self._reset_sections()
+
+    def _reset_sections(self):
+        self._sections = {"items": SECTION_PENDING, "measurement": SECTION_PENDING}
 
-    def extract(self):
+    def extract(self, context=None):
         """
-        Extrai dados brutos da fatura. Retorna dict com:
+        Extrai dados brutos da primeira fatura do PDF. Retorna dict com:
         reference, client_id, items, measurement.
+
+        As páginas seguintes só são lidas enquanto faltar alguma seção (ex.:
+        tabela de itens que continua na página 2). Se um ParseContext for
+        informado, reutiliza o documento já aberto (e o texto já extraído);
+        caso contrário abre o arquivo.
         """
-        data = {
-            "reference": "Not Found",
-            "client_id": "Not Found",
-            "items": [],
-            "measurement": [],
-        }
+        try:
+            if context is None:
+                with ParseContext(self.file_path, self.password) as own_context:
+                    return next(self._walk_invoices(own_context, first_only=True))
+            return next(self._walk_invoices(context, first_only=True))
+
+        except Exception as e:
+            _log_extraction_error(e, self.file_path)
+            return None
+
+    def extract_all(self, context):
+        """
+        Gerador: um dict bruto (como extract) por fatura do PDF.
 
+        Para extratos consolidados (várias UCs no mesmo PDF): uma página com
+        o cabeçalho de outra fatura fecha a atual. As páginas são lidas uma
+        a uma; as de uma fatura já completa só têm o texto cru lido (para
+        achar o próximo cabeçalho), sem passada de layout.
+        """
         try:
-            pdf_context = pdfplumber.open(self.file_path, password=self.password)
+            yield from self._walk_invoices(context)
+        except Exception as e:
+            _log_extraction_error(e, self.file_path)
+
+    @classmethod
+    def matches(cls, fingerprint):
+        """
+        Diz se o PDF (DocumentFingerprint) está no formato deste parser.
+        Padrão Enel-CE: o cabeçalho da tabela de itens está no texto cru.
+        """
+        return bool(INVOICE_TABLE_ANCHOR.search(fingerprint.text))
+
+    def _walk_invoices(self, context, first_only=False):
+        annotate(parser=type(self).__name__)
+        data = self._new_invoice()
+        self._extract_page(context, data)
+
+        while not (first_only and self._is_complete(data)):
+            if not context.next_page():
+                break
+
+            key = self._invoice_key(context.page_text)
+            if key is not None and self._opens_new_invoice(key, data):
+                # Cabeçalho de outra fatura: a atual terminou na página anterior
+                yield data
+                data = self._new_invoice()
+                self._extract_page(context, data)
+            elif not self._is_complete(data):
+                # Continuação: só as seções ainda abertas ou não encontradas
+                self._extract_page(context, data)
+
+        annotate(pages=context.page_index + 1)
+        yield data
+
+    def _new_invoice(self):
+        self._reset_sections()
+        return {
+            "reference": NOT_FOUND,
+            "client_id": NOT_FOUND,
+            "items": ColumnBuffer(FINANCIAL_FIELDS),
+            "measurement": ColumnBuffer(MEASUREMENT_FIELDS),
+        }
 
-            with pdf_context as pdf:
-                page = pdf.pages[0]
-                text = page.extract_text(layout=True)
+    def _extract_page(self, context, data):
+        """Extrai da página corrente o que ainda falta na fatura."""
+        text = context.layout_text
 
-                # 1. Referência
+        # 1. Referência e 2. Client ID
+        with profile_stage("reference_client"):
+            if data["reference"] == NOT_FOUND:
                 data["reference"] = self._extract_reference(text)
-
-                # 2. Client ID
+            if data["client_id"] == NOT_FOUND:
                 data["client_id"] = self._extract_client_id(text)
 
-                # 3. Medição
-                data["measurement"] = self._extract_measurement(text)
+        # 3. Medição
+        if self._sections["measurement"] != SECTION_CLOSED:
+            with profile_stage("measurement"):
+                data["measurement"].extend(self._extract_measurement_section(context))
 
-                # 4. Itens Financeiros
-                data["items"] = self._extract_financial_items(page)
+        # 4. Itens Financeiros
+        if self._sections["items"] != SECTION_CLOSED:
+            data["items"].extend(self._extract_financial_items(context))
 
-            return data
+    def _is_complete(self, data):
+        return (
+            data["reference"] != NOT_FOUND
+            and data["client_id"] != NOT_FOUND
+            and all(state == SECTION_CLOSED for state in self._sections.values())
+        )
 
-        except Exception as e:
-            if "Password" in str(e):
-                logger.error("Erro de Senha: %s", e)
-            else:
-                logger.error("Erro Crítico na extração: %s", e)
+    def _invoice_key(self, page_text):
+        """
+        (client_id, reference) se a página (texto cru) abre uma fatura;
+        None se é continuação da fatura anterior.
+        """
+        if not INVOICE_HEADER_REGEX.search(page_text):
             return None
+        return self._extract_client_id(page_text), self._extract_reference(page_text)
+
+    @staticmethod
+    def _opens_new_invoice(key, data):
+        """
+        Diz se a chave de uma página com cabeçalho é de outra fatura. Parte
+        não encontrada (ex.: continuação que só repete o código do cliente)
+        conta como continuação: só muda a fatura se o cliente difere ou se
+        as duas referências foram lidas e diferem.
+        """
+        client_id, reference = key
+        known = (data["client_id"], data["reference"])
+        return any(
+            new != NOT_FOUND and current != NOT_FOUND and new != current
+            for new, current in zip((client_id, reference), known)
+        )
 
     # --- Métodos abstratos (devem ser implementados pelas subclasses) ---
 
@@ -315,7 +793,7 @@ class InvoiceParser(ABC):
         """Extrai a referência (mês/ano) do texto."""
 
     @abstractmethod
-    def _get_financial_lines(self, page):
+    def _get_financial_lines(self, context):
         """
         Retorna lista de linhas limpas para extração financeira.
         A principal diferença entre 2025 e 2026.
@@ -329,23 +807,28 @@ class InvoiceParser(ABC):
 
     def _extract_client_id(self, text):
         """Extrai o código do cliente."""
-        code_match = re.search(
-            r"utilizando\s+o\s+código\s+(\d+)", text, re.IGNORECASE
-        )
+        code_match = CLIENT_CODE_REGEX.search(text)
         if code_match:
             return code_match.group(1)
 
-        visual_match = re.search(r"\b(\d{7,12})\s*\n\s*\d{2}/\d{4}", text)
+        visual_match = CLIENT_VISUAL_REGEX.search(text)
         if visual_match:
             return visual_match.group(1)
 
-        return "Not Found"
+        return NOT_FOUND
+
+    def _extract_measurement_section(self, context):
+        """Hook: escolhe o texto usado para medição. Página inteira por padrão."""
+        return self._extract_measurement(context.layout_text)
 
     def _extract_measurement(self, text):
-        """Extrai dados de medição. Compartilhado entre formatos."""
-        measurement_items = []
+        """
+        Extrai dados de medição. Compartilhado entre formatos.
+        Se a seção ficou aberta na página anterior, já começa capturando.
+        """
+        measurement_items = ColumnBuffer(MEASUREMENT_FIELDS)
         lines = text.split("\n")
-        is_capturing = False
+        is_capturing = self._sections["measurement"] == SECTION_OPEN
 
         for line in lines:
             cleaned_line = self._preprocess_line(line)
@@ -361,31 +844,31 @@ class InvoiceParser(ABC):
                     or "HISTÓRICO" in line_upper
                     or "NOTIFICAÇÃO" in line_upper
                 ):
+                    is_capturing = False
+                    self._sections["measurement"] = SECTION_CLOSED
                     break
 
                 match = MEASUREMENT_REGEX.search(cleaned_line)
                 if match:
-                    measurement_items.append(
-                        {
-                            "numero_medidor": match.group(1),
-                            "segmento": match.group(2),
-                            "data_leitura_anterior": match.group(3),
-                            "leitura_anterior": match.group(4),
-                            "data_leitura_atual": match.group(5),
-                            "leitura_atual": match.group(6),
-                            "fator_multiplicador": match.group(7),
-                            "consumo_kwh": match.group(8),
-                            "numero_dias": match.group(9),
-                        }
-                    )
+                    # Grupos do regex na ordem de MEASUREMENT_FIELDS
+                    measurement_items.append(match.groups())
+
+        if is_capturing:
+            self._sections["measurement"] = SECTION_OPEN
         return measurement_items
 
-    def _extract_financial_items(self, page):
+    def _extract_financial_items(self, context):
         """Extrai itens financeiros usando as linhas da subclasse."""
-        lines = self._get_financial_lines(page)
+        with profile_stage("financial_lines"):
+            lines = self._get_financial_lines(context)
 
-        is_capturing = False
-        temp_items = []
+        with profile_stage("financial_items"):
+            return self._parse_financial_lines(lines)
+
+    def _parse_financial_lines(self, lines):
+        # Tabela que continua da página anterior: já começa capturando
+        is_capturing = self._sections["items"] == SECTION_OPEN
+        temp_items = ColumnBuffer(FINANCIAL_FIELDS)
 
         for clean_txt in lines:
             upper_txt = clean_txt.upper()
@@ -406,33 +889,26 @@ class InvoiceParser(ABC):
             ):
                 if upper_txt.startswith("TOTAL") or "EQUIPAMENTOS" in upper_txt:
                     is_capturing = False
+                    self._sections["items"] = SECTION_CLOSED
                     break
                 continue
 
             if is_capturing:
-                item = self._process_financial_line(clean_txt, upper_txt)
-                if item:
-                    temp_items.append(item)
+                row = self._process_financial_line(clean_txt, upper_txt)
+                if row:
+                    temp_items.append(row)
 
+        if is_capturing:
+            self._sections["items"] = SECTION_OPEN
         return temp_items
 
     def _process_financial_line(self, clean_txt, upper_txt):
-        """Processa uma linha financeira individual. Compartilhado."""
-        # Filtros de ruído
-        if any(term in upper_txt for term in IGNORED_TERMS):
-            return None
-        if re.match(r"^\d{5,}", clean_txt):
-            return None
-
-        # Filtra linhas de histórico soltas (ex: "AGO25 477.00 30 LID")
-        if re.match(
-            r"^(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)\d{2}\s",
-            clean_txt,
-        ):
-            return None
-
-        # Filtra linha de totalização (só números, sem descrição)
-        if re.match(r"^\d+[.,]\d{2}\s+\d+[.,]\d{2}", clean_txt):
+        """
+        Processa uma linha financeira individual. Compartilhado.
+        Retorna a linha como tupla (ordem de FINANCIAL_FIELDS) ou None.
+        """
+        # Filtros de ruído (termos ignorados, códigos, histórico, totais)
+        if NOISE_LINE_REGEX.search(upper_txt):
             return None
 
         info = clean_line(clean_txt)
@@ -440,18 +916,14 @@ class InvoiceParser(ABC):
         if info and info["description"] and len(info["description"]) > 2:
             desc_upper = info["description"].upper().strip()
 
-            if desc_upper in JUNK_DESCRIPTIONS:
-                return None
-
-            if HISTORY_REGEX.match(desc_upper):
+            if JUNK_DESCRIPTION_REGEX.match(desc_upper):
                 return None
 
-            value_cols = process_values(info["values_str"], info["type"])
-            return {
-                "descricao": info["description"],
-                "unidade": info["unit"],
-                **value_cols,
-            }
+            return (
+                info["description"],
+                info["unit"],
+                *_value_row(info["values_str"], info["type"]),
+            )
 
         return None
 
@@ -461,15 +933,25 @@ class InvoiceParser(ABC):
 # ==============================================================================
 
 
+@register_parser
 class Parser2025(InvoiceParser):
     """Parser para faturas Enel-CE no formato do ano 2025."""
 
+    version = "1"
+    priority = 10
+
+    @classmethod
+    def matches(cls, fingerprint):
+        # Sem ano identificável, assume o formato 2025 (o mais antigo)
+        year = _year_from_text(fingerprint.text) or 2025
+        return year < 2026 and super().matches(fingerprint)
+
     def _extract_reference(self, text):
-        ref_match = re.search(r"(?<!\d/)\b(\d{2}/\d{4})\b", text)
-        return ref_match.group(1) if ref_match else "Not Found"
+        ref_match = REFERENCE_REGEX.search(text)
+        return ref_match.group(1) if ref_match else NOT_FOUND
 
-    def _get_financial_lines(self, page):
-        text = page.extract_text(layout=True)
+    def _get_financial_lines(self, context):
+        text = context.layout_text
         return [line.strip() for line in text.split("\n") if line.strip()]
 
 
@@ -478,59 +960,90 @@ class Parser2025(InvoiceParser):
 # ==============================================================================
 
 
+@register_parser
 class Parser2026(InvoiceParser):
     """Parser para faturas Enel-CE no formato do ano 2026."""
 
+    version = "2"
+    priority = 20
+
+    @classmethod
+    def matches(cls, fingerprint):
+        year = _year_from_text(fingerprint.text)
+        return year is not None and year >= 2026 and super().matches(fingerprint)
+
     def _preprocess_line(self, line):
         return clean_cmyk_artifacts(line)
 
     def _extract_reference(self, text):
         # Referência na linha de pagamento
-        ref_match = re.search(
-            r"\d{2}/\d{2}/\d{4}\s+\d+\s+(\d{2}/\d{4})\s+\d{2}/\d{2}/\d{4}\s+[\d.,]+",
-            text,
-        )
+        ref_match = PAYMENT_LINE_REGEX.search(text)
         if ref_match:
-            return ref_match.group(1)
+            return ref_match.group(2)
 
         # Fallback: padrão VENCIMENTO
-        ref_fallback = re.search(
-            r"(\d{2}/\d{4})\s+\d{2}/\d{2}/\d{4}\s+R\$", text
-        )
+        ref_fallback = DUE_DATE_REGEX.search(text)
         if ref_fallback:
             return ref_fallback.group(1)
 
-        return "Not Found"
+        return NOT_FOUND
 
     def _extract_client_id(self, text):
         # Tenta o padrão base primeiro
-        code_match = re.search(
-            r"utilizando\s+o\s+código\s+(\d+)", text, re.IGNORECASE
-        )
+        code_match = CLIENT_CODE_REGEX.search(text)
         if code_match:
             return code_match.group(1)
 
         # Padrão 2026: "4869679 / 52217494 R$"
-        id_match = re.search(r"(\d{7,12})\s*/\s*(\d{7,12})\s+R\$", text)
+        id_match = CLIENT_ID_2026_REGEX.search(text)
         if id_match:
             return id_match.group(2)
 
         # Fallback visual
-        visual_match = re.search(r"\b(\d{7,12})\s*\n\s*\d{2}/\d{4}", text)
+        visual_match = CLIENT_VISUAL_REGEX.search(text)
         if visual_match:
             return visual_match.group(1)
 
-        return "Not Found"
+        return NOT_FOUND
 
-    def _get_financial_lines(self, page):
+    def _get_financial_lines(self, context):
         """
         No formato 2026, extract_text(layout=True) gera texto intercalado.
-        Usa extract_words() agrupado por coordenada Y para reconstruir linhas.
+        Usa extract_words() agrupado por coordenada Y para reconstruir linhas,
+        apenas dentro do recorte da tabela "Itens de Fatura".
         """
-        words = page.extract_words(
-            x_tolerance=1, y_tolerance=1, keep_blank_chars=False
+        return self._reconstruct_lines(
+            self._section_words(
+                context, FINANCIAL_START_ANCHOR, FINANCIAL_END_ANCHOR,
+                continued=self._sections["items"] == SECTION_OPEN,
+            )
+        )
+
+    def _extract_measurement_section(self, context):
+        """Medição a partir das palavras do recorte "Dados de Medição"."""
+        bbox = context.section_bbox(
+            MEASUREMENT_START_ANCHOR, MEASUREMENT_END_ANCHOR,
+            continued=self._sections["measurement"] == SECTION_OPEN,
         )
+        if bbox is None:
+            return self._extract_measurement(context.layout_text)
 
+        lines = self._reconstruct_lines(context.words_in(bbox))
+        return self._extract_measurement("\n".join(lines))
+
+    def _section_words(self, context, start_pattern, end_pattern, continued=False):
+        """
+        Palavras do recorte da seção. Sem as âncoras, usa a página inteira
+        (comportamento anterior).
+        """
+        bbox = context.section_bbox(start_pattern, end_pattern, continued)
+        if bbox is None:
+            return context.words
+        return context.words_in(bbox)
+
+    @staticmethod
+    def _reconstruct_lines(words):
+        """Agrupa palavras por coordenada Y e descarta marcadores CMYK da margem."""
         lines_by_y = defaultdict(list)
         for w in words:
             y = round(float(w["top"]), 0)
@@ -543,7 +1056,7 @@ class Parser2026(InvoiceParser):
                 w
                 for w in ws
                 if float(w["x0"]) > 0
-                or not re.match(r"^[CMYK]+$", w["text"])
+                or not CMYK_WORD_REGEX.match(w["text"])
             ]
             line_text = " ".join(w["text"] for w in ws).strip()
             if line_text:
@@ -552,44 +1065,45 @@ class Parser2026(InvoiceParser):
         return reconstructed_lines
 
 
+# Carimbo de versão de todos os parsers; entra na chave do cache de extrações.
+PARSER_VERSION = "-".join(
+    f"{cls.__name__}.{cls.version}"
+    for cls in (InvoiceParser, *sorted(PARSER_REGISTRY, key=lambda cls: cls.__name__))
+)
+
+
 # ==============================================================================
 # DETECÇÃO DE ANO
 # ==============================================================================
 
 
-def _detect_invoice_year(file_path, password=None):
+def _year_from_text(text):
     """
-    Detecta o ano da fatura para rotear para o parser correto.
-    Retorna o ano como inteiro (ex: 2025, 2026).
+    Ano da fatura a partir do texto (linha de pagamento, vencimento ou
+    primeira referência MM/AAAA). None se nenhum padrão for encontrado.
     """
-    try:
-        pdf_context = pdfplumber.open(file_path, password=password)
+    pay_match = PAYMENT_LINE_REGEX.search(text)
+    if pay_match:
+        return int(pay_match.group(3))
 
-        with pdf_context as pdf:
-            page = pdf.pages[0]
-            text = page.extract_text(layout=True)
+    ref_match = DUE_DATE_REGEX.search(text)
+    if ref_match:
+        return int(ref_match.group(2))
 
-            pay_match = re.search(
-                r"\d{2}/\d{2}/(\d{4})\s+\d+\s+\d{2}/(\d{4})\s+\d{2}/\d{2}/\d{4}\s+[\d.,]+",
-                text,
-            )
-            if pay_match:
-                return int(pay_match.group(2))
+    simple_match = REFERENCE_REGEX.search(text)
+    if simple_match:
+        return int(simple_match.group(2))
 
-            ref_match = re.search(
-                r"(\d{2}/(\d{4}))\s+\d{2}/\d{2}/\d{4}\s+R\$", text
-            )
-            if ref_match:
-                return int(ref_match.group(2))
+    return None
 
-            simple_match = re.search(r"(?<!\d/)\b\d{2}/(\d{4})\b", text)
-            if simple_match:
-                return int(simple_match.group(1))
 
-    except Exception:
-        pass
+def _detect_invoice_year(context):
+    """
+    Detecta o ano da fatura (ex: 2025, 2026); 2025 se não for encontrado.
 
-    return 2025
+    Usa o texto cru do fingerprint do ParseContext, sem passada de layout.
+    """
+    return _year_from_text(context.fingerprint.text) or 2025
 
 
 # ==============================================================================
@@ -597,90 +1111,195 @@ def _detect_invoice_year(file_path, password=None):
 # ==============================================================================
 
 
-def extract_data_from_pdf(file_path, password=None):
+def extract_raw_data(file_path, password=None, backend=None):
+    """
+    Abre o PDF uma única vez, escolhe o parser e retorna o dict bruto
+    (reference, client_id, items, measurement) da primeira fatura, ou None
+    em caso de erro.
+
+    backend: nome do backend de leitura ("pdfplumber" ou "pdfium");
+    None usa o padrão (variável SHERLOCK_PDF_BACKEND).
+    """
+    raw_batch = list(_iter_raw_data(file_path, password, backend, first_only=True))
+    return raw_batch[0] if raw_batch else None
+
+
+def iter_raw_data(file_path, password=None, backend=None):
+    """
+    Gerador: um dict bruto por fatura do PDF (extratos consolidados trazem
+    várias UCs). O documento é percorrido página a página, com uma única
+    página carregada por vez.
+    """
+    yield from _iter_raw_data(file_path, password, backend)
+
+
+def _iter_raw_data(file_path, password, backend, first_only=False):
+    # Nome inválido é erro de configuração, não da fatura: propaga
+    backend = get_backend(backend)
+
+    with profile_file(file_path):
+        annotate(backend=backend.name)
+        try:
+            with profile_stage("open"):
+                context = ParseContext(file_path, password, backend)
+        except Exception as e:
+            _log_extraction_error(e, file_path)
+            return
+
+        # Roteamento pelo fingerprint (sem layout); o parser reaproveita o documento
+        with context:
+            try:
+                with profile_stage("routing"):
+                    parser_cls = select_parser(context.fingerprint)
+                    if parser_cls is None:
+                        parser_cls = select_parser_by_layout(context)
+                        if parser_cls is not None:
+                            logger.info(
+                                "Roteado pelo texto com layout (%s): %s",
+                                parser_cls.__name__, source_label(file_path),
+                            )
+            except Exception as e:
+                _log_extraction_error(e, file_path)
+                return
+
+            if parser_cls is None:
+                logger.warning("Layout de fatura não reconhecido: %s", source_label(file_path))
+                note_error("Layout de fatura não reconhecido")
+                return
+
+            parser = parser_cls(file_path, password)
+            if first_only:
+                raw_data = parser.extract(context)
+                if raw_data is not None:
+                    yield raw_data
+            else:
+                yield from parser.extract_all(context)
+
+
+def frames_from_raw_data(raw_data):
+    """
+    Converte o dict bruto de InvoiceParser.extract nos dois DataFrames
+    padronizados (financeiro e medição).
+    """
+    return frames_from_raw_batch([raw_data])
+
+
+def frames_from_raw_batch(raw_batch):
+    """
+    Como frames_from_raw_data, para várias faturas de uma vez: as colunas
+    de todas são concatenadas e a conversão numérica roda uma única vez
+    por coluna, em vez de um par de DataFrames por fatura.
+    """
+    items = ColumnBuffer(FINANCIAL_FIELDS)
+    measurements = ColumnBuffer(MEASUREMENT_FIELDS)
+    item_keys = ([], [])
+    measurement_keys = ([], [])
+
+    for raw_data in raw_batch:
+        if not raw_data:
+            continue
+
+        reference = raw_data.get("reference", NOT_FOUND)
+        client_id = raw_data.get("client_id", "Desconhecido")
+
+        for buffer, keys, rows in (
+            (items, item_keys, raw_data.get("items", ())),
+            (measurements, measurement_keys, raw_data.get("measurement", ())),
+        ):
+            before = len(buffer)
+            buffer.extend(rows)
+            added = len(buffer) - before
+            keys[0].extend([reference] * added)
+            keys[1].extend([client_id] * added)
+
+    # 1. Itens financeiros (valores ausentes viram 0)
+    df_fin = _frame_from_buffer(items, item_keys, VALUE_FIELDS, fill_value=0)
+
+    # 2. Dados de medição
+    df_med = _frame_from_buffer(measurements, measurement_keys, MEASUREMENT_NUMERIC_FIELDS)
+
+    return df_fin, df_med
+
+
+def _frame_from_buffer(buffer, keys, numeric_cols, fill_value=None):
+    """
+    DataFrame padronizado a partir das colunas do buffer. As colunas já têm
+    os nomes finais (FINANCIAL_FIELDS/MEASUREMENT_FIELDS), então não passam
+    por standardize_frame.
+    """
+    if not len(buffer):
+        return pd.DataFrame()
+
+    columns = buffer.columns()
+    for col in numeric_cols:
+        values = parse_br_numeric(columns[col])
+        columns[col] = values.fillna(fill_value) if fill_value is not None else values
+
+    columns["mes_referencia"], columns["numero_cliente"] = keys
+    return pd.DataFrame(columns)
+
+
+def extract_data_from_pdf(file_path, password=None, backend=None):
     """
-    Extrai dados do PDF e retorna dois DataFrames:
+    Extrai dados do PDF (caminho, bytes ou BytesIO) e retorna dois DataFrames:
     - df_financeiro: Dados financeiros com coluna 'mes_referencia'
     - df_medicao: Dados de medição com coluna 'mes_referencia'
 
     Esta função é a interface principal usada pelo sistema de importação.
     Roteia automaticamente para o parser correto baseado no ano da fatura.
+    PDFs com várias faturas (extratos consolidados) trazem as linhas de
+    todas, cada uma com seu mes_referencia/numero_cliente.
+    O backend de leitura do PDF pode ser escolhido por chamada (backend=).
     """
-    # 1. Detecta o ano e instancia o parser correto
-    year = _detect_invoice_year(file_path, password)
+    with profile_file(file_path):
+        raw_batch = list(iter_raw_data(file_path, password, backend))
+        with profile_stage("dataframes"):
+            return frames_from_raw_batch(raw_batch)
 
-    if year >= 2026:
-        parser = Parser2026(file_path, password)
-    else:
-        parser = Parser2025(file_path, password)
-
-    raw_data = parser.extract()
-
-    if not raw_data:
-        return pd.DataFrame(), pd.DataFrame()
-
-    reference = raw_data.get("reference", "Not Found")
-    client_id = raw_data.get("client_id", "Desconhecido")
-
-    # 2. Converte items financeiros em DataFrame
-    items = raw_data.get("items", [])
-    if items:
-        df_fin = pd.DataFrame(items)
-        df_fin["mes_referencia"] = reference
-        df_fin["numero_cliente"] = client_id
-
-        df_fin = standardize_frame(df_fin, MAP_COLS)
-
-        numeric_cols = [
-            "quantidade",
-            "preco_unitario",
-            "valor_total",
-            "pis_cofins",
-            "base_calculo_icms",
-            "aliquota_icms",
-            "valor_icms",
-            "tarifa_unitaria",
-        ]
 
-        for col in numeric_cols:
-            if col in df_fin.columns:
-                df_fin[col] = (
-                    df_fin[col].astype(str).apply(normalize_negative_value).str.strip()
-                )
-                df_fin[col] = pd.to_numeric(df_fin[col], errors="coerce").fillna(0)
+def invoice_keys(df):
+    """
+    Chaves (mes_referencia, numero_cliente) das faturas de um DataFrame de
+    extract_data_from_pdf, na ordem em que aparecem (um extrato consolidado
+    tem uma por UC).
+    """
+    if df.empty or "mes_referencia" not in df.columns:
+        return []
+    if "numero_cliente" in df.columns:
+        clients = df["numero_cliente"].astype(object).fillna("").astype(str)
     else:
-        df_fin = pd.DataFrame()
-
-    # 3. Converte dados de medição em DataFrame
-    measurements = raw_data.get("measurement", [])
-    if measurements:
-        df_med = pd.DataFrame(measurements)
-        df_med["mes_referencia"] = reference
-        df_med["numero_cliente"] = client_id
-
-        df_med = standardize_frame(df_med, MAP_COLS)
-
-        numeric_cols_med = [
-            "leitura_anterior",
-            "leitura_atual",
-            "fator_multiplicador",
-            "consumo_kwh",
-            "numero_dias",
-        ]
+        clients = [""] * len(df)
+    return list(dict.fromkeys(zip(df["mes_referencia"].astype(str), clients)))
+
 
-        for col in numeric_cols_med:
-            if col in df_med.columns:
-                df_med[col] = (
-                    df_med[col].astype(str).apply(normalize_negative_value).str.strip()
-                )
-                df_med[col] = pd.to_numeric(df_med[col], errors="coerce")
+def select_invoices(df, keys):
+    """Linhas de df (financeiro ou medição) das faturas cujas chaves estão em keys."""
+    if df.empty or "mes_referencia" not in df.columns:
+        return df
+    if "numero_cliente" in df.columns:
+        clients = df["numero_cliente"].astype(object).fillna("").astype(str)
     else:
-        df_med = pd.DataFrame()
+        clients = pd.Series("", index=df.index)
+    rows = pd.MultiIndex.from_arrays([df["mes_referencia"].astype(str), clients])
+    return df[rows.isin(list(keys))].reset_index(drop=True)
 
-    # Garante colunas essenciais mesmo se vazias
-    if not df_med.empty and "numero_dias" not in df_med.columns:
-        df_med["numero_dias"] = 30
-    if not df_med.empty and "segmento" not in df_med.columns:
-        df_med["segmento"] = "Convencional"
 
-    return df_fin, df_med
+def read_client_id(file_path, password=None):
+    """
+    Número da UC lido só do texto cru da primeira página (PDFium, sem
+    layout nem parser), para quem precisa apenas identificar o PDF.
+    Retorna "" se nenhum padrão casar.
+    """
+    backend = get_backend("pdfium")(file_path, password)
+    try:
+        text = backend.fingerprint().text
+    finally:
+        backend.close()
+
+    code_match = CLIENT_CODE_REGEX.search(text)
+    if code_match:
+        return code_match.group(1)
+    id_match = CLIENT_ID_2026_REGEX.search(text)
+    if id_match:
+        return id_match.group(2)
+    return ""
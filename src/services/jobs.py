@@ -0,0 +1,225 @@
+"""
+Fila de importação em segundo plano para o app Streamlit.
+
+O upload de uma fatura vira um job: submit() devolve o ID na hora e a
+extração, a checagem de duplicata e a gravação rodam em threads de um
+ThreadPoolExecutor. A sessão continua livre (navegação, gráficos, chat) e a
+barra lateral só consulta o estado dos jobs para mostrar o progresso.
+
+A fila é compartilhada pelas sessões do servidor (no app, criada uma vez
+via st.cache_resource); as gravações são serializadas por um lock, então
+dois uploads da mesma fatura em paralelo não passam pela checagem de
+duplicata ao mesmo tempo.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field, replace
+
+from services.cache import (
+    CACHE_FOLDER,
+    ExtractionCache,
+    extract_data_cached,
+    hash_pdf_bytes,
+    invoice_sources,
+)
+from services.extractor import extract_data_from_pdf, invoice_keys, select_invoices
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_EXTRACTING = "extracting"
+STATUS_SAVING = "saving"
+STATUS_DONE = "done"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+
+FINISHED_STATUSES = (STATUS_DONE, STATUS_DUPLICATE, STATUS_FAILED)
+
+
+@dataclass
+class IngestionJob:
+    """Estado de um upload na fila."""
+
+    job_id: str
+    file_name: str
+    status: str = STATUS_QUEUED
+    progress: float = 0.0
+    message: str = "Na fila"
+    reference: str = ""
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: float = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+
+class IngestionQueue:
+    """
+    Fila de jobs de importação executados em threads.
+
+    Args:
+        max_workers (int): Extrações simultâneas.
+        save (callable, opcional): Gravação (df_fin, df_med, sources) ->
+            bool; padrão database.save_data.
+        lookup (callable, opcional): lookup(content_hash=...) -> entrada do
+            manifesto de um PDF já gravado ou None; padrão
+            database.find_imported.
+        imported (callable, opcional): Chaves (mes_referencia,
+            numero_cliente) -> as que já estão gravadas; padrão
+            database.imported_keys.
+        cache_folder (str, opcional): Cache de extrações; None desativa.
+    """
+
+    def __init__(self, max_workers=2, save=None, lookup=None, imported=None,
+                 cache_folder=CACHE_FOLDER):
+        if save is None or lookup is None or imported is None:
+            from database import find_imported, imported_keys, save_data
+
+            save = save or save_data
+            lookup = lookup or find_imported
+            imported = imported or imported_keys
+
+        self._save = save
+        self._lookup = lookup
+        self._imported = imported
+        self.cache_folder = cache_folder
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sherlock-ingest"
+        )
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._jobs = {}
+        self._futures = {}
+        self.data_version = 0  # incrementado a cada fatura gravada
+
+    def submit(self, file_name, data, password=None):
+        """Enfileira o PDF (bytes) e devolve o ID do job imediatamente."""
+        job = IngestionJob(job_id=uuid.uuid4().hex[:12], file_name=os.path.basename(file_name))
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._futures[job.job_id] = self._executor.submit(self._run, job.job_id, data, password)
+        return job.job_id
+
+    def get(self, job_id):
+        """Cópia do estado atual do job (ou None)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job else None
+
+    def jobs(self, job_ids=None):
+        """Cópias dos jobs (todos ou os IDs pedidos), na ordem de envio."""
+        with self._lock:
+            selected = self._jobs.values() if job_ids is None else (
+                self._jobs[i] for i in job_ids if i in self._jobs
+            )
+            return [replace(job) for job in selected]
+
+    def active(self, job_ids=None):
+        return [job for job in self.jobs(job_ids) if not job.finished]
+
+    def forget(self, job_ids):
+        """Remove jobs concluídos da fila (os em andamento são mantidos)."""
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job and job.finished:
+                    del self._jobs[job_id]
+                    self._futures.pop(job_id, None)
+
+    def wait(self, job_ids=None, timeout=None):
+        """Bloqueia até os jobs terminarem (para scripts e testes)."""
+        with self._lock:
+            futures = [
+                future for job_id, future in self._futures.items()
+                if job_ids is None or job_id in job_ids
+            ]
+        wait_futures(futures, timeout=timeout)
+        return self.jobs(job_ids)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    # --- Execução (threads do pool) --------------------------------------
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+            if job.finished and job.finished_at is None:
+                job.finished_at = time.time()
+
+    def _run(self, job_id, data, password):
+        try:
+            self._process(job_id, data, password)
+        except Exception as e:
+            logger.exception("Falha no job %s", job_id)
+            self._update(job_id, status=STATUS_FAILED, progress=1.0,
+                         message=f"Erro inesperado: {e}")
+
+    def _process(self, job_id, data, password):
+        content_hash = hash_pdf_bytes(data)
+
+        # O mesmo PDF (com qualquer nome) já gravado: nem chega a ser extraído
+        imported = self._lookup(content_hash=content_hash)
+        if imported:
+            self._update(job_id, status=STATUS_DUPLICATE, progress=1.0,
+                         reference=imported["mes_referencia"],
+                         message=f"PDF já importado (fatura de {imported['mes_referencia']})")
+            return
+
+        self._update(job_id, status=STATUS_EXTRACTING, progress=0.1, message="Lendo PDF")
+
+        # Extração direto dos bytes (decifrados na leitura): nada vai para o disco
+        if self.cache_folder:
+            df_fin, df_med = extract_data_cached(
+                data, password, cache=ExtractionCache(self.cache_folder),
+                content_hash=content_hash,
+            )
+        else:
+            df_fin, df_med = extract_data_from_pdf(data, password)
+
+        if df_fin.empty:
+            self._update(job_id, status=STATUS_FAILED, progress=1.0,
+                         message="Erro na leitura (senha incorreta ou layout desconhecido)")
+            return
+
+        # Extratos consolidados trazem uma fatura por UC: cada uma é checada
+        keys = invoice_keys(df_fin)
+        reference = keys[0][0]
+        self._update(job_id, status=STATUS_SAVING, progress=0.7,
+                     message="Gravando", reference=reference)
+
+        with self._save_lock:
+            known = self._imported(keys)
+            new_keys = [key for key in keys if key not in known]
+            if not new_keys:
+                message = (f"Fatura de {reference} já importada" if len(keys) == 1
+                           else f"Extrato já importado ({len(keys)} faturas)")
+                self._update(job_id, status=STATUS_DUPLICATE, progress=1.0, message=message)
+                return
+            if known:
+                df_fin = select_invoices(df_fin, new_keys)
+                df_med = select_invoices(df_med, new_keys)
+            if not self._save(df_fin, df_med, invoice_sources(df_fin, content_hash)):
+                self._update(job_id, status=STATUS_FAILED, progress=1.0,
+                             message="Falha ao gravar no banco")
+                return
+            self.data_version += 1
+
+        if len(keys) == 1:
+            message = f"Fatura de {reference} salva"
+        else:
+            message = f"{len(new_keys)} faturas salvas"
+            if known:
+                message += f" ({len(known)} já importadas)"
+        self._update(job_id, status=STATUS_DONE, progress=1.0, message=message)
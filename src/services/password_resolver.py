@@ -0,0 +1,256 @@
+"""
+Descoberta de senhas de faturas protegidas em lote.
+
+Na carga de um histórico, as faturas costumam vir de vários titulares e a
+senha de cada uma (os 5 primeiros dígitos do CPF) não é conhecida de
+antemão: só há uma lista de candidatas. resolve_passwords testa as
+candidatas em cada PDF, distribuindo os arquivos entre processos, e
+registra num mapa local (CredentialMap) qual senha abriu qual UC.
+
+O número da UC só pode ser lido depois de decifrar o PDF, então o mapa é
+usado para ordenar as tentativas: primeiro as senhas das UCs cujo número
+aparece no nome do arquivo, depois as senhas já conhecidas (as que abriram
+mais UCs na frente) e por fim as demais candidatas. Numa carga de um mesmo
+titular, a partir da primeira fatura as outras abrem na primeira tentativa.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ProcessPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field
+
+import pikepdf
+
+from services.extractor import read_client_id
+from services.pdf_probe import PDF_CORRUPT, PDF_PLAIN, probe_pdf
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CREDENTIALS_FILE = os.path.join(BASE_DIR, "data", "credentials.json")
+
+
+class CredentialMap:
+    """
+    Mapa numero_cliente -> senha, persistido em JSON (arquivo local, com
+    permissão só para o dono). Entradas novas só vão para o disco em save().
+    """
+
+    def __init__(self, path=CREDENTIALS_FILE):
+        self.path = path
+        self._passwords = self._load()
+        self._dirty = False
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Mapa de senhas ilegível (%s): %s", self.path, e)
+            return {}
+        return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+
+    def get(self, client_id):
+        return self._passwords.get(client_id)
+
+    def record(self, client_id, password):
+        if client_id and password and self._passwords.get(client_id) != password:
+            self._passwords[client_id] = password
+            self._dirty = True
+
+    def ranked_passwords(self):
+        """Senhas conhecidas, da que abriu mais UCs para a que abriu menos."""
+        return [password for password, _ in Counter(self._passwords.values()).most_common()]
+
+    def candidate_order(self, candidates, hint=""):
+        """
+        Ordem de tentativa das senhas para um arquivo.
+
+        Args:
+            candidates: Senhas candidatas informadas para a carga.
+            hint (str): Nome do arquivo; UCs conhecidas que aparecem nele
+                passam a senha delas para o começo da fila.
+        """
+        hinted = [pw for client_id, pw in self._passwords.items() if client_id in hint]
+        return list(dict.fromkeys([*hinted, *self.ranked_passwords(), *candidates]))
+
+    def save(self):
+        """Grava o mapa (escrita atômica) se houve entradas novas."""
+        if not self._dirty or not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Temporário com nome único: duas cargas simultâneas não se atropelam.
+        # NamedTemporaryFile já cria o arquivo com permissão 0o600.
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=os.path.dirname(self.path) or ".",
+            prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", delete=False,
+        ) as f:
+            tmp_path = f.name
+            try:
+                json.dump(self._passwords, f, ensure_ascii=False, indent=2, sort_keys=True)
+            except BaseException:
+                f.close()
+                os.remove(tmp_path)
+                raise
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def __contains__(self, client_id):
+        return client_id in self._passwords
+
+    def __len__(self):
+        return len(self._passwords)
+
+
+@dataclass
+class PasswordResult:
+    """Resultado da busca de senha de um PDF."""
+
+    path: str
+    password: str = None
+    client_id: str = ""
+    encrypted: bool = True
+    attempts: int = 0
+    error: str = ""
+
+    @property
+    def resolved(self):
+        return not self.error
+
+
+@dataclass
+class PasswordResolution:
+    """Resumo de resolve_passwords, na ordem dos arquivos recebidos."""
+
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def unresolved(self):
+        return [r for r in self.results if not r.resolved]
+
+    @property
+    def passwords(self):
+        """Caminho -> senha (None para PDFs sem senha) dos resolvidos."""
+        return {r.path: r.password for r in self.results if r.resolved}
+
+    def summary(self):
+        attempts = sum(r.attempts for r in self.results)
+        return (
+            f"{len(self.results)} PDFs em {self.elapsed:.2f}s: "
+            f"{len(self.results) - len(self.unresolved)} liberados, "
+            f"{len(self.unresolved)} sem senha válida ({attempts} tentativas)"
+        )
+
+
+def _try_passwords(path, passwords):
+    """Testa as senhas na ordem dada. Roda dentro dos processos do pool."""
+    status = probe_pdf(path)
+    if status == PDF_CORRUPT:
+        return PasswordResult(path, error="PDF corrompido ou incompleto")
+    if status == PDF_PLAIN:
+        return PasswordResult(path, encrypted=False)
+
+    for attempts, password in enumerate(passwords, start=1):
+        try:
+            # Abrir já valida a senha; os objetos do PDF são lidos sob demanda
+            with pikepdf.open(path, password=password):
+                pass
+        except pikepdf.PasswordError:
+            continue
+        except Exception as e:
+            return PasswordResult(path, attempts=attempts, error=str(e) or type(e).__name__)
+
+        # Só a UC interessa aqui: lida do texto cru, sem extrair a fatura
+        try:
+            client_id = read_client_id(path, password)
+        except Exception as e:
+            logger.warning("UC não lida de %s: %s", path, e)
+            client_id = ""
+        return PasswordResult(path, password, client_id, attempts=attempts)
+
+    return PasswordResult(
+        path, attempts=len(passwords), error="Nenhuma senha candidata desbloqueou o PDF"
+    )
+
+
+def resolve_passwords(paths, candidates, credentials=None, max_workers=None):
+    """
+    Descobre a senha de cada PDF entre as candidatas.
+
+    Os arquivos são distribuídos entre processos, mas só max_workers ficam
+    em andamento por vez: a ordem das senhas de cada arquivo é decidida no
+    envio, já com o que os anteriores ensinaram ao mapa.
+
+    Args:
+        paths (list): Caminhos dos PDFs.
+        candidates (list): Senhas candidatas (ex.: prefixos de CPF).
+        credentials (CredentialMap, opcional): Mapa UC -> senha; padrão o
+            arquivo CREDENTIALS_FILE. É atualizado e gravado no fim.
+        max_workers (int, opcional): Processos; 1 testa no processo atual.
+
+    Returns:
+        PasswordResolution (unresolved lista os que nenhuma senha abriu).
+    """
+    credentials = CredentialMap() if credentials is None else credentials
+    candidates = list(dict.fromkeys(c for c in candidates if c))
+    resolution = PasswordResolution()
+    start = time.perf_counter()
+
+    def passwords_for(path):
+        return credentials.candidate_order(candidates, hint=os.path.basename(path))
+
+    results = {}
+
+    def handle(result):
+        results[result.path] = result
+        if result.resolved and result.encrypted:
+            credentials.record(result.client_id, result.password)
+        elif not result.resolved:
+            logger.warning("Senha não encontrada para %s: %s", result.path, result.error)
+
+    if max_workers == 1:
+        for path in paths:
+            handle(_try_passwords(path, passwords_for(path)))
+    else:
+        max_workers = max_workers or os.cpu_count() or 1
+        # "spawn" evita fork() de um processo com threads (pyarrow/streamlit)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            pending = {}
+            queue = iter(paths)
+            while True:
+                for path in queue:
+                    try:
+                        future = executor.submit(_try_passwords, path, passwords_for(path))
+                    except BrokenExecutor as e:
+                        handle(PasswordResult(path, error=str(e) or type(e).__name__))
+                        continue
+                    pending[future] = path
+                    if len(pending) >= max_workers:
+                        break
+                if not pending:
+                    break
+                done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Ex.: BrokenProcessPool; só este arquivo fica sem senha
+                        result = PasswordResult(path, error=str(e) or type(e).__name__)
+                    handle(result)
+
+    credentials.save()
+    resolution.results = [results[path] for path in paths]
+    resolution.elapsed = time.perf_counter() - start
+    logger.info("Senhas: %s", resolution.summary())
+    return resolution
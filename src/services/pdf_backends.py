@@ -0,0 +1,398 @@
+"""
+Backends de extração de texto para o InvoiceParser.
+
+Um backend abre o PDF e fornece, para a página corrente, o que os parsers
+consomem: caracteres posicionados (no formato de dict do pdfplumber), o
+texto com layout e a busca de âncoras nesse texto. Palavras e recortes
+são montados pelo ParseContext a partir dos caracteres, igual para todos.
+
+As páginas são percorridas em sequência (next_page) e só uma fica carregada
+por vez: ao avançar, os caches da página anterior (caracteres, layout,
+textmap) são liberados, então a memória não cresce com o tamanho do
+documento (extratos consolidados com centenas de páginas).
+
+- PdfplumberBackend: implementação original (pdfminer, puro Python).
+- PdfiumBackend: lê os caracteres com o pypdfium2 (C++; declarado no
+  pyproject, além de vir com o pdfplumber) e reaproveita os utilitários de
+  texto do pdfplumber, produzindo o mesmo texto/palavras a uma fração do
+  custo.
+
+O backend é escolhido por execução (parâmetro backend=...) ou pela
+variável de ambiente SHERLOCK_PDF_BACKEND.
+
+O PDF pode vir de um caminho ou da memória (bytes, BytesIO, UploadedFile do
+Streamlit): PDFs protegidos são decifrados na leitura, com a senha, sem
+cópia em disco.
+
+Independente do backend, fingerprint() devolve um DocumentFingerprint
+(metadados, tamanho da página e texto cru sem layout), lido pelo PDFium em
+poucos milissegundos, para a escolha do parser antes de qualquer passada
+de layout.
+"""
+
+import ctypes
+import functools
+import io
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import pdfplumber
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from pdfminer.pdfpage import PDFPage
+from pdfplumber.page import Page
+from pdfplumber.utils import chars_to_textmap
+
+
+@dataclass(frozen=True, slots=True)
+class DocumentFingerprint:
+    """Características baratas de um PDF, usadas para rotear o parser."""
+
+    producer: str = ""
+    creator: str = ""
+    page_size: tuple = (0.0, 0.0)
+    # Texto cru da primeira página, na ordem do content stream (sem layout)
+    text: str = ""
+
+
+def read_source(source):
+    """
+    Normaliza a origem do PDF: caminho (str) ou bytes. Objetos de arquivo
+    (BytesIO, UploadedFile) são lidos para bytes.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    raise TypeError(f"Origem de PDF não suportada: {type(source).__name__}")
+
+
+def source_label(source):
+    """Nome curto da origem para logs (caminho, nome do upload ou tamanho)."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    name = getattr(source, "name", None)
+    if isinstance(name, str):
+        return name
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"<PDF em memória, {len(source)} bytes>"
+    return repr(source)
+
+
+# O PDFium não é thread-safe: chamadas de threads diferentes (ex.: a fila de
+# uploads do app) são serializadas por este lock
+_PDFIUM_LOCK = threading.RLock()
+
+
+def _pdfium_call(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _PDFIUM_LOCK:
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def _read_page_text(textpage):
+    return textpage.get_text_range().replace("\r\n", "\n")
+
+
+def _read_fingerprint(doc, page=None, textpage=None):
+    """Monta o DocumentFingerprint de um PdfDocument do PDFium já aberto."""
+    metadata = doc.get_metadata_dict(skip_empty=True)
+    own_page = page is None
+    if own_page:
+        page = doc[0]
+        textpage = page.get_textpage()
+
+    try:
+        return DocumentFingerprint(
+            producer=metadata.get("Producer", ""),
+            creator=metadata.get("Creator", ""),
+            page_size=tuple(page.get_size()),
+            text=_read_page_text(textpage),
+        )
+    finally:
+        if own_page:
+            textpage.close()
+            page.close()
+
+
+class PdfBackend(ABC):
+    """
+    Fonte de caracteres e texto de um PDF, uma página por vez.
+
+    Abre posicionado na primeira página (page_index == 0); next_page()
+    avança e libera a anterior.
+    """
+
+    name = ""
+
+    def __init__(self, file_path, password=None):
+        self.file_path = file_path
+        self.password = password
+        self.source = read_source(file_path)
+        self.page_index = -1
+        self._raw_doc = None
+
+    @abstractmethod
+    def next_page(self):
+        """Avança para a próxima página. False no fim do documento."""
+
+    @property
+    @abstractmethod
+    def bbox(self):
+        """bbox da página (x0, top, x1, bottom), em coordenadas pdfplumber."""
+
+    @property
+    @abstractmethod
+    def chars(self):
+        """Caracteres posicionados (dicts com text, x0, x1, top, bottom...)."""
+
+    @abstractmethod
+    def layout_text(self):
+        """Texto da página com layout preservado."""
+
+    @abstractmethod
+    def search(self, pattern):
+        """Ocorrências do regex no texto com layout (dicts com top/bottom)."""
+
+    @_pdfium_call
+    def _raw_document(self):
+        # Documento PDFium auxiliar para leituras baratas (sem layout)
+        if self._raw_doc is None:
+            self._raw_doc = pdfium.PdfDocument(self.source, password=self.password)
+        return self._raw_doc
+
+    @_pdfium_call
+    def fingerprint(self):
+        """DocumentFingerprint do PDF, sem passada de layout."""
+        return _read_fingerprint(self._raw_document())
+
+    @_pdfium_call
+    def page_text(self):
+        """Texto cru (sem layout) da página corrente, lido pelo PDFium."""
+        page = self._raw_document()[self.page_index]
+        textpage = page.get_textpage()
+        try:
+            return _read_page_text(textpage)
+        finally:
+            textpage.close()
+            page.close()
+
+    @_pdfium_call
+    def close(self):
+        if self._raw_doc is not None:
+            self._raw_doc.close()
+            self._raw_doc = None
+
+
+class PdfplumberBackend(PdfBackend):
+    """Backend original, baseado no pdfplumber/pdfminer."""
+
+    name = "pdfplumber"
+
+    def __init__(self, file_path, password=None):
+        super().__init__(file_path, password)
+        source = self.source if isinstance(self.source, str) else io.BytesIO(self.source)
+        self._pdf = pdfplumber.open(source, password=password)
+        # Sem o cache de objetos do pdfminer: o conteúdo das páginas já lidas
+        # não fica retido no documento (fontes seguem em cache no rsrcmgr)
+        self._pdf.doc.caching = False
+        # Páginas criadas sob demanda; pdf.pages montaria todas de uma vez
+        self._page_objs = PDFPage.create_pages(self._pdf.doc)
+        self._doctop = 0
+        self.page = None
+        if not self.next_page():
+            self.close()
+            raise ValueError("PDF sem páginas")
+
+    def next_page(self):
+        page_obj = next(self._page_objs, None)
+        if page_obj is None:
+            return False
+
+        if self.page is not None:
+            self._doctop += self.page.height
+            self.page.close()
+        self.page_index += 1
+        self.page = Page(
+            self._pdf, page_obj, page_number=self.page_index + 1, initial_doctop=self._doctop
+        )
+        return True
+
+    @property
+    def bbox(self):
+        return self.page.bbox
+
+    @property
+    def chars(self):
+        return self.page.chars
+
+    def layout_text(self):
+        return self.page.extract_text(layout=True) or ""
+
+    def search(self, pattern):
+        # Mesmo textmap (em cache no pdfplumber) usado por layout_text
+        return self.page.search(pattern, layout=True, return_chars=False)
+
+    def close(self):
+        if self.page is not None:
+            self.page.close()
+            self.page = None
+        # pdf.close() montaria todas as páginas só para fechá-las
+        self._pdf.flush_cache()
+        self._pdf.stream.close()
+        super().close()
+
+
+class PdfiumBackend(PdfBackend):
+    """
+    Backend rápido: caracteres lidos pelo PDFium.
+
+    As caixas seguem a convenção do pdfminer (base + descendente até
+    base + descendente + tamanho da fonte, x1 = x0 + avanço), assim o
+    textmap e as palavras do pdfplumber saem iguais aos do backend original.
+    """
+
+    name = "pdfium"
+
+    # Códigos que o PDFium devolve sem glifo correspondente
+    _SKIPPED_CODES = {0, 0x0A, 0x0D, 0xFFFE, 0xFFFF}
+
+    @_pdfium_call
+    def __init__(self, file_path, password=None):
+        super().__init__(file_path, password)
+        self._doc = pdfium.PdfDocument(self.source, password=password)
+        self._page = None
+        self._textpage = None
+        if not self.next_page():
+            self.close()
+            raise ValueError("PDF sem páginas")
+
+    @_pdfium_call
+    def next_page(self):
+        if self.page_index + 1 >= len(self._doc):
+            return False
+
+        self._release_page()
+        self.page_index += 1
+        self._page = self._doc[self.page_index]
+        self._textpage = self._page.get_textpage()
+        width, height = self._page.get_size()
+        self._bbox = (0, 0, width, height)
+        return True
+
+    def _release_page(self):
+        self._chars = None
+        self._textmap = None
+        if self._textpage is not None:
+            self._textpage.close()
+            self._page.close()
+            self._textpage = self._page = None
+
+    @property
+    def bbox(self):
+        return self._bbox
+
+    @property
+    def chars(self):
+        if self._chars is None:
+            self._chars = self._read_chars()
+        return self._chars
+
+    @_pdfium_call
+    def _read_chars(self):
+        textpage = self._textpage.raw
+        page_height = self._bbox[3]
+        rect = pdfium_c.FS_RECTF()
+        rect_ref = ctypes.byref(rect)
+
+        chars = []
+        for i in range(pdfium_c.FPDFText_CountChars(textpage)):
+            if pdfium_c.FPDFText_IsGenerated(textpage, i):
+                continue
+            code = pdfium_c.FPDFText_GetUnicode(textpage, i)
+            if code in self._SKIPPED_CODES:
+                continue
+
+            pdfium_c.FPDFText_GetLooseCharBox(textpage, i, rect_ref)
+            size = pdfium_c.FPDFText_GetFontSize(textpage, i)
+            y0 = rect.bottom
+            top = page_height - (y0 + size)
+            chars.append(
+                {
+                    "text": chr(code),
+                    "x0": rect.left,
+                    "x1": rect.right,
+                    "top": top,
+                    "bottom": page_height - y0,
+                    "doctop": top,
+                    "upright": True,
+                    "size": size,
+                    "matrix": (1, 0, 0, 1, rect.left, y0),
+                }
+            )
+        return chars
+
+    def _get_textmap(self):
+        # Mesmos parâmetros que pdfplumber.Page usa em extract_text(layout=True)
+        if self._textmap is None:
+            x0, top, x1, bottom = self._bbox
+            self._textmap = chars_to_textmap(
+                self.chars,
+                layout=True,
+                layout_bbox=self._bbox,
+                layout_width=x1 - x0,
+                layout_height=bottom - top,
+            )
+        return self._textmap
+
+    def layout_text(self):
+        return self._get_textmap().as_string
+
+    def search(self, pattern):
+        return self._get_textmap().search(pattern, return_chars=False)
+
+    @_pdfium_call
+    def fingerprint(self):
+        # Reaproveita o documento (e a primeira página, se ainda aberta)
+        if self.page_index == 0:
+            return _read_fingerprint(self._doc, self._page, self._textpage)
+        return _read_fingerprint(self._doc)
+
+    @_pdfium_call
+    def page_text(self):
+        return _read_page_text(self._textpage)
+
+    @_pdfium_call
+    def close(self):
+        self._release_page()
+        self._doc.close()
+        super().close()
+
+
+BACKENDS = {backend.name: backend for backend in (PdfplumberBackend, PdfiumBackend)}
+
+DEFAULT_BACKEND = os.environ.get("SHERLOCK_PDF_BACKEND", PdfplumberBackend.name)
+
+
+def get_backend(backend=None):
+    """Resolve o backend por nome (ou classe); None usa DEFAULT_BACKEND."""
+    if backend is None:
+        backend = DEFAULT_BACKEND
+    if isinstance(backend, type) and issubclass(backend, PdfBackend):
+        return backend
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Backend de PDF desconhecido: {backend!r} (opções: {', '.join(BACKENDS)})"
+        ) from None
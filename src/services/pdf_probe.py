@@ -0,0 +1,174 @@
+"""
+Sondagem rápida de PDFs: sem senha, protegido ou corrompido.
+
+Em vez de abrir o documento (pikepdf/pdfminer montam a tabela de objetos
+inteira), lê só o cabeçalho, o final do arquivo (startxref) e o dicionário
+do trailer/xref apontado por ele, procurando a entrada /Encrypt. O custo é
+o mesmo para uma fatura de 100 KB ou um extrato de 50 MB, então dá para
+triar os arquivos antes de qualquer extração.
+
+Funciona com tabelas xref clássicas, xref streams (PDF 1.5+), atualizações
+incrementais (vale o último trailer) e arquivos linearizados (o startxref
+final aponta para a xref da primeira página, que traz o trailer completo).
+
+Se o caminho rápido falhar (lixo antes do %PDF-, que desloca os offsets, ou
+bytes depois do %%EOF, que empurram o startxref para fora do final lido), o
+arquivo inteiro é varrido atrás do cabeçalho, do startxref e do último
+trailer, como fazem os leitores de PDF ao reconstruir a xref. Só é
+PDF_CORRUPT o que nem assim tem cabeçalho, startxref ou trailer.
+"""
+
+import io
+import os
+import re
+
+PDF_PLAIN = "plain"
+PDF_ENCRYPTED = "encrypted"
+PDF_CORRUPT = "corrupt"
+
+HEAD_SIZE = 1024  # o "%PDF-" pode vir depois de lixo no início do arquivo
+TAIL_SIZE = 2048  # startxref e %%EOF ficam nos últimos bytes
+WINDOW_SIZE = 4096  # trecho lido a partir do offset da xref
+MAX_SUBSECTIONS = 1024  # limite de subseções puladas numa tabela xref
+
+_STARTXREF_REGEX = re.compile(rb"startxref\s+(\d+)")
+_SUBSECTION_REGEX = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n?")
+_XREF_STREAM_REGEX = re.compile(rb"\s*\d+\s+\d+\s+obj\s*(?=<<)")
+_TRAILER_REGEX = re.compile(rb"\s*trailer\s*(?=<<)")
+_ENCRYPT_REGEX = re.compile(rb"/Encrypt(?![A-Za-z0-9])")
+# Trailer clássico ou objeto de xref stream, em qualquer ponto do arquivo
+_ANY_TRAILER_REGEX = re.compile(
+    rb"trailer\s*(?=<<)|\d+\s+\d+\s+obj\s*(?=<<[^>]*?/Type\s*/XRef)"
+)
+_XREF_ENTRY_SIZE = 20
+
+
+def _open_stream(source):
+    """Devolve (arquivo binário com seek, fechar_no_fim)."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb"), True
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), True
+    if hasattr(source, "seek") and hasattr(source, "read"):
+        return source, False
+    raise TypeError(f"Fonte de PDF não suportada: {type(source).__name__}")
+
+
+def _read_at(stream, offset, size):
+    stream.seek(offset)
+    return stream.read(size)
+
+
+def _dictionary_at(window, start):
+    """Recorta o dicionário << ... >> que começa em window[start] (ou None)."""
+    depth = 0
+    pos = start
+    while pos < len(window) - 1:
+        pair = window[pos:pos + 2]
+        if pair == b"<<":
+            depth += 1
+            pos += 2
+        elif pair == b">>":
+            depth -= 1
+            pos += 2
+            if depth == 0:
+                return window[start:pos]
+        else:
+            pos += 1
+    return None
+
+
+def _table_trailer(stream, offset, size):
+    """Pula as entradas de uma tabela xref clássica e lê o trailer seguinte."""
+    pos = offset + len(b"xref")
+    for _ in range(MAX_SUBSECTIONS):
+        window = _read_at(stream, pos, WINDOW_SIZE)
+        trailer = _TRAILER_REGEX.match(window)
+        if trailer:
+            return _dictionary_at(window, trailer.end())
+
+        subsection = _SUBSECTION_REGEX.match(window)
+        if not subsection:
+            return None
+        pos += subsection.end() + int(subsection.group(2)) * _XREF_ENTRY_SIZE
+        if pos > size:
+            return None
+    return None
+
+
+def _xref_dictionary(stream, offset, size):
+    """Dicionário do trailer (tabela clássica) ou da xref stream no offset."""
+    if offset >= size:
+        return None
+
+    window = _read_at(stream, offset, WINDOW_SIZE)
+    if window.startswith(b"xref"):
+        return _table_trailer(stream, offset, size)
+
+    xref_stream = _XREF_STREAM_REGEX.match(window)
+    if xref_stream:
+        return _dictionary_at(window, xref_stream.end())
+    return None
+
+
+def _scan_trailer(stream, size):
+    """
+    Caminho lento: varre o arquivo inteiro. Testa o último startxref também
+    deslocado pelo lixo antes do cabeçalho; se nem assim achar a xref, usa o
+    último trailer (ou dicionário de xref stream) do arquivo.
+    """
+    data = _read_at(stream, 0, size)
+    header = data.find(b"%PDF-")
+    startxrefs = _STARTXREF_REGEX.findall(data)
+    if header < 0 or not startxrefs:
+        return None
+
+    offset = int(startxrefs[-1])
+    for candidate in dict.fromkeys((offset + header, offset)):
+        trailer = _xref_dictionary(stream, candidate, size)
+        if trailer is not None:
+            return trailer
+
+    trailers = list(_ANY_TRAILER_REGEX.finditer(data))
+    if not trailers:
+        return None
+    return _dictionary_at(data, trailers[-1].end())
+
+
+def probe_pdf(source):
+    """
+    Classifica o PDF sem abri-lo por inteiro.
+
+    Args:
+        source: Caminho, bytes/BytesIO ou arquivo com seek (UploadedFile do
+            Streamlit). A posição de arquivos recebidos abertos é restaurada.
+
+    Returns:
+        str: PDF_PLAIN, PDF_ENCRYPTED ou PDF_CORRUPT (sem cabeçalho %PDF,
+        sem startxref ou sem trailer em todo o arquivo; ex.: download
+        incompleto).
+    """
+    stream, owned = _open_stream(source)
+    position = None if owned else stream.tell()
+    try:
+        size = stream.seek(0, io.SEEK_END)
+        trailer = None
+        if b"%PDF-" in _read_at(stream, 0, HEAD_SIZE):
+            tail = _read_at(stream, max(0, size - TAIL_SIZE), TAIL_SIZE)
+            startxrefs = _STARTXREF_REGEX.findall(tail)
+            if startxrefs:
+                trailer = _xref_dictionary(stream, int(startxrefs[-1]), size)
+        if trailer is None:
+            trailer = _scan_trailer(stream, size)
+        if trailer is None:
+            return PDF_CORRUPT
+        return PDF_ENCRYPTED if _ENCRYPT_REGEX.search(trailer) else PDF_PLAIN
+
+    except OSError:
+        return PDF_CORRUPT
+
+    finally:
+        if owned:
+            stream.close()
+        else:
+            stream.seek(position)
@@ -0,0 +1,266 @@
+"""
+Instrumentação opcional da extração de faturas, por etapa.
+
+Com um ExtractionProfiler ativo, cada PDF extraído gera um registro com o
+parser usado e, para cada etapa (abertura/decifragem, roteamento, texto com
+layout, referência/cliente, medição, linhas e itens financeiros, montagem
+dos DataFrames), o tempo de parede e o saldo de blocos vivos (net_blocks).
+Os registros vão para um callback e/ou um arquivo JSONL (uma linha por PDF).
+Sem profiler ativo, os ganchos do extractor não fazem nada.
+
+Exemplo:
+    with ExtractionProfiler(jsonl_path="data/profile.jsonl") as profiler:
+        for path in paths:
+            extract_data_from_pdf(path)
+    print(profiler.summary())
+
+Os tempos são exclusivos: uma etapa que dispara outra (ex.: a primeira
+leitura de layout_text dentro de "reference_client") não conta o tempo da
+etapa interna.
+
+net_blocks é a variação de sys.getallocatedblocks() na etapa: blocos
+criados menos blocos liberados, não o número de alocações. Fica negativo
+quando a etapa libera mais do que cria (ex.: fecha uma página ou o GC roda
+no meio dela). Para medir memória de verdade, use trace_memory.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from services.pdf_backends import source_label
+
+_ACTIVE_PROFILER = ContextVar("extraction_profiler", default=None)
+
+
+class _StageFrame:
+    __slots__ = ("name", "start", "blocks", "children", "child_blocks")
+
+    def __init__(self, name):
+        self.name = name
+        self.children = 0.0
+        self.child_blocks = 0
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+
+
+class ExtractionProfiler:
+    """
+    Coleta tempo e saldo de blocos vivos por etapa de cada PDF extraído.
+
+    Args:
+        callback (callable, opcional): Chamado com o registro (dict) de
+            cada PDF ao fim da extração.
+        jsonl_path (str, opcional): Arquivo JSONL onde cada registro é
+            acrescentado (modo append; seguro entre processos).
+        trace_memory (bool): Também mede o pico de memória (KiB) de cada
+            etapa com tracemalloc. Mais preciso, mas deixa a extração
+            bem mais lenta.
+    """
+
+    def __init__(self, callback=None, jsonl_path=None, trace_memory=False):
+        self.callback = callback
+        self.jsonl_path = jsonl_path
+        self.trace_memory = trace_memory
+        self.records = []
+        self._current = None
+        self._stack = []
+        self._token = None
+        self._started_tracemalloc = False
+
+    # --- Ativação --------------------------------------------------------
+
+    def __enter__(self):
+        self._token = _ACTIVE_PROFILER.set(self)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _ACTIVE_PROFILER.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # --- Escopos ---------------------------------------------------------
+
+    @contextmanager
+    def file_scope(self, file_path):
+        """Agrupa as etapas de um PDF em um registro (reentrante)."""
+        if self._current is not None:
+            yield self._current
+            return
+
+        record = {
+            "file": source_label(file_path),
+            "parser": None,
+            "ok": True,
+            "error": None,
+            "failed_stage": None,
+            "stages": {},
+        }
+        self._current = record
+        start = time.perf_counter()
+        try:
+            yield record
+        except GeneratorExit:
+            # Consumidor parou de ler um gerador de extração: não é falha
+            raise
+        except BaseException as e:
+            self._note_error(record, e)
+            raise
+        finally:
+            record["total_ms"] = (time.perf_counter() - start) * 1000
+            record["timestamp"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            self._current = None
+            self._stack.clear()
+            self._emit(record)
+
+    @contextmanager
+    def stage(self, name):
+        """Mede uma etapa do PDF corrente (fora de um file_scope, ignora)."""
+        if self._current is None:
+            yield
+            return
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base_memory = tracemalloc.get_traced_memory()[0]
+
+        frame = _StageFrame(name)
+        self._stack.append(frame)
+        try:
+            yield
+        except BaseException:
+            if self._current["failed_stage"] is None:
+                self._current["failed_stage"] = name
+            raise
+        finally:
+            elapsed = time.perf_counter() - frame.start
+            blocks = sys.getallocatedblocks() - frame.blocks
+            self._stack.pop()
+
+            if self._stack:
+                parent = self._stack[-1]
+                parent.children += elapsed
+                parent.child_blocks += blocks
+
+            stats = self._current["stages"].setdefault(name, {"ms": 0.0, "net_blocks": 0})
+            stats["ms"] += (elapsed - frame.children) * 1000
+            stats["net_blocks"] += blocks - frame.child_blocks
+            if self.trace_memory:
+                peak_kib = (tracemalloc.get_traced_memory()[1] - base_memory) / 1024
+                stats["peak_kib"] = max(stats.get("peak_kib", 0.0), peak_kib)
+
+    def annotate(self, **fields):
+        """Acrescenta campos (ex.: parser, backend) ao registro corrente."""
+        if self._current is not None:
+            self._current.update(fields)
+
+    def note_error(self, error):
+        if self._current is not None:
+            self._note_error(self._current, error)
+
+    def _note_error(self, record, error):
+        record["ok"] = False
+        if record["error"] is None:
+            if isinstance(error, BaseException):
+                record["error"] = f"{type(error).__name__}: {str(error) or repr(error)}"
+            else:
+                record["error"] = str(error)
+        if record["failed_stage"] is None and self._stack:
+            record["failed_stage"] = self._stack[-1].name
+
+    def _emit(self, record):
+        self.records.append(record)
+        if self.jsonl_path:
+            folder = os.path.dirname(os.path.abspath(self.jsonl_path))
+            os.makedirs(folder, exist_ok=True)
+            # Uma única escrita por linha: registros de processos paralelos
+            # não se misturam no arquivo
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.callback is not None:
+            self.callback(record)
+
+    # --- Consulta --------------------------------------------------------
+
+    def summary(self):
+        """
+        Agrega os registros por classe de parser e etapa:
+        {parser: {etapa: {count, total_ms, mean_ms, p95_ms, max_ms}}}.
+        """
+        samples = {}
+        for record in self.records:
+            parser = record["parser"] or "(nenhum)"
+            for name, stats in record["stages"].items():
+                samples.setdefault(parser, {}).setdefault(name, []).append(stats["ms"])
+
+        return {
+            parser: {name: _describe(values) for name, values in stages.items()}
+            for parser, stages in samples.items()
+        }
+
+    def slowest(self, n=10):
+        """Os n PDFs mais lentos (para achar PDFs patológicos)."""
+        return sorted(self.records, key=lambda r: r["total_ms"], reverse=True)[:n]
+
+
+def _describe(values):
+    ordered = sorted(values)
+    p95_index = min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))
+    return {
+        "count": len(values),
+        "total_ms": sum(values),
+        "mean_ms": statistics.fmean(values),
+        "p95_ms": ordered[p95_index],
+        "max_ms": ordered[-1],
+    }
+
+
+def load_profile(jsonl_path):
+    """Lê um arquivo JSONL gravado pelo ExtractionProfiler."""
+    with open(jsonl_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --- Ganchos usados pelo extractor (no-op sem profiler ativo) ---------------
+
+
+@contextmanager
+def profile_file(file_path):
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        yield None
+        return
+    with profiler.file_scope(file_path) as record:
+        yield record
+
+
+@contextmanager
+def profile_stage(name):
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def annotate(**fields):
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is not None:
+        profiler.annotate(**fields)
+
+
+def note_error(error):
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is not None:
+        profiler.note_error(error)
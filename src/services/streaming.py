@@ -0,0 +1,181 @@
+"""
+API de ingestão em streaming, para arquivos com muitas faturas.
+
+Em vez de montar dois DataFrames por PDF e concatenar tudo no fim,
+iter_invoice_records devolve um registro compacto por fatura (gerador: um
+PDF aberto por vez) e InvoiceSink grava esses registros no banco em blocos
+de tamanho fixo. A memória de pico fica limitada a um bloco,
+independentemente de quantas faturas passam pelo fluxo.
+
+Exemplo:
+    with InvoiceSink(chunk_size=200) as sink:
+        for record in iter_invoice_records("data/faturas"):
+            sink.append(record)
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from services.bulk_import import collect_pdf_paths
+from services.extractor import (
+    FINANCIAL_FIELDS,
+    MEASUREMENT_FIELDS,
+    ColumnBuffer,
+    frames_from_raw_batch,
+    frames_from_raw_data,
+    iter_raw_data,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FinancialItem(NamedTuple):
+    """Linha da tabela "Itens de Fatura" (valores como extraídos do PDF)."""
+
+    descricao: str
+    unidade: str
+    quantidade: str
+    preco_unitario: str
+    valor_total: str
+    pis_cofins: str
+    base_calculo_icms: str
+    aliquota_icms: str
+    valor_icms: str
+    tarifa_unitaria: str
+
+
+class MeasurementRow(NamedTuple):
+    """Linha do bloco "Dados de Medição"."""
+
+    numero_medidor: str
+    segmento: str
+    data_leitura_anterior: str
+    leitura_anterior: str
+    data_leitura_atual: str
+    leitura_atual: str
+    fator_multiplicador: str
+    consumo_kwh: str
+    numero_dias: str
+
+
+@dataclass(slots=True, frozen=True)
+class InvoiceRecord:
+    """Uma fatura extraída: identificação + itens e medições tipados."""
+
+    source: str
+    reference: str
+    client_id: str
+    items: tuple
+    measurement: tuple
+
+    @classmethod
+    def from_raw_data(cls, source, raw_data):
+        return cls(
+            source=str(source),
+            reference=raw_data.get("reference", "Not Found"),
+            client_id=raw_data.get("client_id", "Desconhecido"),
+            items=tuple(map(FinancialItem._make, raw_data["items"].rows())),
+            measurement=tuple(map(MeasurementRow._make, raw_data["measurement"].rows())),
+        )
+
+    @property
+    def key(self):
+        """Chave lógica da fatura (mesma do upsert no banco)."""
+        return self.reference, self.client_id
+
+    def to_raw_data(self):
+        """Dict bruto no formato de InvoiceParser.extract."""
+        return {
+            "reference": self.reference,
+            "client_id": self.client_id,
+            "items": ColumnBuffer.from_rows(FINANCIAL_FIELDS, self.items),
+            "measurement": ColumnBuffer.from_rows(MEASUREMENT_FIELDS, self.measurement),
+        }
+
+    def to_frames(self):
+        """Converte nos DataFrames padronizados de extract_data_from_pdf."""
+        return frames_from_raw_data(self.to_raw_data())
+
+
+def iter_invoice_records(paths, password=None, on_error=None):
+    """
+    Gera um InvoiceRecord por fatura, abrindo um PDF de cada vez (um
+    extrato consolidado gera um registro por UC).
+
+    Args:
+        paths: Diretório, padrão glob, caminho ou lista desses
+            (mesma resolução de bulk_import).
+        password (str, opcional): Senha dos PDFs protegidos.
+        on_error (callable, opcional): Chamado com o caminho de cada PDF
+            que não pôde ser extraído. Por padrão apenas registra no log.
+    """
+    for path in collect_pdf_paths(paths):
+        extracted = False
+        for raw_data in iter_raw_data(path, password):
+            if raw_data and raw_data.get("items"):
+                extracted = True
+                yield InvoiceRecord.from_raw_data(path, raw_data)
+
+        if not extracted:
+            logger.warning("Fatura ignorada (sem dados extraídos): %s", path)
+            if on_error is not None:
+                on_error(path)
+
+
+class InvoiceSink:
+    """
+    Acumula InvoiceRecords e grava no banco a cada chunk_size faturas.
+
+    Faturas repetidas dentro do mesmo bloco ficam só com a última versão
+    (entre blocos, o upsert de save_data já faz a substituição).
+    """
+
+    def __init__(self, chunk_size=100, save=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size deve ser >= 1")
+
+        if save is None:
+            from database import save_data as save
+
+        self.chunk_size = chunk_size
+        self._save = save
+        self._buffer = {}
+        self.written = 0
+        self.chunks = 0
+
+    def append(self, record):
+        self._buffer.pop(record.key, None)
+        self._buffer[record.key] = record
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Grava o bloco pendente (se houver) em uma única chamada."""
+        if not self._buffer:
+            return True
+
+        # Um único par de DataFrames para o bloco inteiro
+        df_fin, df_med = frames_from_raw_batch(
+            record.to_raw_data() for record in self._buffer.values()
+        )
+
+        ok = self._save(df_fin, df_med)
+        if ok:
+            self.written += len(self._buffer)
+            self.chunks += 1
+        else:
+            logger.error("Falha ao gravar bloco com %d faturas", len(self._buffer))
+
+        self._buffer.clear()
+        return ok
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
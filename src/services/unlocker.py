@@ -1,45 +1,44 @@
+import glob
+import io
 import logging
 import os
 
 import pikepdf
 
+from services.pdf_backends import read_source
+from services.pdf_probe import PDF_ENCRYPTED, probe_pdf
+
 logger = logging.getLogger(__name__)
 
+# Pasta onde versões anteriores gravavam as cópias desbloqueadas
+LEGACY_UNLOCKED_FOLDER = "data/raw"
+
 
 def unlock_pdf_file(uploaded_file, password=None):
     """
-    Recebe um arquivo (UploadedFile ou caminho) e retorna o caminho
-    de uma versão desbloqueada temporária.
+    Recebe um arquivo (UploadedFile, bytes, BytesIO ou caminho) e retorna os
+    bytes de uma versão desbloqueada, gerada em memória.
+
+    Nada é gravado em disco: nem o upload nem a cópia decifrada. Para só
+    extrair os dados não é preciso desbloquear antes; o extractor aceita os
+    bytes e a senha diretamente.
 
     Args:
-        uploaded_file: Objeto do Streamlit ou caminho str.
+        uploaded_file: Objeto do Streamlit, bytes/BytesIO ou caminho str.
         password (str, opcional): Senha para tentar desbloquear.
-    """
-
-    # Define onde salvar o arquivo temporário
-    output_dir = "data/raw"
-    os.makedirs(output_dir, exist_ok=True)
 
-    # Nome seguro para o arquivo
-    if hasattr(uploaded_file, "name"):
-        filename = uploaded_file.name
-    else:
-        filename = os.path.basename(uploaded_file)
-
-    output_path = os.path.join(output_dir, f"unlocked_{filename}")
+    Returns:
+        bytes | None: PDF sem senha, ou None se a senha estiver errada.
+    """
+    source = read_source(uploaded_file)
+    if not isinstance(source, str):
+        source = io.BytesIO(source)
 
     try:
-        # Tenta abrir o PDF
-        # O pikepdf é inteligente: aceita bytes (Streamlit) ou caminho de arquivo
-        pdf = pikepdf.open(uploaded_file, password=password)
-
-        # Salva a versão desbloqueada (sobrescreve se existir)
-        pdf.save(output_path)
-
-        # É importante fechar o arquivo original se foi aberto pelo pikepdf
-        pdf.close()
-
-        return output_path
+        with pikepdf.open(source, password=password or "") as pdf:
+            output = io.BytesIO()
+            pdf.save(output)
+            return output.getvalue()
 
     except pikepdf.PasswordError:
         # Se a senha estiver errada ou não for fornecida para um arquivo protegido
@@ -50,13 +49,25 @@ def unlock_pdf_file(uploaded_file, password=None):
         return None
 
 
+def remove_unlocked_copies(folder=LEGACY_UNLOCKED_FOLDER):
+    """
+    Apaga as cópias decifradas (unlocked_*) deixadas em disco por versões
+    anteriores do unlock_pdf_file. Retorna quantos arquivos foram removidos.
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(folder, "unlocked_*")):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.warning("Não foi possível remover %s: %s", path, e)
+    return removed
+
+
 def check_is_encrypted(uploaded_file):
-    """Verifica se o arquivo precisa de senha sem tentar desbloquear totalmente."""
-    try:
-        pdf = pikepdf.open(uploaded_file)
-        pdf.close()
-        return False  # Não tem senha
-    except pikepdf.PasswordError:
-        return True  # Tem senha
-    except Exception:
-        return False  # Erro de leitura, assume sem senha por enquanto
+    """
+    Verifica se o arquivo precisa de senha sem abrir o documento: só o
+    trailer é lido (services.pdf_probe). Arquivos corrompidos contam como
+    sem senha; use probe_pdf para distinguir os três casos.
+    """
+    return probe_pdf(uploaded_file) == PDF_ENCRYPTED
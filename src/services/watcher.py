@@ -0,0 +1,440 @@
+"""
+Ingestão contínua de faturas a partir de uma pasta monitorada (watchdog).
+
+O IngestionDaemon observa a pasta (e subpastas) e, para cada PDF novo:
+
+1. espera o arquivo "assentar" (debounce: sem eventos e com o mesmo tamanho
+   por `debounce` segundos), para não ler cópias pela metade;
+2. descarta o que já está no manifesto (mesmo conteúdo, por SHA-256);
+3. extrai em um pool de processos (mesmo caminho do bulk_import, com o
+   cache de extrações);
+4. descarta faturas repetidas no lote;
+5. grava em micro-lotes via save_data (a cada `batch_size` faturas ou
+   `batch_interval` segundos). Logo antes de gravar, o manifesto da base é
+   consultado de novo: faturas importadas nesse meio-tempo por outro
+   processo (app, importação em lote) saem do lote.
+
+Cada arquivo tratado entra no manifesto (JSONL, só acréscimo) como
+processed, duplicate ou failed; ao reiniciar, a pasta é varrida de novo e
+nada do manifesto é reprocessado (failed só com retry_failed=True).
+
+Uso via linha de comando (a partir da raiz do projeto):
+    python scripts/watch_folder.py /caminho/da/pasta --workers 4
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+import pandas as pd
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from services.bulk_import import _extract_file, collect_pdf_paths
+from services.cache import CACHE_FOLDER, hash_pdf_file, invoice_sources
+from services.extractor import invoice_keys, select_invoices
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".sherlock-manifest.jsonl"
+
+STATUS_PROCESSED = "processed"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+
+
+class IngestionManifest:
+    """
+    Registro dos arquivos já tratados, indexado pelo hash do conteúdo.
+
+    Cada decisão é uma linha acrescentada ao JSONL (a última vale), então
+    uma queda no meio da gravação perde no máximo a linha corrente.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # linha truncada por uma queda
+                self._entries[entry["content_hash"]] = entry
+
+    def get(self, content_hash):
+        return self._entries.get(content_hash)
+
+    def should_process(self, content_hash, retry_failed=False):
+        entry = self._entries.get(content_hash)
+        if entry is None:
+            return True
+        return retry_failed and entry["status"] == STATUS_FAILED
+
+    def record(self, content_hash, path, status, **fields):
+        entry = {
+            "content_hash": content_hash,
+            "path": path,
+            "status": status,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **fields,
+        }
+        self._entries[content_hash] = entry
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def entries(self, status=None):
+        return [e for e in self._entries.values() if status is None or e["status"] == status]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _PdfEventHandler(FileSystemEventHandler):
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def _schedule(self, path):
+        if path.lower().endswith(".pdf"):
+            self.daemon.schedule(path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._schedule(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._schedule(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._schedule(event.dest_path)
+
+
+class IngestionDaemon:
+    """
+    Daemon de ingestão de uma pasta de faturas.
+
+    Args:
+        folder (str): Pasta monitorada (recursiva).
+        password (str, opcional): Senha dos PDFs protegidos.
+        max_workers (int, opcional): Processos de extração. 1 extrai no
+            processo atual, de forma síncrona em poll().
+        debounce (float): Segundos sem eventos (e tamanho estável) antes de
+            um arquivo ser lido.
+        batch_size (int): Faturas por gravação no banco.
+        batch_interval (float): Tempo máximo (s) que um lote incompleto
+            espera antes de ser gravado.
+        manifest_path (str, opcional): Manifesto JSONL; padrão
+            <folder>/.sherlock-manifest.jsonl.
+        retry_failed (bool): Reprocessa arquivos marcados como failed.
+        save (callable, opcional): Função de gravação (df_fin, df_med,
+            sources) -> bool; padrão database.save_data.
+        known_keys (set, opcional): Chaves (mes_referencia, numero_cliente)
+            já sabidamente gravadas (descartadas sem consultar a base).
+        imported (callable, opcional): Chaves -> subconjunto já gravado,
+            consultado antes de cada gravação; padrão database.imported_keys.
+        use_cache, cache_folder, backend: como em bulk_import.
+    """
+
+    def __init__(self, folder, password=None, max_workers=None, debounce=2.0,
+                 batch_size=20, batch_interval=5.0, manifest_path=None,
+                 retry_failed=False, save=None, known_keys=None, imported=None,
+                 use_cache=True, cache_folder=CACHE_FOLDER, backend=None,
+                 clock=time.monotonic):
+        if save is None or imported is None:
+            # Import tardio: evita carregar streamlit nos processos do pool
+            from database import imported_keys, save_data
+
+            save = save or save_data
+            imported = imported or imported_keys
+
+        self.folder = folder
+        self.password = password
+        self.max_workers = max_workers
+        self.debounce = debounce
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retry_failed = retry_failed
+        self.cache_folder = cache_folder if use_cache else None
+        self.backend = backend
+        self.manifest = IngestionManifest(
+            manifest_path or os.path.join(folder, MANIFEST_NAME)
+        )
+
+        self._save = save
+        self._imported = imported
+        self._known_keys = set(known_keys or ())
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}  # caminho -> (último evento, tamanho)
+        self._in_flight = {}  # future -> hash do conteúdo
+        self._in_flight_hashes = set()
+        self._batch = []  # (caminho, hash, df_fin, df_med, chave)
+        self._batch_keys = set()
+        self._batch_started = None
+        self._executor = None
+        self._observer = None
+        self._stop_event = threading.Event()
+
+    # --- Descoberta -------------------------------------------------------
+
+    def schedule(self, path):
+        """Marca o arquivo como alterado agora (reinicia o debounce)."""
+        with self._lock:
+            self._pending[path] = (self._clock(), _file_size(path))
+
+    def scan(self):
+        """Agenda todos os PDFs já presentes na pasta (início/reinício)."""
+        for path in collect_pdf_paths(self.folder):
+            self.schedule(path)
+
+    def _take_ready(self, force=False):
+        now = self._clock()
+        ready = []
+        with self._lock:
+            for path, (seen_at, size) in list(self._pending.items()):
+                if not force and now - seen_at < self.debounce:
+                    continue
+                current_size = _file_size(path)
+                if current_size is None:
+                    del self._pending[path]  # removido antes de ser lido
+                elif current_size != size and not force:
+                    self._pending[path] = (now, current_size)  # ainda sendo copiado
+                else:
+                    del self._pending[path]
+                    ready.append(path)
+        return sorted(ready)
+
+    # --- Processamento ----------------------------------------------------
+
+    def poll(self, force=False):
+        """
+        Uma rodada do daemon: envia os arquivos prontos para extração,
+        recolhe os resultados e grava o lote se estiver cheio ou vencido.
+        force=True ignora o debounce, espera as extrações e grava o lote.
+        """
+        for path in self._take_ready(force):
+            self._submit(path)
+
+        self._collect(wait=force)
+
+        if self._batch and (
+            force
+            or len(self._batch_keys) >= self.batch_size
+            or self._clock() - self._batch_started >= self.batch_interval
+        ):
+            self.commit()
+
+    def _submit(self, path):
+        try:
+            content_hash = hash_pdf_file(path)
+        except OSError as e:
+            logger.warning("Não foi possível ler %s: %s", path, e)
+            return
+
+        if content_hash in self._in_flight_hashes or not self.manifest.should_process(
+            content_hash, self.retry_failed
+        ):
+            logger.debug("Ignorado (já tratado): %s", path)
+            return
+
+        args = (path, self.password, self.cache_folder, self.backend)
+        self._in_flight_hashes.add(content_hash)
+
+        if self.max_workers == 1:
+            self._handle_result(content_hash, _extract_file(*args))
+            return
+
+        if self._executor is None:
+            # "spawn" evita fork() de um processo com threads (observer/pyarrow)
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context
+            )
+        future = self._executor.submit(_extract_file, *args)
+        self._in_flight[future] = content_hash
+
+    def _collect(self, wait=False):
+        for future in list(self._in_flight):
+            if not wait and not future.done():
+                continue
+            content_hash = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                self._in_flight_hashes.discard(content_hash)
+                logger.error("Falha no processo de extração: %s", e)
+                if isinstance(e, BrokenProcessPool) and self._executor is not None:
+                    # Um processo morreu (ex.: falta de memória): recria o pool
+                    # na próxima submissão; o arquivo volta na próxima varredura
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                continue
+            self._handle_result(content_hash, result)
+
+    def _handle_result(self, content_hash, result):
+        path, df_fin, df_med, error, seconds = result
+        self._in_flight_hashes.discard(content_hash)
+
+        if error:
+            logger.warning("Falha ao importar %s: %s", path, error)
+            self.manifest.record(content_hash, path, STATUS_FAILED, error=error)
+            return
+
+        # Extratos consolidados: cada UC é checada; só as novas entram no lote
+        keys = invoice_keys(df_fin)
+        new_keys = [k for k in keys if k not in self._known_keys and k not in self._batch_keys]
+        fields = {"mes_referencia": keys[0][0], "numero_cliente": keys[0][1]}
+        if len(keys) > 1:
+            fields["invoices"] = len(new_keys)
+
+        if not new_keys:
+            logger.info("Fatura já importada, ignorada: %s", path)
+            self.manifest.record(content_hash, path, STATUS_DUPLICATE, **fields)
+            return
+
+        if len(new_keys) < len(keys):
+            df_fin = select_invoices(df_fin, new_keys)
+            df_med = select_invoices(df_med, new_keys)
+
+        if not self._batch:
+            self._batch_started = self._clock()
+        self._batch.append((path, content_hash, df_fin, df_med, fields))
+        self._batch_keys.update(new_keys)
+        logger.info("Extraído: %s (%.2fs)", path, seconds)
+
+    def commit(self):
+        """Grava o micro-lote pendente em uma única chamada de save_data."""
+        if self._batch:
+            self._drop_imported(self._imported(self._batch_keys))
+        if not self._batch:
+            self._reset_batch()
+            return True
+
+        frames_fin = [df_fin for _, _, df_fin, _, _ in self._batch]
+        frames_med = [df_med for _, _, _, df_med, _ in self._batch if not df_med.empty]
+        df_fin_all = pd.concat(frames_fin, ignore_index=True)
+        df_med_all = pd.concat(frames_med, ignore_index=True) if frames_med else pd.DataFrame()
+
+        sources = {}
+        for _, content_hash, df_fin, _, _ in self._batch:
+            sources.update(invoice_sources(df_fin, content_hash))
+
+        ok = self._save(df_fin_all, df_med_all, sources)
+
+        for path, content_hash, _, _, fields in self._batch:
+            if ok:
+                self.manifest.record(content_hash, path, STATUS_PROCESSED, **fields)
+            else:
+                self.manifest.record(
+                    content_hash, path, STATUS_FAILED, error="Falha ao gravar no banco", **fields
+                )
+
+        if ok:
+            self._known_keys |= self._batch_keys
+            logger.info("Lote gravado: %d faturas", len(self._batch_keys))
+        else:
+            logger.error("Falha ao gravar lote com %d faturas", len(self._batch_keys))
+
+        self._reset_batch()
+        return ok
+
+    def _drop_imported(self, stored):
+        """Tira do lote as faturas que outro processo gravou desde a extração."""
+        if not stored:
+            return
+
+        batch = []
+        for path, content_hash, df_fin, df_med, fields in self._batch:
+            keys = invoice_keys(df_fin)
+            new_keys = [k for k in keys if k not in stored]
+            if "invoices" in fields:
+                fields = {**fields, "invoices": len(new_keys)}
+            if not new_keys:
+                logger.info("Fatura importada por outro processo, ignorada: %s", path)
+                self.manifest.record(content_hash, path, STATUS_DUPLICATE, **fields)
+                continue
+            if len(new_keys) < len(keys):
+                df_fin = select_invoices(df_fin, new_keys)
+                df_med = select_invoices(df_med, new_keys)
+            batch.append((path, content_hash, df_fin, df_med, fields))
+
+        self._batch[:] = batch
+        self._batch_keys -= stored
+        self._known_keys |= stored
+
+    def _reset_batch(self):
+        self._batch.clear()
+        self._batch_keys.clear()
+        self._batch_started = None
+
+    # --- Ciclo de vida ----------------------------------------------------
+
+    def start(self):
+        """Inicia o observador e agenda os PDFs já existentes na pasta."""
+        self._stop_event.clear()
+        self._observer = Observer()
+        self._observer.schedule(_PdfEventHandler(self), self.folder, recursive=True)
+        self._observer.start()
+        self.scan()
+        logger.info("Monitorando %s", self.folder)
+
+    def run_forever(self, poll_interval=0.5):
+        """Executa até stop() (ou Ctrl+C), gravando o que estiver pendente ao sair."""
+        self.start()
+        try:
+            while not self._stop_event.wait(poll_interval):
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """Pede a parada de run_forever (pode ser chamado de outra thread)."""
+        self._stop_event.set()
+
+    def shutdown(self):
+        """Para o observador, conclui o que estiver em andamento e grava."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+        self.poll(force=True)
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        # Lotes gravados podem ter disparado a compactação em segundo plano
+        from database import wait_for_compaction
+
+        wait_for_compaction()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
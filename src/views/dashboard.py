@@ -78,7 +78,7 @@ def render_dashboard_tab(df_faturas, df_medicao):
     delta_gasto_str = None
     delta_kwh_str = None
 
-    df_mensal = df_fin_view.groupby("mes_referencia")["valor_total"].sum().reset_index()
+    df_mensal = df_fin_view.groupby("mes_referencia", observed=True)["valor_total"].sum().reset_index()
     # Tenta ordenar cronologicamente
     try:
         df_mensal["_ordem"] = pd.to_datetime(df_mensal["mes_referencia"], format="%m/%Y")
@@ -98,7 +98,7 @@ def render_dashboard_tab(df_faturas, df_medicao):
         df_consumo_filt = df_med_view.copy()
         if "segmento" in df_consumo_filt.columns:
             df_consumo_filt = df_consumo_filt[~df_consumo_filt["segmento"].str.contains("INJ", case=False, na=False)]
-        df_kwh_mensal = df_consumo_filt.groupby("mes_referencia")["consumo_kwh"].sum().reset_index()
+        df_kwh_mensal = df_consumo_filt.groupby("mes_referencia", observed=True)["consumo_kwh"].sum().reset_index()
         try:
             df_kwh_mensal["_ordem"] = pd.to_datetime(df_kwh_mensal["mes_referencia"], format="%m/%Y")
             df_kwh_mensal = df_kwh_mensal.sort_values("_ordem")
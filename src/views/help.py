@@ -1,8 +1,6 @@
-import os
-
 import streamlit as st
 
-from database.manager import FILE_FATURAS, FILE_MEDICAO
+from database import clear_data
 
 
 def render_help_tab():
@@ -23,7 +21,6 @@ def render_help_tab():
         with st.container(border=True):
             st.subheader("🛠️ Manutenção")
             if st.button("🗑️ Resetar Banco de Dados", type="primary", use_container_width=True):
-                if os.path.exists(FILE_FATURAS): os.remove(FILE_FATURAS)
-                if os.path.exists(FILE_MEDICAO): os.remove(FILE_MEDICAO)
+                clear_data()
                 st.toast("Banco limpo!", icon="🧹")
                 st.rerun()
@@ -1,11 +1,16 @@
 """Shared pytest fixtures."""
 
 import os
+import sys
 import tempfile
 
 import pandas as pd
 import pytest
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from synthetic_invoices import build_text_pdf, invoice_lines
+
 
 @pytest.fixture
 def tmp_dir():
@@ -43,3 +48,30 @@ def sample_medicao_df():
             "numero_dias": [30, 31],
         }
     )
+
+
+@pytest.fixture
+def invoice_pdf(tmp_dir):
+    """Factory for synthetic invoices: invoice_pdf(year=2025, password=None)."""
+
+    def _make(year=2025, password=None, name=None, dense=False):
+        path = os.path.join(tmp_dir, name or f"fatura_{year}.pdf")
+        return build_text_pdf(path, invoice_lines(year, dense), password=password)
+
+    return _make
+
+
+@pytest.fixture
+def tmp_store(tmp_dir, monkeypatch):
+    """Points database.manager at an empty store inside tmp_dir."""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+    from database import manager
+
+    db_folder = os.path.join(tmp_dir, "database")
+    monkeypatch.setattr(manager, "DB_FOLDER", db_folder)
+    monkeypatch.setattr(manager, "DIR_FATURAS", os.path.join(db_folder, "faturas"))
+    monkeypatch.setattr(manager, "DIR_MEDICAO", os.path.join(db_folder, "medicao"))
+    monkeypatch.setattr(manager, "DIR_MANIFEST", os.path.join(db_folder, "manifest"))
+    monkeypatch.setattr(manager, "FILE_FATURAS", os.path.join(db_folder, "faturas.parquet"))
+    monkeypatch.setattr(manager, "FILE_MEDICAO", os.path.join(db_folder, "medicao.parquet"))
+    return manager
@@ -0,0 +1,141 @@
+"""Tests for the parallel bulk importer."""
+
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import generate_statement
+
+from services.bulk_import import bulk_import, collect_pdf_paths
+
+
+class TestCollectPdfPaths:
+    def test_directory_is_recursive(self, tmp_dir):
+        os.makedirs(os.path.join(tmp_dir, "2025"))
+        for name in ["a.pdf", "2025/b.PDF", "notes.txt"]:
+            open(os.path.join(tmp_dir, name), "w").close()
+
+        paths = collect_pdf_paths(tmp_dir)
+
+        assert [os.path.relpath(p, tmp_dir) for p in paths] == ["2025/b.PDF", "a.pdf"]
+
+    def test_glob_and_list_are_deduplicated(self, tmp_dir):
+        path = os.path.join(tmp_dir, "a.pdf")
+        open(path, "w").close()
+
+        paths = collect_pdf_paths([os.path.join(tmp_dir, "*.pdf"), path])
+
+        assert paths == [path]
+
+
+class TestBulkImport:
+    def test_imports_directory_in_single_write(self, invoice_pdf, tmp_dir, tmp_store, monkeypatch):
+        calls = []
+        original = tmp_store.save_data
+        monkeypatch.setattr(
+            "database.save_data", lambda *a: calls.append(a) or original(*a)
+        )
+        first = invoice_pdf(2025)
+        invoice_pdf(2026)
+
+        report = bulk_import(
+            os.path.dirname(first), max_workers=2, cache_folder=os.path.join(tmp_dir, "cache")
+        )
+
+        assert report.saved is True
+        assert len(report.succeeded) == 2
+        assert len(calls) == 1
+        assert report.pdfs_per_second > 0
+        df_fat = tmp_store.load_all_data()[0]
+        assert set(df_fat["mes_referencia"]) == {"01/2025", "01/2026"}
+
+    def test_reports_failures_per_file(self, invoice_pdf, tmp_dir, tmp_store):
+        good = invoice_pdf(2025)
+        broken = os.path.join(tmp_dir, "broken.pdf")
+        with open(broken, "wb") as f:
+            f.write(b"not a pdf")
+
+        report = bulk_import([good, broken], max_workers=1, use_cache=False)
+
+        assert [r.ok for r in report.results] == [True, False]
+        assert report.failed[0].path == broken
+        assert report.failed[0].error
+
+    def test_duplicate_invoice_in_batch_is_skipped(self, invoice_pdf, tmp_dir, tmp_store):
+        original = invoice_pdf(2025)
+        copy = os.path.join(tmp_dir, "copia.pdf")
+        shutil.copy(original, copy)
+
+        report = bulk_import([original, copy], max_workers=1, use_cache=False)
+
+        assert len(report.succeeded) == 1
+        assert "duplicada" in report.failed[0].error
+        assert len(tmp_store.load_all_data()[0]) == 3
+
+    def test_statement_keeps_ucs_not_seen_in_batch(self, tmp_dir, tmp_store):
+        partial = os.path.join(tmp_dir, "parcial.pdf")
+        full = os.path.join(tmp_dir, "extrato.pdf")
+        # Mesma semente: o parcial traz as duas primeiras UCs do extrato
+        generate_statement(partial, invoices=2, seed=2)
+        expected = generate_statement(full, invoices=4, seed=2)
+
+        report = bulk_import([partial, full], max_workers=1, use_cache=False)
+
+        assert [r.invoices for r in report.results] == [2, 2]
+        assert report.summary().endswith("4 faturas")
+        df_fat = tmp_store.load_all_data()[0]
+        assert set(df_fat["numero_cliente"]) == {invoice["client_id"] for invoice in expected}
+
+    def test_dry_run_does_not_save(self, invoice_pdf, tmp_store):
+        report = bulk_import(invoice_pdf(2025), max_workers=1, save=False, use_cache=False)
+
+        assert report.saved is False
+        assert not os.path.exists(tmp_store.DIR_FATURAS)
+
+    def test_second_import_is_served_from_cache(self, invoice_pdf, tmp_dir, tmp_store, monkeypatch):
+        path = invoice_pdf(2025)
+        bulk_import(path, max_workers=1, cache_folder=os.path.join(tmp_dir, "cache"))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("PDF should not be reopened")
+
+        monkeypatch.setattr("services.cache.extract_data_from_pdf", fail)
+        report = bulk_import(path, max_workers=1, cache_folder=os.path.join(tmp_dir, "cache"))
+
+        assert len(report.succeeded) == 1
+
+    def test_triage_skips_unreadable_files(self, invoice_pdf, tmp_dir, tmp_store, monkeypatch):
+        protected = invoice_pdf(2026, password="12345")
+        truncated = os.path.join(tmp_dir, "truncado.pdf")
+        with open(invoice_pdf(2025), "rb") as f:
+            data = f.read()
+        with open(truncated, "wb") as f:
+            f.write(data[: len(data) // 2])
+
+        def fail(*args, **kwargs):
+            raise AssertionError("PDF should not be opened")
+
+        monkeypatch.setattr("services.bulk_import.extract_data_from_pdf", fail)
+        report = bulk_import([protected, truncated], max_workers=1, use_cache=False)
+
+        assert [r.error for r in report.results] == [
+            "PDF protegido por senha (informe a senha)",
+            "PDF corrompido ou incompleto",
+        ]
+
+    def test_recoverable_pdfs_are_imported(self, invoice_pdf, tmp_dir, tmp_store):
+        # Lixo antes do %PDF- e bytes depois do %%EOF: leitores de PDF aceitam
+        damages = [lambda data: b"\r\n" + data, lambda data: data + b"\0" * 3000]
+        paths = []
+        for year, damage in zip((2025, 2026), damages):
+            with open(invoice_pdf(year), "rb") as f:
+                data = f.read()
+            paths.append(os.path.join(tmp_dir, f"danificado_{year}.pdf"))
+            with open(paths[-1], "wb") as f:
+                f.write(damage(data))
+
+        report = bulk_import(paths, max_workers=1, use_cache=False)
+
+        assert [(r.ok, r.rows_financeiro) for r in report.results] == [(True, 3), (True, 3)]
@@ -0,0 +1,98 @@
+"""Tests for the content-addressed extraction cache."""
+
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+
+from services.cache import ExtractionCache, extract_data_cached, hash_pdf_file
+
+
+def _frames(n=1):
+    df_fin = pd.DataFrame({"mes_referencia": ["01/2025"] * n, "valor_total": [1.0] * n})
+    df_med = pd.DataFrame({"mes_referencia": ["01/2025"], "consumo_kwh": [477.0]})
+    return df_fin, df_med
+
+
+class TestExtractionCache:
+    def test_roundtrip(self, tmp_dir):
+        cache = ExtractionCache(tmp_dir)
+        df_fin, df_med = _frames()
+
+        cache.put("abc", df_fin, df_med)
+        cached_fin, cached_med = cache.get("abc")
+
+        pd.testing.assert_frame_equal(cached_fin, df_fin)
+        pd.testing.assert_frame_equal(cached_med, df_med)
+
+    def test_miss_returns_none(self, tmp_dir):
+        assert ExtractionCache(tmp_dir).get("missing") is None
+
+    def test_lru_eviction_keeps_recently_used(self, tmp_dir):
+        cache = ExtractionCache(tmp_dir, max_bytes=10**9)
+        for key in ["a", "b", "c"]:
+            cache.put(key, *_frames())
+        for i, key in enumerate(["a", "b", "c"]):
+            os.utime(os.path.join(cache.version_folder, key), (1000 + i, 1000 + i))
+
+        cache.get("a")  # "b" passa a ser a entrada menos usada
+        cache.max_bytes = cache.size_bytes() - 1
+        cache.evict()
+
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+
+    def test_new_parser_version_drops_old_entries(self, tmp_dir):
+        ExtractionCache(tmp_dir, parser_version="v1").put("abc", *_frames())
+
+        cache = ExtractionCache(tmp_dir, parser_version="v2")
+
+        assert cache.get("abc") is None
+        assert os.listdir(tmp_dir) == ["v2"]
+
+    def test_invalidate(self, tmp_dir):
+        cache = ExtractionCache(tmp_dir)
+        cache.put("abc", *_frames())
+
+        cache.invalidate()
+
+        assert len(cache) == 0
+
+
+class TestExtractDataCached:
+    def test_same_content_under_another_name_hits_cache(self, invoice_pdf, tmp_dir, monkeypatch):
+        cache = ExtractionCache(os.path.join(tmp_dir, "cache"))
+        original = invoice_pdf(2025)
+        renamed = os.path.join(tmp_dir, "outro_nome.pdf")
+        shutil.copy(original, renamed)
+
+        df_fin, _ = extract_data_cached(original, cache=cache)
+        monkeypatch.setattr("services.cache.extract_data_from_pdf", None)
+        cached_fin, _ = extract_data_cached(renamed, cache=cache)
+
+        assert hash_pdf_file(renamed) in cache
+        pd.testing.assert_frame_equal(cached_fin, df_fin)
+
+    def test_failed_extraction_is_not_cached(self, invoice_pdf, tmp_dir):
+        cache = ExtractionCache(os.path.join(tmp_dir, "cache"))
+        path = invoice_pdf(2025, password="12345")
+
+        df_fin, _ = extract_data_cached(path, password="errada", cache=cache)
+
+        assert df_fin.empty
+        assert len(cache) == 0
+
+    def test_bytes_share_entries_with_files(self, invoice_pdf, tmp_dir, monkeypatch):
+        cache = ExtractionCache(os.path.join(tmp_dir, "cache"))
+        path = invoice_pdf(2025)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        df_fin, _ = extract_data_cached(data, cache=cache)
+        monkeypatch.setattr("services.cache.extract_data_from_pdf", None)
+        cached_fin, _ = extract_data_cached(path, cache=cache)
+
+        pd.testing.assert_frame_equal(cached_fin, df_fin)
@@ -0,0 +1,84 @@
+"""Tests for the versioned store cache shared by the Streamlit pages."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+import pytest
+
+from services import data_service
+
+
+@pytest.fixture
+def reads(tmp_store, monkeypatch):
+    """Conta as leituras da base feitas pelo cache."""
+    calls = []
+    monkeypatch.setattr(
+        data_service, "read_tables", lambda: calls.append(1) or tmp_store.read_tables()
+    )
+    data_service._load_snapshot.clear()
+    yield calls
+    data_service._load_snapshot.clear()
+
+
+def _invoice(reference):
+    return pd.DataFrame(
+        {"mes_referencia": [reference], "numero_cliente": ["0011"], "valor_total": [100.0]}
+    )
+
+
+class TestGetStoreData:
+    def test_reruns_share_one_copy(self, tmp_store, reads, sample_faturas_df, sample_medicao_df):
+        tmp_store.save_data(sample_faturas_df, sample_medicao_df)
+
+        first = data_service.get_store_data()
+        second = data_service.get_store_data()
+
+        assert len(reads) == 1
+        assert first[0] is second[0] and first[1] is second[1]
+        assert len(first[0]) == len(sample_faturas_df)
+
+    def test_save_invalidates(self, tmp_store, reads, sample_faturas_df):
+        tmp_store.save_data(sample_faturas_df.iloc[:1], pd.DataFrame())
+        assert len(data_service.get_store_data()[0]) == 1
+
+        tmp_store.save_data(sample_faturas_df.iloc[1:2], pd.DataFrame())
+
+        assert len(data_service.get_store_data()[0]) == 2
+        assert len(reads) == 2
+
+    def test_compaction_invalidates(self, tmp_store, reads, monkeypatch):
+        monkeypatch.setattr(tmp_store, "DELTA_COMPACTION_THRESHOLD", 3)
+        for month in (1, 2, 3):
+            tmp_store.save_data(_invoice(f"{month:02d}/2025"), pd.DataFrame())
+        tmp_store.wait_for_compaction(timeout=30)
+        assert len(data_service.get_store_data()[0]) == 3
+
+        # Cada lote de 3 gravações termina com a pasta de deltas vazia de novo
+        for month in (4, 5, 6):
+            tmp_store.save_data(_invoice(f"{month:02d}/2025"), pd.DataFrame())
+            tmp_store.wait_for_compaction(timeout=30)
+
+        assert tmp_store._delta_files(tmp_store.DIR_FATURAS) == []
+        assert len(data_service.get_store_data()[0]) == 6
+
+    def test_clear_invalidates(self, tmp_store, reads, sample_faturas_df):
+        tmp_store.save_data(sample_faturas_df, pd.DataFrame())
+        assert not data_service.get_store_data()[0].empty
+
+        tmp_store.clear_data()
+
+        assert data_service.get_store_data()[0].empty
+
+    def test_read_errors_are_not_cached(self, tmp_store, reads, monkeypatch):
+        def fail():
+            raise OSError("disco indisponível")
+
+        monkeypatch.setattr(data_service, "read_tables", fail)
+        df_fat, df_med = data_service.get_store_data()
+        assert df_fat.empty and df_med.empty
+
+        monkeypatch.setattr(data_service, "read_tables", lambda: reads.append(1) or (1, 2))
+        assert data_service.get_store_data() == (1, 2)
@@ -1,13 +1,22 @@
 """Tests for database manager (upsert logic)."""
 
+import multiprocessing as mp
 import os
+import shutil
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
 
-from database.manager import _upsert_dataframe, invoice_already_imported
+from database.manager import _upsert_dataframe, invoice_already_imported, load_invoice_keys
+from database.schema import TEXT
 
 
 class TestUpsertDataframe:
@@ -129,3 +138,400 @@ class TestInvoiceAlreadyImported:
         })
 
         assert invoice_already_imported(df_existing, df_new) is False
+
+
+class TestLoadInvoiceKeys:
+    def test_empty_store(self, tmp_store):
+        assert load_invoice_keys() == set()
+
+    def test_reads_distinct_keys(self, tmp_store, sample_faturas_df):
+        tmp_store.save_data(sample_faturas_df, pd.DataFrame())
+
+        assert load_invoice_keys() == {("01/2025", "12345678"), ("02/2025", "12345678")}
+
+
+def _invoice(reference, client, value=100.0):
+    return pd.DataFrame({
+        "mes_referencia": [reference],
+        "numero_cliente": [client],
+        "valor_total": [value],
+    })
+
+
+class TestPartitionedStore:
+    def test_save_writes_one_partition_per_client_and_year(self, tmp_store):
+        df = pd.concat([_invoice("12/2024", "0011"), _invoice("01/2025", "0011"),
+                        _invoice("01/2025", "0022")], ignore_index=True)
+
+        tmp_store.save_data(df, pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+
+        files = tmp_store._partition_files(tmp_store.DIR_FATURAS)
+        assert [os.path.relpath(f, tmp_store.DIR_FATURAS) for f in files] == [
+            os.path.join("numero_cliente=0011", "ano=2024", "part.parquet"),
+            os.path.join("numero_cliente=0011", "ano=2025", "part.parquet"),
+            os.path.join("numero_cliente=0022", "ano=2025", "part.parquet"),
+        ]
+        assert sorted(tmp_store.load_all_data()[0]["numero_cliente"]) == ["0011", "0011", "0022"]
+
+    def test_compaction_rewrites_only_affected_partition(self, tmp_store, monkeypatch):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.save_data(_invoice("01/2025", "0022"), pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+        written = []
+        original = tmp_store._write_parquet
+        monkeypatch.setattr(tmp_store, "_write_parquet",
+                            lambda df, path, *args: written.append(path) or original(df, path, *args))
+
+        tmp_store.save_data(_invoice("01/2025", "0022", 250.0), pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+
+        written = [path for path in written if path.startswith(tmp_store.DIR_FATURAS)]
+        assert written[0].startswith(os.path.join(tmp_store.DIR_FATURAS, "_delta"))
+        written = written[1:]
+
+        assert written == [tmp_store._partition_path(tmp_store.DIR_FATURAS, "0022", "2025")]
+        df_fat = tmp_store.load_all_data()[0].set_index("numero_cliente")
+        assert df_fat["valor_total"].to_dict() == {"0011": 100.0, "0022": 250.0}
+
+    def test_filtered_reads_skip_other_partitions(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.save_data(_invoice("01/2024", "0022"), pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+        # Partição ilegível: só é aberta se a poda falhar
+        other = tmp_store._partition_path(tmp_store.DIR_FATURAS, "0033", "2025")
+        os.makedirs(os.path.dirname(other))
+        with open(other, "w") as f:
+            f.write("not parquet")
+
+        df_fat, _ = tmp_store.load_all_data(clients=["0011"])
+
+        assert list(df_fat["numero_cliente"]) == ["0011"]
+
+    def test_sql_views_expose_partition_columns(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.save_data(_invoice("01/2024", "0022"), pd.DataFrame())
+
+        result = tmp_store.query_energy_data(
+            "SELECT numero_cliente, ano FROM faturas WHERE ano = 2024"
+        )
+
+        assert "0022" in result and "0011" not in result
+
+    def test_migrates_legacy_single_files(self, tmp_store, sample_faturas_df, sample_medicao_df):
+        os.makedirs(tmp_store.DB_FOLDER)
+        sample_faturas_df.to_parquet(tmp_store.FILE_FATURAS, index=False)
+        sample_medicao_df.to_parquet(tmp_store.FILE_MEDICAO, index=False)
+
+        df_fat, df_med = tmp_store.load_all_data()
+
+        assert len(df_fat) == len(sample_faturas_df)
+        assert len(df_med) == len(sample_medicao_df)
+        assert not os.path.exists(tmp_store.FILE_FATURAS)
+        assert os.path.exists(tmp_store.FILE_FATURAS + ".migrated")
+        assert tmp_store.migrate_legacy_store() == 0
+
+
+class TestTypedStore:
+    def test_partitions_use_store_schema(self, tmp_store, sample_faturas_df, sample_medicao_df):
+        tmp_store.save_data(sample_faturas_df, sample_medicao_df)
+        tmp_store.compact_store(threshold=0)
+
+        path = tmp_store._partition_files(tmp_store.DIR_MEDICAO)[0]
+        schema = pq.read_schema(path)
+        assert schema.field("segmento").type == TEXT
+        assert schema.field("numero_dias").type == pa.int16()
+        assert schema.field("data_referencia").type == pa.date32()
+
+        df_fat, df_med = tmp_store.load_all_data()
+        assert isinstance(df_fat["descricao"].dtype, pd.CategoricalDtype)
+        assert df_med["consumo_kwh"].dtype == "float32"
+        assert df_fat.groupby("mes_referencia", observed=True)["valor_total"].sum().round(2).to_dict() == {
+            "01/2025": 285.36, "02/2025": 280.5,
+        }
+
+    def test_agent_sees_date_columns(self, tmp_store, sample_faturas_df):
+        tmp_store.save_data(sample_faturas_df, pd.DataFrame())
+
+        result = tmp_store.query_energy_data(
+            "SELECT max(data_referencia) AS ultimo FROM faturas"
+        )
+
+        assert "2025-02-01" in result
+
+    def test_upgrades_untyped_partitions_once(self, tmp_store, sample_faturas_df):
+        path = tmp_store._partition_path(tmp_store.DIR_FATURAS, "12345678", "2025")
+        os.makedirs(os.path.dirname(path))
+        sample_faturas_df.to_parquet(path, index=False)
+
+        assert tmp_store.upgrade_store_schema() == 1
+        assert pq.read_schema(path).field("descricao").type == TEXT
+        assert tmp_store.upgrade_store_schema() == 0
+        assert len(tmp_store.load_all_data()[0]) == len(sample_faturas_df)
+
+
+class TestDeltaLog:
+    def test_save_appends_delta_without_touching_base(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+        base = tmp_store._partition_path(tmp_store.DIR_FATURAS, "0011", "2025")
+        mtime = os.stat(base).st_mtime_ns
+
+        tmp_store.save_data(_invoice("01/2025", "0011", 300.0), pd.DataFrame())
+
+        assert os.stat(base).st_mtime_ns == mtime
+        assert len(tmp_store._delta_files(tmp_store.DIR_FATURAS)) == 1
+        assert list(tmp_store.load_all_data()[0]["valor_total"]) == [300.0]
+        assert tmp_store.load_invoice_keys() == {("01/2025", "0011")}
+
+    def test_newest_delta_wins(self, tmp_store, sample_medicao_df):
+        for value in (100.0, 200.0, 300.0):
+            tmp_store.save_data(_invoice("01/2025", "0011", value), sample_medicao_df)
+        tmp_store.save_data(_invoice("02/2025", "0011"), pd.DataFrame())
+
+        df_fat, df_med = tmp_store.load_all_data()
+        result = tmp_store.query_energy_data(
+            "SELECT SUM(valor_total) AS total FROM faturas WHERE numero_cliente = '0011'"
+        )
+
+        assert sorted(df_fat["valor_total"]) == [100.0, 300.0]
+        assert len(df_med) == len(sample_medicao_df)
+        assert df_med["numero_dias"].dtype == "Int16"
+        assert "400" in result
+
+    def test_view_hides_superseded_row_without_client(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "", 9.0), pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+        tmp_store.save_data(_invoice("01/2025", "", 10.0), pd.DataFrame())
+
+        result = tmp_store.query_energy_data("SELECT valor_total FROM faturas")
+
+        # Base na pasta numero_cliente=_, tombstone com cliente vazio
+        assert list(tmp_store.load_all_data()[0]["valor_total"]) == [10.0]
+        assert "10" in result and "9" not in result
+
+    def test_filters_apply_to_deltas(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.save_data(_invoice("01/2024", "0022"), pd.DataFrame())
+
+        assert list(tmp_store.load_all_data(years=[2024])[0]["numero_cliente"]) == ["0022"]
+
+    def test_compacts_past_threshold(self, tmp_store, monkeypatch):
+        monkeypatch.setattr(tmp_store, "DELTA_COMPACTION_THRESHOLD", 3)
+
+        for month in (1, 2):
+            tmp_store.save_data(_invoice(f"{month:02d}/2025", "0011"), pd.DataFrame())
+        assert len(tmp_store._delta_files(tmp_store.DIR_FATURAS)) == 2
+
+        tmp_store.save_data(_invoice("01/2025", "0011", 999.0), pd.DataFrame())
+        tmp_store.wait_for_compaction(timeout=30)
+
+        assert tmp_store._delta_files(tmp_store.DIR_FATURAS) == []
+        df_fat = tmp_store.load_all_data()[0].set_index("mes_referencia")
+        assert df_fat["valor_total"].to_dict() == {"01/2025": 999.0, "02/2025": 100.0}
+
+    def test_compaction_runs_in_background(self, tmp_store, monkeypatch):
+        monkeypatch.setattr(tmp_store, "DELTA_COMPACTION_THRESHOLD", 2)
+        started, release = threading.Event(), threading.Event()
+        original = tmp_store._compact_table
+
+        def slow_compaction(*args):
+            started.set()
+            release.wait(10)
+            return original(*args)
+
+        monkeypatch.setattr(tmp_store, "_compact_table", slow_compaction)
+        for month in (1, 2):
+            assert tmp_store.save_data(_invoice(f"{month:02d}/2025", "0011"), pd.DataFrame())
+        assert started.wait(10)
+
+        # Gravações seguem enquanto a compactação está parada
+        assert tmp_store.save_data(_invoice("03/2025", "0011"), pd.DataFrame())
+        assert len(tmp_store._delta_files(tmp_store.DIR_FATURAS)) == 3
+
+        release.set()
+        tmp_store.wait_for_compaction(timeout=30)
+        assert tmp_store._delta_files(tmp_store.DIR_FATURAS) == []
+        assert len(tmp_store.load_all_data()[0]) == 3
+
+    def test_interrupted_compaction_can_be_replayed(self, tmp_store, tmp_dir):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.save_data(_invoice("01/2025", "0011", 200.0), pd.DataFrame())
+        deltas = {p: open(p, "rb").read() for p in tmp_store._delta_files(tmp_store.DIR_FATURAS)}
+
+        tmp_store.compact_store(threshold=0)
+        # Simula queda antes de apagar os deltas
+        for path, data in deltas.items():
+            with open(path, "wb") as f:
+                f.write(data)
+
+        assert list(tmp_store.load_all_data()[0]["valor_total"]) == [200.0]
+        tmp_store.compact_store(threshold=0)
+        assert list(tmp_store.load_all_data()[0]["valor_total"]) == [200.0]
+
+
+class TestManifest:
+    def test_save_records_each_invoice(self, tmp_store, sample_faturas_df, sample_medicao_df):
+        sources = {("01/2025", "12345678"): ("abc123", "2026.1")}
+
+        tmp_store.save_data(sample_faturas_df, sample_medicao_df, sources)
+
+        manifest = tmp_store.load_manifest().set_index("mes_referencia")
+        assert manifest["rows_financeiro"].to_dict() == {"01/2025": 2, "02/2025": 1}
+        assert manifest["rows_medicao"].to_dict() == {"01/2025": 1, "02/2025": 1}
+        assert manifest.loc["01/2025", "content_hash"] == "abc123"
+        assert pd.isna(manifest.loc["02/2025", "content_hash"])
+        assert manifest["imported_at"].notna().all()
+
+    def test_find_by_key_or_hash(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame(),
+                            {("01/2025", "0011"): ("abc123", "2026.1")})
+
+        assert tmp_store.find_imported(key=("01/2025", "0011"))["content_hash"] == "abc123"
+        assert tmp_store.find_imported(content_hash="abc123")["numero_cliente"] == "0011"
+        assert tmp_store.find_imported(key=("01/2025", "0022")) is None
+        assert tmp_store.find_imported(content_hash="outro") is None
+
+    def test_resave_replaces_entry(self, tmp_store):
+        for content_hash in ("old", "new"):
+            tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame(),
+                                {("01/2025", "0011"): (content_hash, "2026.1")})
+        tmp_store.compact_store(threshold=0)
+
+        assert list(tmp_store.load_manifest()["content_hash"]) == ["new"]
+        assert tmp_store._delta_files(tmp_store.DIR_MANIFEST) == []
+
+    def test_partial_resave_keeps_other_table_count(self, tmp_store, sample_faturas_df,
+                                                    sample_medicao_df):
+        key = ("01/2025", "12345678")
+        tmp_store.save_data(sample_faturas_df, sample_medicao_df)
+
+        tmp_store.save_data(sample_faturas_df.head(1), pd.DataFrame())
+        entry = tmp_store.find_imported(key=key)
+        assert (entry["rows_financeiro"], entry["rows_medicao"]) == (1, 1)
+
+        tmp_store.save_data(pd.DataFrame(), pd.concat([sample_medicao_df.head(1)] * 2))
+        entry = tmp_store.find_imported(key=key)
+        assert (entry["rows_financeiro"], entry["rows_medicao"]) == (1, 2)
+        df_fat, df_med = tmp_store.load_all_data()
+        assert len(df_fat[df_fat["mes_referencia"] == "01/2025"]) == 1
+        assert len(df_med[df_med["mes_referencia"] == "01/2025"]) == 2
+
+    def test_rebuilt_for_store_without_manifest(self, tmp_store, sample_faturas_df):
+        tmp_store.save_data(sample_faturas_df, pd.DataFrame())
+        shutil.rmtree(tmp_store.DIR_MANIFEST)
+
+        assert load_invoice_keys() == {("01/2025", "12345678"), ("02/2025", "12345678")}
+        assert tmp_store.load_manifest()["content_hash"].isna().all()
+
+    def test_clear_removes_manifest(self, tmp_store, sample_faturas_df):
+        tmp_store.save_data(sample_faturas_df, pd.DataFrame())
+
+        tmp_store.clear_data()
+
+        assert tmp_store.load_manifest().empty
+        assert load_invoice_keys() == set()
+
+
+def _save_in_process(db_folder, reference, client):
+    """save_data num processo à parte, sobre a base em db_folder."""
+    from database import manager
+
+    manager.DB_FOLDER = db_folder
+    manager.DIR_FATURAS = os.path.join(db_folder, "faturas")
+    manager.DIR_MEDICAO = os.path.join(db_folder, "medicao")
+    manager.DIR_MANIFEST = os.path.join(db_folder, "manifest")
+    manager.FILE_FATURAS = os.path.join(db_folder, "faturas.parquet")
+    manager.FILE_MEDICAO = os.path.join(db_folder, "medicao.parquet")
+    return manager.save_data(_invoice(reference, client), pd.DataFrame())
+
+
+class TestConcurrentWriters:
+    @pytest.fixture
+    def pool(self):
+        with ProcessPoolExecutor(max_workers=4, mp_context=mp.get_context("spawn")) as pool:
+            yield pool
+
+    def test_parallel_processes_do_not_lose_invoices(self, tmp_store, pool):
+        references = [f"{month:02d}/2025" for month in range(1, 9)]
+
+        futures = [pool.submit(_save_in_process, tmp_store.DB_FOLDER, ref, "0011")
+                   for ref in references]
+
+        assert all(future.result(timeout=120) for future in futures)
+        assert set(tmp_store.load_all_data()[0]["mes_referencia"]) == set(references)
+        assert len(tmp_store.load_manifest()) == len(references)
+
+    def test_writer_in_other_process_waits_for_lock(self, tmp_store, pool):
+        pool.submit(_save_in_process, tmp_store.DB_FOLDER, "01/2025", "0011").result(timeout=120)
+
+        with tmp_store.write_lock():
+            future = pool.submit(_save_in_process, tmp_store.DB_FOLDER, "02/2025", "0011")
+            time.sleep(1.0)
+            assert not future.done()
+            # Leitores não esperam pelo lock
+            with ThreadPoolExecutor(max_workers=1) as readers:
+                df_fat = readers.submit(lambda: tmp_store.load_all_data()[0]).result(timeout=10)
+            assert list(df_fat["mes_referencia"]) == ["01/2025"]
+
+        assert future.result(timeout=60) is True
+        assert len(tmp_store.load_all_data()[0]) == 2
+
+    def test_failed_write_keeps_previous_file(self, tmp_store, monkeypatch):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.compact_store(threshold=0)
+        path = tmp_store._partition_path(tmp_store.DIR_FATURAS, "0011", "2025")
+
+        def torn_write(table, where, **kwargs):
+            where.write(b"PAR1 truncado")
+            raise OSError("disco cheio")
+
+        monkeypatch.setattr(tmp_store.pq, "write_table", torn_write)
+        with pytest.raises(OSError):
+            tmp_store._write_parquet(_invoice("01/2025", "0011", 999.0), path, tmp_store.FATURAS_SCHEMA)
+
+        assert os.listdir(os.path.dirname(path)) == ["part.parquet"]
+        assert list(pd.read_parquet(path)["valor_total"]) == [100.0]
+
+
+class TestSharedConnection:
+    @pytest.fixture
+    def syncs(self, tmp_store, monkeypatch):
+        calls = []
+        original = tmp_store._sync_views
+        monkeypatch.setattr(tmp_store, "_sync_views", lambda con: calls.append(1) or original(con))
+        return calls
+
+    def test_views_are_reused_until_save(self, tmp_store, syncs):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+
+        for _ in range(3):
+            assert "0011" in tmp_store.query_energy_data("SELECT numero_cliente FROM faturas")
+        assert len(syncs) == 1
+
+        tmp_store.save_data(_invoice("01/2025", "0022"), pd.DataFrame())
+        result = tmp_store.query_energy_data("SELECT COUNT(*) AS n FROM faturas")
+
+        assert len(syncs) == 2
+        assert "2" in result
+
+    def test_empty_store_has_no_connection(self, tmp_store):
+        assert tmp_store.query_energy_data("SELECT 1") == "Erro: Nenhum dado carregado."
+
+    def test_recovers_from_dropped_view(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+        tmp_store.query_energy_data("DROP VIEW faturas")
+
+        assert "Erro" in tmp_store.query_energy_data("SELECT * FROM faturas")
+        assert "0011" in tmp_store.query_energy_data("SELECT numero_cliente FROM faturas")
+
+    def test_concurrent_cursors(self, tmp_store):
+        tmp_store.save_data(_invoice("01/2025", "0011"), pd.DataFrame())
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda _: tmp_store.query_energy_data("SELECT SUM(valor_total) AS t FROM faturas"),
+                range(16),
+            ))
+
+        assert all("100" in result for result in results)
@@ -0,0 +1,314 @@
+"""Tests for the PDF extraction pipeline (ParseContext + parsers)."""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pdfplumber.page
+import pikepdf
+import pytest
+from synthetic_invoices import (
+    FILLER_LINES,
+    build_pages_pdf,
+    build_text_pdf,
+    generate_statement,
+    invoice_lines,
+    render_invoice,
+    split_invoice,
+)
+
+from services.extractor import (
+    FINANCIAL_END_ANCHOR,
+    FINANCIAL_START_ANCHOR,
+    PARSER_REGISTRY,
+    InvoiceParser,
+    ParseContext,
+    Parser2025,
+    Parser2026,
+    _detect_invoice_year,
+    extract_data_from_pdf,
+    extract_raw_data,
+    iter_raw_data,
+    register_parser,
+    select_parser,
+)
+from services.pdf_backends import DocumentFingerprint
+from services.profiling import ExtractionProfiler
+
+
+@pytest.fixture
+def layout_calls(monkeypatch):
+    """Records every layout text extraction performed by pdfplumber."""
+    calls = []
+    original = pdfplumber.page.Page.extract_text
+
+    def counting_extract_text(self, *args, **kwargs):
+        if kwargs.get("layout"):
+            calls.append(self.page_number)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber.page.Page, "extract_text", counting_extract_text)
+    return calls
+
+
+class TestParseContext:
+    def test_layout_text_is_cached(self, invoice_pdf, layout_calls):
+        with ParseContext(invoice_pdf(2025)) as context:
+            first = context.layout_text
+            second = context.layout_text
+
+        assert first is second
+        assert len(layout_calls) == 1
+
+    def test_detect_year_reuses_context(self, invoice_pdf, layout_calls):
+        with ParseContext(invoice_pdf(2026)) as context:
+            assert _detect_invoice_year(context) == 2026
+            Parser2026(context.file_path).extract(context)
+
+        assert len(layout_calls) == 1
+
+
+class TestParserRegistry:
+    @pytest.mark.parametrize("year,expected", [(2025, Parser2025), (2026, Parser2026)])
+    def test_routes_by_fingerprint_without_layout(self, invoice_pdf, layout_calls, year, expected):
+        with ParseContext(invoice_pdf(year, dense=True)) as context:
+            assert select_parser(context.fingerprint) is expected
+            assert _detect_invoice_year(context) == year
+
+        assert layout_calls == []
+
+    def test_fingerprint_exposes_page_size_and_raw_text(self, invoice_pdf):
+        with ParseContext(invoice_pdf(2026)) as context:
+            fingerprint = context.fingerprint
+
+        assert fingerprint.page_size == (595, 842)
+        assert "Itens de Fatura" in fingerprint.text
+
+    def test_unknown_layout_is_not_parsed(self, tmp_dir, caplog):
+        path = build_text_pdf(os.path.join(tmp_dir, "outro.pdf"), ["Boleto 01/2025 R$ 10,00"])
+
+        df_fin, df_med = extract_data_from_pdf(path)
+
+        assert df_fin.empty and df_med.empty
+        assert "não reconhecido" in caplog.text
+
+    @pytest.mark.parametrize("year,parser", [(2025, "Parser2025"), (2026, "Parser2026")])
+    def test_interleaved_raw_header_routes_by_layout(self, tmp_dir, year, parser):
+        lines = render_invoice(year)
+        [index] = [i for i, line in enumerate(lines) if "Itens de Fatura" in str(line)]
+        prefix = [(0, "CMYK")] if year >= 2026 else []
+        lines[index] = [*prefix, (30, "Itens de"), (63, "Fatura Unid. Quant. Preço unit Valor")]
+        path = build_text_pdf(os.path.join(tmp_dir, f"intercalada_{year}.pdf"), lines)
+        # Rodapé desenhado no meio do cabeçalho: no texto cru ele sai quebrado
+        with pikepdf.open(path, allow_overwriting_input=True) as pdf:
+            contents = pdf.pages[0].Contents
+            contents.write(contents.read_bytes().replace(
+                b"BT /F1 8 Tf 63", b"BT /F1 8 Tf 30 30 Td (Pagina 1/1) Tj ET\nBT /F1 8 Tf 63"
+            ))
+            pdf.save(path)
+
+        with ParseContext(path) as context:
+            assert select_parser(context.fingerprint) is None
+        with ExtractionProfiler() as profiler:
+            df_fin, _ = extract_data_from_pdf(path)
+
+        assert profiler.records[0]["parser"] == parser
+        assert df_fin["mes_referencia"].unique().tolist() == [f"01/{year}"]
+        assert len(df_fin) == 3
+
+    def test_new_layout_plugs_in_without_touching_extraction(self, tmp_dir):
+        class OtherDistributorParser(InvoiceParser):
+            priority = 100
+
+            @classmethod
+            def matches(cls, fingerprint):
+                return "DISTRIBUIDORA X" in fingerprint.text
+
+            def _extract_reference(self, text):
+                return "02/2026"
+
+            def _get_financial_lines(self, context):
+                return ["Itens de Fatura", "Energia kWh 100,00 0,50 50,00", "TOTAL 50,00"]
+
+        register_parser(OtherDistributorParser)
+        try:
+            path = build_text_pdf(os.path.join(tmp_dir, "x.pdf"), ["DISTRIBUIDORA X"])
+            df_fin, _ = extract_data_from_pdf(path)
+        finally:
+            PARSER_REGISTRY.remove(OtherDistributorParser)
+
+        assert df_fin["mes_referencia"].tolist() == ["02/2026"]
+        assert df_fin["valor_total"].tolist() == [50.0]
+
+    def test_registry_is_ordered_by_priority(self):
+        assert PARSER_REGISTRY.index(Parser2026) < PARSER_REGISTRY.index(Parser2025)
+        assert select_parser(DocumentFingerprint(text="nada")) is None
+
+
+class TestParser2026Crop:
+    def test_words_are_extracted_only_inside_sections(self, invoice_pdf):
+        with ParseContext(invoice_pdf(2026, dense=True)) as context:
+            data = Parser2026(context.file_path).extract(context)
+            full_page_words = context._words
+
+        assert full_page_words is None
+        assert [item["descricao"] for item in data["items"]] == [
+            "Energia Ativa Fornecida",
+            "CIP Municipal",
+            "Bonus Itaipu",
+        ]
+        assert data["measurement"][0]["numero_medidor"] == "XYZ987"
+
+    def test_section_bbox_spans_header_to_total(self, invoice_pdf):
+        with ParseContext(invoice_pdf(2026, dense=True)) as context:
+            bbox = context.section_bbox(FINANCIAL_START_ANCHOR, FINANCIAL_END_ANCHOR)
+            lines = Parser2026._reconstruct_lines(context.words_in(bbox))
+
+        assert lines[0].startswith("Itens de Fatura")
+        assert lines[-1] == "TOTAL 265,84"
+
+    def test_falls_back_to_full_page_without_anchors(self, tmp_dir):
+        path = build_text_pdf(os.path.join(tmp_dir, "sem_tabela.pdf"), ["Sem tabela"])
+
+        with ParseContext(path) as context:
+            assert context.section_bbox(FINANCIAL_START_ANCHOR, FINANCIAL_END_ANCHOR) is None
+            assert Parser2026(path)._get_financial_lines(context) == ["Sem tabela"]
+
+
+class TestExtractDataFromPdf:
+    @pytest.mark.parametrize("year", [2025, 2026])
+    def test_single_layout_extraction_per_invoice(self, invoice_pdf, layout_calls, year):
+        df_fin, df_med = extract_data_from_pdf(invoice_pdf(year))
+
+        assert not df_fin.empty
+        assert not df_med.empty
+        assert len(layout_calls) == 1
+
+    def test_2025_invoice(self, invoice_pdf):
+        df_fin, df_med = extract_data_from_pdf(invoice_pdf(2025))
+
+        assert set(df_fin["mes_referencia"]) == {"01/2025"}
+        assert set(df_fin["numero_cliente"]) == {"12345678"}
+        assert list(df_fin["descricao"]) == [
+            "Energia Ativa Fornecida",
+            "CIP Municipal",
+            "Bonus Itaipu",
+        ]
+        assert df_fin["valor_total"].tolist() == [262.35, 23.01, -19.52]
+        assert df_med.iloc[0]["consumo_kwh"] == 477
+
+    def test_2026_invoice(self, invoice_pdf):
+        df_fin, df_med = extract_data_from_pdf(invoice_pdf(2026))
+
+        assert set(df_fin["mes_referencia"]) == {"01/2026"}
+        assert set(df_fin["numero_cliente"]) == {"52217494"}
+        assert df_fin["valor_total"].tolist() == [262.35, 23.01, -19.52]
+        assert df_med.iloc[0]["numero_medidor"] == "XYZ987"
+
+    def test_password_protected(self, invoice_pdf):
+        df_fin, _ = extract_data_from_pdf(invoice_pdf(2025, password="12345"), "12345")
+        assert len(df_fin) == 3
+
+    def test_wrong_password_returns_empty(self, invoice_pdf):
+        df_fin, df_med = extract_data_from_pdf(invoice_pdf(2025, password="12345"), "000")
+        assert df_fin.empty
+        assert df_med.empty
+
+    @pytest.mark.parametrize("wrap", [bytes, io.BytesIO], ids=["bytes", "bytesio"])
+    def test_in_memory_protected_pdf(self, invoice_pdf, tmp_dir, wrap):
+        path = invoice_pdf(2026, password="12345")
+        with open(path, "rb") as f:
+            data = f.read()
+        os.remove(path)
+
+        df_fin, df_med = extract_data_from_pdf(wrap(data), "12345")
+
+        assert set(df_fin["numero_cliente"]) == {"52217494"}
+        assert len(df_med) == 1
+        assert os.listdir(tmp_dir) == []
+
+
+class TestMultiPage:
+    @pytest.mark.parametrize("year", [2025, 2026])
+    def test_invoice_split_across_pages_matches_single_page(self, tmp_dir, year):
+        lines = render_invoice(year, extra_items=3)
+        single = build_text_pdf(os.path.join(tmp_dir, "single.pdf"), lines)
+        split = build_pages_pdf(os.path.join(tmp_dir, "split.pdf"), split_invoice(lines))
+
+        expected = extract_raw_data(single)
+        result = extract_raw_data(split)
+
+        assert len(result["items"]) == 6
+        assert result == expected
+
+    @pytest.mark.parametrize("year", [2025, 2026])
+    def test_continuation_repeating_client_code_is_same_invoice(self, tmp_dir, year):
+        lines = render_invoice(year, extra_items=3)
+        first, rest = split_invoice(lines)
+        # Página 2 repete só a linha do código do cliente, sem a referência
+        client_line = next(line for line in lines if "12345678" in str(line))
+        path = build_pages_pdf(
+            os.path.join(tmp_dir, "continuacao.pdf"), [first, [client_line, *rest]]
+        )
+
+        invoices = list(iter_raw_data(path))
+        df_fin, _ = extract_data_from_pdf(path)
+
+        assert [(raw["client_id"], raw["reference"]) for raw in invoices] == [
+            ("12345678", f"01/{year}")
+        ]
+        assert len(invoices[0]["items"]) == 6
+        assert len(df_fin) == 6
+
+    @pytest.mark.parametrize("year", [2025, 2026])
+    def test_statement_yields_one_invoice_per_uc(self, tmp_dir, year):
+        path = os.path.join(tmp_dir, "extrato.pdf")
+        expected = generate_statement(path, invoices=6, year=year, split_ratio=0.5, seed=1)
+        assert any(invoice["pages"] == 2 for invoice in expected)
+
+        invoices = list(iter_raw_data(path))
+
+        assert [(raw["client_id"], raw["reference"]) for raw in invoices] == [
+            (invoice["client_id"], invoice["reference"]) for invoice in expected
+        ]
+        assert [len(raw["items"]) for raw in invoices] == [invoice["items"] for invoice in expected]
+        assert all(len(raw["measurement"]) == 1 for raw in invoices)
+
+    def test_statement_frames_keep_every_uc(self, tmp_dir):
+        path = os.path.join(tmp_dir, "extrato.pdf")
+        expected = generate_statement(path, invoices=4, seed=2)
+
+        df_fin, df_med = extract_data_from_pdf(path)
+
+        assert set(df_fin["numero_cliente"]) == {invoice["client_id"] for invoice in expected}
+        assert df_med["consumo_kwh"].tolist() == [invoice["kwh"] for invoice in expected]
+
+    def test_first_invoice_stops_reading_once_complete(self, tmp_dir, layout_calls):
+        path = build_pages_pdf(
+            os.path.join(tmp_dir, "avisos.pdf"), [invoice_lines(2025)] + [FILLER_LINES] * 3
+        )
+
+        with ExtractionProfiler() as profiler:
+            raw_data = extract_raw_data(path)
+            extract_data_from_pdf(path)
+
+        assert len(raw_data["items"]) == 3
+        assert [record["pages"] for record in profiler.records] == [1, 4]
+        # As páginas de avisos são lidas só como texto cru, sem layout
+        assert layout_calls == [1, 1]
+
+    def test_pages_are_released_while_walking(self, tmp_dir):
+        path = os.path.join(tmp_dir, "extrato.pdf")
+        generate_statement(path, invoices=3, split_ratio=0)
+
+        with ParseContext(path) as context:
+            first_page = context.backend.page
+            assert first_page.chars
+            assert context.next_page()
+
+            assert context.page_index == 1
+            assert "_objects" not in first_page.__dict__
+            assert context.next_page()
+            assert not context.next_page()
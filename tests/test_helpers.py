@@ -6,10 +6,20 @@ import sys
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+import pandas as pd
+
 from services.extractor import (
+    FINANCIAL_FIELDS,
+    IGNORED_TERMS,
+    JUNK_DESCRIPTION_REGEX,
+    JUNK_DESCRIPTIONS,
+    NOISE_LINE_REGEX,
+    ColumnBuffer,
     clean_cmyk_artifacts,
     clean_line,
+    frames_from_raw_batch,
     normalize_negative_value,
+    parse_br_numeric,
     process_values,
 )
 
@@ -131,3 +141,120 @@ class TestCleanCmykArtifacts:
 
     def test_none(self):
         assert clean_cmyk_artifacts(None) is None
+
+
+# ==============================================================================
+# NOISE_LINE_REGEX / JUNK_DESCRIPTION_REGEX
+# ==============================================================================
+
+
+class TestNoiseFilters:
+    def test_every_ignored_term_is_noise(self):
+        for term in IGNORED_TERMS:
+            assert NOISE_LINE_REGEX.search(f"XX {term} 12,00"), term
+
+    def test_numeric_code_history_and_totals_are_noise(self):
+        assert NOISE_LINE_REGEX.search("123456789 CONTA CONTRATO")
+        assert NOISE_LINE_REGEX.search("AGO25 477.00 30 LID")
+        assert NOISE_LINE_REGEX.search("262,35 52,47")
+
+    def test_financial_item_is_not_noise(self):
+        assert not NOISE_LINE_REGEX.search("ENERGIA ATIVA FORNECIDA KWH 477,00 0,55 262,35")
+        assert not NOISE_LINE_REGEX.search("CIP MUNICIPAL 23,01")
+
+    def test_junk_descriptions_match_whole_description(self):
+        for term in JUNK_DESCRIPTIONS:
+            assert JUNK_DESCRIPTION_REGEX.match(term), term
+        assert JUNK_DESCRIPTION_REGEX.match("JAN/2025")
+        assert not JUNK_DESCRIPTION_REGEX.match("PIS REPASSE")
+        assert not JUNK_DESCRIPTION_REGEX.match("CIP MUNICIPAL")
+
+
+# ==============================================================================
+# parse_br_numeric
+# ==============================================================================
+
+
+class TestParseBrNumeric:
+    def test_brazilian_formats(self):
+        values = pd.Series(["19,52", "19,52-", "-19,52", "1.234,56-", "1.234.567", " 477,00 "])
+        assert parse_br_numeric(values).tolist() == [
+            19.52, -19.52, -19.52, -1234.56, 1234567.0, 477.0,
+        ]
+
+    def test_already_normalized_values(self):
+        assert parse_br_numeric(pd.Series(["262.35", "100", "-5.5"])).tolist() == [
+            262.35, 100.0, -5.5,
+        ]
+
+    def test_invalid_and_missing_become_nan(self):
+        result = parse_br_numeric(pd.Series(["", None, "abc", "-", "nan"]))
+        assert result.isna().all()
+
+    def test_numeric_and_mixed_columns(self):
+        assert parse_br_numeric(pd.Series([1, 2])).dtype == "float64"
+        assert parse_br_numeric(pd.Series([42, "1,5"])).tolist() == [42.0, 1.5]
+
+    def test_preserves_index(self):
+        values = pd.Series(["1,00", "2,00"], index=[10, 20], name="valor_total")
+        result = parse_br_numeric(values)
+        assert list(result.index) == [10, 20]
+        assert result.name == "valor_total"
+
+
+# ==============================================================================
+# ColumnBuffer / frames_from_raw_batch
+# ==============================================================================
+
+ENERGY_ROW = ("Energia", "kWh", "477.00", "0.55", "262.35", "5.20", "262.35", "20.00", "52.47", "0.45")
+CIP_ROW = ("CIP Municipal", "", "", "", "23.01", "", "", "", "", "")
+
+
+class TestColumnBuffer:
+    def test_appends_rows_into_columns(self):
+        buffer = ColumnBuffer(FINANCIAL_FIELDS)
+        buffer.append(ENERGY_ROW)
+        buffer.append(CIP_ROW)
+
+        assert len(buffer) == 2
+        assert buffer.column("valor_total") == ["262.35", "23.01"]
+        assert list(buffer.rows()) == [ENERGY_ROW, CIP_ROW]
+        assert buffer[1]["descricao"] == "CIP Municipal"
+
+    def test_extend_with_buffer_and_equality(self):
+        first = ColumnBuffer.from_rows(FINANCIAL_FIELDS, [ENERGY_ROW])
+        combined = ColumnBuffer(FINANCIAL_FIELDS)
+        combined.extend(first)
+        combined.extend([CIP_ROW])
+
+        assert combined == ColumnBuffer.from_rows(FINANCIAL_FIELDS, [ENERGY_ROW, CIP_ROW])
+        assert combined != first
+
+    def test_to_frame_keeps_field_order(self):
+        df = ColumnBuffer.from_rows(FINANCIAL_FIELDS, [ENERGY_ROW]).to_frame()
+        assert list(df.columns) == list(FINANCIAL_FIELDS)
+
+
+class TestFramesFromRawBatch:
+    def test_batch_keys_each_row_by_invoice(self):
+        raw_batch = [
+            {
+                "reference": "01/2025",
+                "client_id": "1",
+                "items": ColumnBuffer.from_rows(FINANCIAL_FIELDS, [ENERGY_ROW, CIP_ROW]),
+            },
+            None,
+            {
+                "reference": "02/2025",
+                "client_id": "2",
+                "items": ColumnBuffer.from_rows(FINANCIAL_FIELDS, [CIP_ROW]),
+            },
+        ]
+
+        df_fin, df_med = frames_from_raw_batch(raw_batch)
+
+        assert df_fin["mes_referencia"].tolist() == ["01/2025", "01/2025", "02/2025"]
+        assert df_fin["numero_cliente"].tolist() == ["1", "1", "2"]
+        assert df_fin["valor_total"].tolist() == [262.35, 23.01, 23.01]
+        assert df_fin["quantidade"].tolist() == [477.0, 0.0, 0.0]
+        assert df_med.empty
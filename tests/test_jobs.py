@@ -0,0 +1,133 @@
+"""Tests for the background ingestion queue used by the Streamlit app."""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from synthetic_invoices import generate_statement
+
+from services.jobs import (
+    STATUS_DONE,
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_QUEUED,
+    IngestionQueue,
+)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def queue(tmp_store):
+    queue = IngestionQueue(max_workers=2, cache_folder=None)
+    yield queue
+    queue.shutdown()
+
+
+class TestIngestionQueue:
+    def test_submit_returns_before_extraction(self, invoice_pdf, tmp_store):
+        release = threading.Event()
+        queue = IngestionQueue(
+            save=lambda *frames: release.wait(5), lookup=lambda **_: None, cache_folder=None
+        )
+        data = _read(invoice_pdf(2025))
+
+        job_id = queue.submit("fatura.pdf", data)
+
+        assert queue.get(job_id).finished is False
+        release.set()
+        [job] = queue.wait([job_id], timeout=10)
+        assert job.status == STATUS_DONE
+        queue.shutdown()
+
+    def test_multiple_files_are_saved(self, queue, invoice_pdf, tmp_store):
+        ids = [
+            queue.submit("a.pdf", _read(invoice_pdf(2025))),
+            queue.submit("b.pdf", _read(invoice_pdf(2026))),
+        ]
+
+        jobs = queue.wait(ids, timeout=30)
+
+        assert len(set(ids)) == 2
+        assert [job.status for job in jobs] == [STATUS_DONE, STATUS_DONE]
+        assert all(job.progress == 1.0 and job.finished_at for job in jobs)
+        assert queue.data_version == 2
+        df_fat = tmp_store.load_all_data()[0]
+        assert set(df_fat["mes_referencia"]) == {"01/2025", "01/2026"}
+
+    def test_same_invoice_twice_is_duplicate(self, queue, invoice_pdf, tmp_store):
+        data = _read(invoice_pdf(2025))
+
+        jobs = queue.wait([queue.submit("a.pdf", data), queue.submit("b.pdf", data)], timeout=30)
+
+        assert sorted(job.status for job in jobs) == [STATUS_DONE, STATUS_DUPLICATE]
+        assert len(tmp_store.load_all_data()[0]) == 3
+
+    def test_same_pdf_is_recognized_before_extraction(self, queue, invoice_pdf, tmp_store):
+        data = _read(invoice_pdf(2025))
+        queue.wait([queue.submit("a.pdf", data)], timeout=30)
+
+        [job] = queue.wait([queue.submit("copia.pdf", data)], timeout=30)
+
+        assert job.status == STATUS_DUPLICATE
+        assert job.message == "PDF já importado (fatura de 01/2025)"
+        assert tmp_store.find_imported(key=("01/2025", "12345678"))["content_hash"]
+
+    def test_statement_saves_only_new_ucs(self, queue, tmp_dir, tmp_store):
+        partial = os.path.join(tmp_dir, "parcial.pdf")
+        full = os.path.join(tmp_dir, "extrato.pdf")
+        generate_statement(partial, invoices=2, seed=2)
+        expected = generate_statement(full, invoices=4, seed=2)
+        queue.wait([queue.submit("parcial.pdf", _read(partial))], timeout=30)
+
+        [job] = queue.wait([queue.submit("extrato.pdf", _read(full))], timeout=30)
+
+        assert job.status == STATUS_DONE
+        assert job.message == "2 faturas salvas (2 já importadas)"
+        df_fat = tmp_store.load_all_data()[0]
+        assert set(df_fat["numero_cliente"]) == {invoice["client_id"] for invoice in expected}
+
+    def test_same_file_name_does_not_clobber(self, queue, invoice_pdf, tmp_store):
+        ids = [
+            queue.submit("fatura.pdf", _read(invoice_pdf(2025))),
+            queue.submit("fatura.pdf", _read(invoice_pdf(2026, password="12345")), "12345"),
+        ]
+
+        jobs = queue.wait(ids, timeout=30)
+
+        assert [job.reference for job in jobs] == ["01/2025", "01/2026"]
+        assert all(job.status == STATUS_DONE for job in jobs)
+
+    def test_wrong_password_fails(self, queue, invoice_pdf, tmp_store):
+        data = _read(invoice_pdf(2026, password="12345"))
+
+        [job] = queue.wait([queue.submit("a.pdf", data, password="errada")], timeout=30)
+
+        assert job.status == STATUS_FAILED
+        assert "senha" in job.message
+        assert queue.data_version == 0
+
+    def test_forget_keeps_running_jobs(self, invoice_pdf, tmp_store):
+        release = threading.Event()
+        queue = IngestionQueue(
+            max_workers=1, save=lambda *frames: release.wait(5), lookup=lambda **_: None,
+            cache_folder=None,
+        )
+        data = _read(invoice_pdf(2025))
+        first = queue.submit("a.pdf", data)
+        second = queue.submit("b.pdf", data)
+
+        queue.forget([first, second])
+
+        assert queue.get(second).status == STATUS_QUEUED
+        release.set()
+        queue.wait(timeout=10)
+        queue.forget([first, second])
+        assert queue.jobs() == []
+        queue.shutdown()
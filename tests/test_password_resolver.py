@@ -0,0 +1,154 @@
+"""Tests for the candidate password resolver."""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from synthetic_invoices import build_text_pdf, render_invoice
+
+from services.bulk_import import bulk_import
+from services import password_resolver
+from services.password_resolver import CredentialMap, resolve_passwords
+
+CANDIDATES = ["00000", "11111", "22222", "33333"]
+
+
+@pytest.fixture
+def protected(tmp_dir):
+    """Factory: protected(client_id, password, month=1) -> caminho do PDF."""
+
+    def _make(client_id, password, month=1):
+        path = os.path.join(tmp_dir, f"fatura_{client_id}_{month:02d}.pdf")
+        return build_text_pdf(path, render_invoice(2025, client_id, month=month), password)
+
+    return _make
+
+
+@pytest.fixture
+def credentials(tmp_dir):
+    return CredentialMap(os.path.join(tmp_dir, "credentials.json"))
+
+
+class TestCredentialMap:
+    def test_candidate_order(self, credentials):
+        credentials.record("111", "22222")
+        credentials.record("222", "33333")
+        credentials.record("333", "33333")
+
+        assert credentials.candidate_order(CANDIDATES) == ["33333", "22222", "00000", "11111"]
+        assert credentials.candidate_order(CANDIDATES, hint="uc_111.pdf")[0] == "22222"
+
+    def test_save_and_reload(self, credentials):
+        credentials.record("111", "22222")
+        credentials.save()
+
+        assert CredentialMap(credentials.path).get("111") == "22222"
+        assert oct(os.stat(credentials.path).st_mode & 0o777) == "0o600"
+
+    def test_save_does_not_use_a_fixed_temp_file(self, credentials):
+        # Temporário de outra carga em andamento no caminho antigo (<path>.tmp)
+        os.mkdir(f"{credentials.path}.tmp")
+        credentials.record("111", "22222")
+
+        credentials.save()
+
+        assert CredentialMap(credentials.path).get("111") == "22222"
+        assert sorted(os.listdir(os.path.dirname(credentials.path))) == [
+            "credentials.json", "credentials.json.tmp",
+        ]
+
+    def test_unreadable_file_starts_empty(self, credentials):
+        with open(credentials.path, "w") as f:
+            f.write("{")
+
+        assert len(CredentialMap(credentials.path)) == 0
+
+
+class TestResolvePasswords:
+    def test_learns_password_per_client(self, protected, credentials):
+        paths = [protected("10000001", "22222"), protected("10000002", "33333")]
+
+        resolution = resolve_passwords(paths, CANDIDATES, credentials, max_workers=1)
+
+        assert resolution.passwords == dict(zip(paths, ["22222", "33333"]))
+        assert [r.client_id for r in resolution.results] == ["10000001", "10000002"]
+        with open(credentials.path) as f:
+            assert json.load(f) == {"10000001": "22222", "10000002": "33333"}
+
+    def test_reads_client_without_extracting(self, protected, credentials, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("extração completa na busca de senha")
+
+        monkeypatch.setattr("services.extractor.extract_raw_data", fail)
+        monkeypatch.setattr("services.extractor.iter_raw_data", fail)
+
+        resolution = resolve_passwords(
+            [protected("10000001", "22222")], CANDIDATES, credentials, max_workers=1
+        )
+
+        assert resolution.results[0].client_id == "10000001"
+
+    def test_known_client_unlocks_on_first_try(self, protected, credentials):
+        resolve_passwords([protected("10000001", "33333")], CANDIDATES, credentials, max_workers=1)
+
+        later = [protected("10000001", "33333", month=m) for m in (2, 3)]
+        resolution = resolve_passwords(later, CANDIDATES, credentials, max_workers=1)
+
+        assert [r.attempts for r in resolution.results] == [1, 1]
+
+    def test_reports_unresolved_and_plain(self, protected, invoice_pdf, credentials):
+        locked = protected("10000001", "99999")
+        plain = invoice_pdf(2026)
+
+        resolution = resolve_passwords([locked, plain], CANDIDATES, credentials, max_workers=1)
+
+        assert [r.path for r in resolution.unresolved] == [locked]
+        assert resolution.unresolved[0].attempts == len(CANDIDATES)
+        assert resolution.passwords == {plain: None}
+        assert len(credentials) == 0
+
+    def test_process_pool(self, protected, credentials):
+        paths = [protected(f"1000000{i}", CANDIDATES[i % 4]) for i in range(4)]
+
+        resolution = resolve_passwords(paths, CANDIDATES, credentials, max_workers=2)
+
+        assert [r.password for r in resolution.results] == [CANDIDATES[i % 4] for i in range(4)]
+
+    def test_worker_failure_marks_only_that_file(self, protected, credentials, monkeypatch):
+        paths = [protected(f"1000000{i}", "22222") for i in range(3)]
+        try_passwords = password_resolver._try_passwords
+
+        def flaky(path, passwords):
+            if path == paths[1]:
+                raise BrokenProcessPool("processo encerrado")
+            return try_passwords(path, passwords)
+
+        # Threads no lugar de processos, para o defeito injetado valer no "worker"
+        monkeypatch.setattr(password_resolver, "_try_passwords", flaky)
+        monkeypatch.setattr(
+            password_resolver, "ProcessPoolExecutor",
+            lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+        )
+
+        resolution = resolve_passwords(paths, CANDIDATES, credentials, max_workers=2)
+
+        assert [r.path for r in resolution.unresolved] == [paths[1]]
+        assert resolution.unresolved[0].error == "processo encerrado"
+        assert resolution.passwords == {paths[0]: "22222", paths[2]: "22222"}
+
+
+class TestBulkImportWithCandidates:
+    def test_imports_with_resolved_passwords(self, protected, credentials, tmp_store):
+        paths = [protected("10000001", "22222"), protected("10000002", "99999")]
+
+        report = bulk_import(paths, password=CANDIDATES, max_workers=1, use_cache=False,
+                             credentials=credentials)
+
+        assert [r.ok for r in report.results] == [True, False]
+        assert "Nenhuma senha" in report.failed[0].error
+        assert report.saved
@@ -0,0 +1,106 @@
+"""Tests for the pluggable PDF backends (pdfplumber vs pdfium parity)."""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from synthetic_invoices import generate_statement
+
+from services.extractor import (
+    ParseContext,
+    extract_data_from_pdf,
+    extract_raw_data,
+    iter_raw_data,
+)
+from services.pdf_backends import (
+    BACKENDS,
+    PdfiumBackend,
+    PdfplumberBackend,
+    get_backend,
+)
+
+CORPUS = [
+    pytest.param(2025, False, None, id="2025"),
+    pytest.param(2026, False, None, id="2026"),
+    pytest.param(2025, True, None, id="2025-dense"),
+    pytest.param(2026, True, None, id="2026-dense"),
+    pytest.param(2026, False, "12345", id="2026-password"),
+]
+
+
+class TestGetBackend:
+    def test_resolves_by_name(self):
+        assert get_backend("pdfplumber") is PdfplumberBackend
+        assert get_backend("pdfium") is PdfiumBackend
+
+    def test_accepts_class(self):
+        assert get_backend(PdfiumBackend) is PdfiumBackend
+
+    def test_default_is_registered(self):
+        assert get_backend() in BACKENDS.values()
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError, match="desconhecido"):
+            get_backend("mupdf")
+
+    def test_unknown_backend_is_not_swallowed_by_extraction(self, invoice_pdf):
+        with pytest.raises(ValueError):
+            extract_data_from_pdf(invoice_pdf(2025), backend="mupdf")
+
+
+class TestBackendParity:
+    @pytest.mark.parametrize("year,dense,password", CORPUS)
+    def test_layout_text_matches(self, invoice_pdf, year, dense, password):
+        path = invoice_pdf(year, password=password, dense=dense)
+        with ParseContext(path, password, "pdfplumber") as plumber, \
+                ParseContext(path, password, "pdfium") as pdfium:
+            assert pdfium.layout_text == plumber.layout_text
+            assert [w["text"] for w in pdfium.words] == [w["text"] for w in plumber.words]
+
+    @pytest.mark.parametrize("year,dense,password", CORPUS)
+    def test_extracted_records_match(self, invoice_pdf, year, dense, password):
+        path = invoice_pdf(year, password=password, dense=dense)
+        expected = extract_raw_data(path, password, backend="pdfplumber")
+        result = extract_raw_data(path, password, backend="pdfium")
+
+        assert expected["items"]
+        assert result == expected
+
+    @pytest.mark.parametrize("year", [2025, 2026])
+    def test_page_walk_matches(self, tmp_dir, year):
+        path = os.path.join(tmp_dir, "extrato.pdf")
+        generate_statement(path, invoices=4, year=year, split_ratio=0.5, password="12345")
+
+        expected = list(iter_raw_data(path, "12345", backend="pdfplumber"))
+        result = list(iter_raw_data(path, "12345", backend="pdfium"))
+
+        assert len(expected) == 4
+        assert result == expected
+
+    @pytest.mark.parametrize("backend", sorted(BACKENDS))
+    def test_reads_from_memory(self, invoice_pdf, backend):
+        path = invoice_pdf(2026, password="12345")
+        with open(path, "rb") as f:
+            data = f.read()
+
+        assert extract_raw_data(data, "12345", backend) == extract_raw_data(path, "12345", backend)
+
+    def test_wrong_password_returns_empty(self, invoice_pdf):
+        path = invoice_pdf(2025, password="12345")
+        df_fin, df_med = extract_data_from_pdf(path, "000", backend="pdfium")
+        assert df_fin.empty and df_med.empty
+
+    @pytest.mark.parametrize("backend", sorted(BACKENDS))
+    def test_concurrent_threads(self, invoice_pdf, backend):
+        paths = [invoice_pdf(2025), invoice_pdf(2026, password="12345")]
+        expected = [extract_raw_data(p, "12345", backend) for p in paths]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda i: extract_raw_data(paths[i % 2], "12345", backend), range(64)
+            ))
+
+        assert results == [expected[i % 2] for i in range(64)]
@@ -0,0 +1,115 @@
+"""Tests for the trailer-only encryption probe."""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pikepdf
+import pytest
+
+from services.pdf_probe import PDF_CORRUPT, PDF_ENCRYPTED, PDF_PLAIN, probe_pdf
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _resave(path, password=None, **options):
+    output = io.BytesIO()
+    encryption = pikepdf.Encryption(user=password, owner=password) if password else False
+    with pikepdf.open(path, password=password or "") as pdf:
+        pdf.save(output, encryption=encryption, **options)
+    return output.getvalue()
+
+
+class CountingReader(io.BytesIO):
+    """BytesIO que conta quantos bytes foram lidos."""
+
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class TestProbePdf:
+    @pytest.mark.parametrize("password,expected", [(None, PDF_PLAIN), ("12345", PDF_ENCRYPTED)])
+    def test_path_bytes_and_file(self, invoice_pdf, password, expected):
+        path = invoice_pdf(2025, password=password)
+        data = _read(path)
+
+        assert probe_pdf(path) == expected
+        assert probe_pdf(data) == expected
+        assert probe_pdf(io.BytesIO(data)) == expected
+
+    @pytest.mark.parametrize("options", [
+        {"object_stream_mode": pikepdf.ObjectStreamMode.generate},
+        {"linearize": True},
+    ], ids=["xref-stream", "linearized"])
+    @pytest.mark.parametrize("password,expected", [(None, PDF_PLAIN), ("12345", PDF_ENCRYPTED)])
+    def test_other_layouts(self, invoice_pdf, options, password, expected):
+        data = _resave(invoice_pdf(2026, password=password), password, **options)
+
+        assert probe_pdf(data) == expected
+
+    def test_incremental_update_uses_last_trailer(self, invoice_pdf):
+        data = _read(invoice_pdf(2025, password="12345"))
+        offset = data.rindex(b"startxref")
+        # Atualização incremental sem objetos novos: nova xref vazia + trailer
+        update = (
+            b"\nxref\n0 0\ntrailer\n<< /Size 1 /Prev %d /Encrypt 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        )
+        xref_offset = len(data) + 1
+        data += update % (int(data[offset:].split()[1]), xref_offset)
+
+        assert probe_pdf(data) == PDF_ENCRYPTED
+
+    @pytest.mark.parametrize("damage", [
+        lambda data: data[: len(data) // 2],
+        lambda data: b"not a pdf",
+        lambda data: b"",
+        lambda data: data.replace(b"startxref", b"startxxxx"),
+    ], ids=["truncated", "garbage", "empty", "no-startxref"])
+    def test_corrupt(self, invoice_pdf, damage):
+        assert probe_pdf(damage(_read(invoice_pdf(2025)))) == PDF_CORRUPT
+
+    @pytest.mark.parametrize("password,expected", [(None, PDF_PLAIN), ("12345", PDF_ENCRYPTED)])
+    def test_bad_xref_offset_falls_back_to_last_trailer(self, invoice_pdf, password, expected):
+        data = _read(invoice_pdf(2025, password=password))
+        data = data[: data.rindex(b"startxref")] + b"startxref\n999999999\n%%EOF\n"
+
+        assert probe_pdf(data) == expected
+
+    @pytest.mark.parametrize("damage", [
+        lambda data: b"\n\n" + data,
+        lambda data: b"lixo" * 300 + data,
+        lambda data: data + b"\0" * 3000,
+    ], ids=["leading-newlines", "leading-junk", "trailing-padding"])
+    @pytest.mark.parametrize("options", [
+        {},
+        {"object_stream_mode": pikepdf.ObjectStreamMode.generate},
+    ], ids=["xref-table", "xref-stream"])
+    @pytest.mark.parametrize("password,expected", [(None, PDF_PLAIN), ("12345", PDF_ENCRYPTED)])
+    def test_recoverable_damage_is_not_corrupt(self, invoice_pdf, damage, options, password,
+                                               expected):
+        data = _resave(invoice_pdf(2025, password=password), password, **options)
+
+        assert probe_pdf(damage(data)) == expected
+
+    def test_reads_constant_amount(self, tmp_dir):
+        path = os.path.join(tmp_dir, "grande.pdf")
+        pdf = pikepdf.new()
+        for _ in range(20):
+            pdf.add_blank_page()
+            pdf.pages[-1].Contents = pdf.make_stream(os.urandom(256 * 1024))
+        pdf.save(path, encryption=pikepdf.Encryption(user="12345", owner="12345"))
+        reader = CountingReader(_read(path))
+        reader.seek(10)
+
+        assert probe_pdf(reader) == PDF_ENCRYPTED
+        assert reader.bytes_read < 64 * 1024
+        assert reader.tell() == 10
@@ -0,0 +1,105 @@
+"""Tests for the per-stage extraction profiling hooks."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from services.bulk_import import bulk_import
+from services.extractor import extract_data_from_pdf
+from services.profiling import ExtractionProfiler, load_profile, profile_stage
+
+PARSER_STAGES = {
+    "open",
+    "routing",
+    "layout_text",
+    "reference_client",
+    "measurement",
+    "financial_lines",
+    "financial_items",
+    "dataframes",
+}
+
+
+class TestExtractionProfiler:
+    @pytest.mark.parametrize("year,parser", [(2025, "Parser2025"), (2026, "Parser2026")])
+    def test_records_every_stage_per_file(self, invoice_pdf, year, parser):
+        path = invoice_pdf(year)
+        with ExtractionProfiler() as profiler:
+            extract_data_from_pdf(path)
+
+        [record] = profiler.records
+        assert record["file"] == path
+        assert record["parser"] == parser
+        assert record["ok"] and record["error"] is None
+        assert set(record["stages"]) == PARSER_STAGES
+        assert all(stats["ms"] >= 0 for stats in record["stages"].values())
+
+    def test_stage_times_are_exclusive(self, invoice_pdf):
+        with ExtractionProfiler() as profiler:
+            extract_data_from_pdf(invoice_pdf(2025, dense=True))
+
+        stages = profiler.records[0]["stages"]
+        # layout_text roda dentro de outra etapa mas não é contado duas vezes
+        assert sum(s["ms"] for s in stages.values()) <= profiler.records[0]["total_ms"]
+        assert stages["layout_text"]["ms"] > stages["reference_client"]["ms"]
+
+    def test_net_blocks_track_live_objects(self):
+        profiler = ExtractionProfiler()
+        with profiler.file_scope("fatura.pdf"):
+            with profiler.stage("build"):
+                kept = [object() for _ in range(10_000)]
+                with profiler.stage("inner"):
+                    inner = [object() for _ in range(5_000)]
+            with profiler.stage("release"):
+                del kept, inner
+
+        stages = profiler.records[0]["stages"]
+        # Saldo, não contagem: a etapa interna sai da externa e liberar dá negativo
+        assert 9_000 < stages["build"]["net_blocks"] < 11_000
+        assert 4_500 < stages["inner"]["net_blocks"] < 5_500
+        assert stages["release"]["net_blocks"] < -13_500
+
+    def test_failure_records_error_and_stage(self, invoice_pdf):
+        with ExtractionProfiler() as profiler:
+            extract_data_from_pdf(invoice_pdf(2025, password="12345"), "000")
+
+        record = profiler.records[0]
+        assert not record["ok"]
+        assert record["failed_stage"] == "open"
+        assert "Password" in record["error"]
+
+    def test_callback_jsonl_and_summary(self, invoice_pdf, tmp_dir):
+        jsonl = os.path.join(tmp_dir, "profile", "run.jsonl")
+        seen = []
+        with ExtractionProfiler(callback=seen.append, jsonl_path=jsonl) as profiler:
+            extract_data_from_pdf(invoice_pdf(2025))
+            extract_data_from_pdf(invoice_pdf(2026))
+
+        assert [r["parser"] for r in load_profile(jsonl)] == ["Parser2025", "Parser2026"]
+        assert seen == profiler.records
+        summary = profiler.summary()
+        assert summary["Parser2026"]["layout_text"]["count"] == 1
+        assert profiler.slowest(1)[0]["total_ms"] == max(r["total_ms"] for r in seen)
+
+    def test_trace_memory_reports_peak(self, invoice_pdf):
+        with ExtractionProfiler(trace_memory=True) as profiler:
+            extract_data_from_pdf(invoice_pdf(2025))
+
+        assert profiler.records[0]["stages"]["layout_text"]["peak_kib"] > 0
+
+    def test_hooks_are_noop_without_profiler(self, invoice_pdf):
+        with profile_stage("open"):
+            df_fin, _ = extract_data_from_pdf(invoice_pdf(2025))
+        assert not df_fin.empty
+
+    def test_bulk_import_writes_profile(self, invoice_pdf, tmp_dir):
+        invoice_pdf(2025)
+        invoice_pdf(2026)
+        jsonl = os.path.join(tmp_dir, "bulk.jsonl")
+
+        bulk_import(tmp_dir, max_workers=1, save=False, use_cache=False, profile_path=jsonl)
+
+        assert len(load_profile(jsonl)) == 2
@@ -0,0 +1,66 @@
+"""Tests for the explicit Parquet schema of the invoice store."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+import pyarrow as pa
+
+from database.schema import FATURAS_SCHEMA, MEDICAO_SCHEMA, TEXT, conform, to_arrow
+
+
+class TestConform:
+    def test_financial_types(self, sample_faturas_df):
+        df = conform(sample_faturas_df, FATURAS_SCHEMA)
+
+        assert isinstance(df["descricao"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["mes_referencia"].dtype, pd.CategoricalDtype)
+        assert df["quantidade"].dtype == "float32"
+        assert df["valor_total"].dtype == "float64"
+        assert df["data_referencia"].tolist() == [
+            pd.Timestamp("2025-01-01"), pd.Timestamp("2025-02-01"), pd.Timestamp("2025-01-01"),
+        ]
+
+    def test_measurement_types(self):
+        df = conform(pd.DataFrame({
+            "mes_referencia": ["01/2025", "02/2025"],
+            "data_leitura_anterior": ["02/12/2024", "2025-01-02"],
+            "data_leitura_atual": ["02/01/2025", "texto"],
+            "consumo_kwh": ["477", None],
+            "numero_dias": [31.0, None],
+        }), MEDICAO_SCHEMA)
+
+        assert df["data_leitura_anterior"].tolist() == [
+            pd.Timestamp("2024-12-02"), pd.Timestamp("2025-01-02"),
+        ]
+        assert pd.isna(df["data_leitura_atual"].iloc[1])
+        assert df["consumo_kwh"].dtype == "float32"
+        assert df["numero_dias"].dtype == "Int16"
+        assert df["numero_dias"].iloc[0] == 31 and pd.isna(df["numero_dias"].iloc[1])
+
+    def test_keeps_input_and_extra_columns(self, sample_faturas_df):
+        original = sample_faturas_df.copy()
+        df = conform(sample_faturas_df.assign(ano=2025), FATURAS_SCHEMA)
+
+        pd.testing.assert_frame_equal(sample_faturas_df, original)
+        assert df["ano"].dtype == "int64"
+        assert "tarifa_unitaria" not in df.columns
+
+    def test_invalid_reference_has_no_date(self):
+        df = conform(pd.DataFrame({"mes_referencia": ["Não encontrado"]}), FATURAS_SCHEMA)
+
+        assert pd.isna(df["data_referencia"].iloc[0])
+
+
+class TestToArrow:
+    def test_disk_types(self, sample_faturas_df, sample_medicao_df):
+        fat = to_arrow(conform(sample_faturas_df, FATURAS_SCHEMA), FATURAS_SCHEMA).schema
+        med = to_arrow(conform(sample_medicao_df, MEDICAO_SCHEMA), MEDICAO_SCHEMA).schema
+
+        assert fat.field("descricao").type == TEXT
+        assert fat.field("data_referencia").type == pa.date32()
+        assert fat.field("quantidade").type == pa.float32()
+        assert med.field("numero_dias").type == pa.int16()
+        assert med.field("consumo_kwh").type == pa.float32()
@@ -0,0 +1,124 @@
+"""Tests for the streaming ingestion API."""
+
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+from synthetic_invoices import generate_statement
+
+import services.streaming as streaming
+from services.extractor import (
+    FINANCIAL_FIELDS,
+    MEASUREMENT_FIELDS,
+    ColumnBuffer,
+    extract_data_from_pdf,
+)
+from services.streaming import InvoiceRecord, InvoiceSink, iter_invoice_records
+
+
+def _record(reference, client_id="123"):
+    return InvoiceRecord.from_raw_data(
+        "fake.pdf",
+        {
+            "reference": reference,
+            "client_id": client_id,
+            "items": ColumnBuffer.from_rows(
+                FINANCIAL_FIELDS, [("CIP Municipal", "", "", "", "23.01", "", "", "", "", "")]
+            ),
+            "measurement": ColumnBuffer(MEASUREMENT_FIELDS),
+        },
+    )
+
+
+class TestIterInvoiceRecords:
+    def test_yields_one_record_per_invoice(self, invoice_pdf):
+        first = invoice_pdf(2025)
+        invoice_pdf(2026)
+
+        records = list(iter_invoice_records(os.path.dirname(first)))
+
+        assert [r.key for r in records] == [("01/2025", "12345678"), ("01/2026", "52217494")]
+        assert len(records[0].items) == 3
+        assert records[0].measurement[0].consumo_kwh == "477"
+
+    def test_is_lazy(self, invoice_pdf, monkeypatch):
+        paths = [invoice_pdf(2025, name=f"f{i}.pdf") for i in range(3)]
+        opened = []
+        original = streaming.iter_raw_data
+        monkeypatch.setattr(
+            streaming,
+            "iter_raw_data",
+            lambda path, password=None: opened.append(path) or original(path, password),
+        )
+
+        stream = iter_invoice_records(paths)
+        next(stream)
+
+        assert opened == paths[:1]
+
+    def test_statement_yields_one_record_per_uc(self, tmp_dir):
+        path = os.path.join(tmp_dir, "extrato.pdf")
+        expected = generate_statement(path, invoices=4, seed=2)
+
+        records = list(iter_invoice_records(path))
+
+        assert [r.key for r in records] == [
+            (invoice["reference"], invoice["client_id"]) for invoice in expected
+        ]
+
+    def test_reports_failures(self, invoice_pdf):
+        path = invoice_pdf(2025, password="12345")
+        failed = []
+
+        records = list(iter_invoice_records(path, password="errada", on_error=failed.append))
+
+        assert records == []
+        assert failed == [path]
+
+    def test_record_frames_match_extract_data_from_pdf(self, invoice_pdf):
+        path = invoice_pdf(2026)
+        record = next(iter_invoice_records(path))
+
+        df_fin, df_med = record.to_frames()
+        expected_fin, expected_med = extract_data_from_pdf(path)
+
+        pd.testing.assert_frame_equal(df_fin, expected_fin)
+        pd.testing.assert_frame_equal(df_med, expected_med)
+
+
+class TestInvoiceSink:
+    def test_writes_in_fixed_size_chunks(self):
+        writes = []
+        sink = InvoiceSink(chunk_size=4, save=lambda fin, med: writes.append(len(fin)) or True)
+
+        with sink:
+            for month in range(1, 11):
+                sink.append(_record(f"{month:02d}/2025"))
+                assert len(sink) < 4
+
+        assert writes == [4, 4, 2]
+        assert sink.written == 10
+
+    def test_duplicate_in_chunk_keeps_last(self):
+        saved = []
+        with InvoiceSink(chunk_size=10, save=lambda fin, med: saved.append(fin) or True) as sink:
+            sink.append(_record("01/2025"))
+            sink.append(_record("01/2025"))
+
+        assert len(saved[0]) == 1
+
+    def test_streams_into_store(self, invoice_pdf, tmp_store, tmp_dir):
+        for i in range(3):
+            shutil.copy(invoice_pdf(2025), os.path.join(tmp_dir, f"c{i}.pdf"))
+        invoice_pdf(2026)
+
+        with InvoiceSink(chunk_size=2) as sink:
+            for record in iter_invoice_records(tmp_dir):
+                sink.append(record)
+
+        df_fat = tmp_store.load_all_data()[0]
+        assert len(df_fat) == 6
+        assert set(df_fat["mes_referencia"]) == {"01/2025", "01/2026"}
@@ -0,0 +1,63 @@
+"""Tests for the synthetic invoice generator used by tests and benchmarks."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pikepdf
+import pytest
+from synthetic_invoices import br_number, generate_corpus, generate_statement, render_invoice
+
+from services.extractor import extract_data_from_pdf
+
+
+class TestBrNumber:
+    @pytest.mark.parametrize(
+        "value,decimals,expected",
+        [(477, 2, "477,00"), (1234.5, 2, "1.234,50"), (0.01885, 5, "0,01885")],
+    )
+    def test_format(self, value, decimals, expected):
+        assert br_number(value, decimals) == expected
+
+
+class TestRenderInvoice:
+    def test_2026_has_cmyk_marks_at_page_edge(self):
+        lines = render_invoice(2026)
+        marks = [line[0] for line in lines if isinstance(line, list)]
+        assert marks and all(x == 0 for x, _ in marks)
+
+    def test_cmyk_can_be_disabled(self):
+        assert all(isinstance(line, str) for line in render_invoice(2026, cmyk=False))
+
+
+class TestGenerateCorpus:
+    def test_is_reproducible(self, tmp_dir):
+        first = generate_corpus(os.path.join(tmp_dir, "a"), count=4, seed=7)
+        second = generate_corpus(os.path.join(tmp_dir, "b"), count=4, seed=7)
+
+        def strip(corpus):
+            return [{k: v for k, v in e.items() if k != "path"} for e in corpus]
+
+        assert strip(first) == strip(second)
+
+    def test_invoices_round_trip_through_extractor(self, tmp_dir):
+        corpus = generate_corpus(tmp_dir, count=8, seed=3, password="12345", password_ratio=0.5)
+        assert any(invoice["password"] for invoice in corpus)
+
+        for invoice in corpus:
+            df_fin, df_med = extract_data_from_pdf(invoice["path"], invoice["password"])
+            assert len(df_fin) == invoice["items"]
+            assert df_fin["mes_referencia"].iloc[0] == invoice["reference"]
+            assert str(df_fin["numero_cliente"].iloc[0]) == invoice["client_id"]
+            assert df_med["consumo_kwh"].iloc[0] == invoice["kwh"]
+
+
+class TestGenerateStatement:
+    def test_page_count_matches_split_invoices(self, tmp_dir):
+        path = os.path.join(tmp_dir, "extrato.pdf")
+        expected = generate_statement(path, invoices=10, split_ratio=0.5, trailing_pages=2)
+
+        with pikepdf.open(path) as pdf:
+            assert len(pdf.pages) == sum(invoice["pages"] for invoice in expected) + 2
+        assert len({invoice["client_id"] for invoice in expected}) == 10
@@ -0,0 +1,45 @@
+"""Tests for the in-memory PDF unlocker."""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pikepdf
+
+from services.unlocker import check_is_encrypted, remove_unlocked_copies, unlock_pdf_file
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestUnlockPdfFile:
+    def test_returns_decrypted_bytes_without_writing(self, invoice_pdf, tmp_dir, monkeypatch):
+        data = _read(invoice_pdf(2025, password="12345"))
+        monkeypatch.chdir(tmp_dir)
+        before = sorted(os.listdir(tmp_dir))
+
+        unlocked = unlock_pdf_file(io.BytesIO(data), "12345")
+
+        with pikepdf.open(io.BytesIO(unlocked)) as pdf:
+            assert not pdf.is_encrypted
+        assert sorted(os.listdir(tmp_dir)) == before
+
+    def test_wrong_password_returns_none(self, invoice_pdf):
+        assert unlock_pdf_file(_read(invoice_pdf(2025, password="12345")), "errada") is None
+
+    def test_check_is_encrypted_accepts_bytes(self, invoice_pdf):
+        assert check_is_encrypted(_read(invoice_pdf(2025, password="12345"))) is True
+        assert check_is_encrypted(_read(invoice_pdf(2026))) is False
+
+
+class TestRemoveUnlockedCopies:
+    def test_removes_only_unlocked_copies(self, tmp_dir):
+        for name in ["unlocked_a.pdf", "unlocked_b.pdf", "fatura.pdf"]:
+            open(os.path.join(tmp_dir, name), "w").close()
+
+        assert remove_unlocked_copies(tmp_dir) == 2
+        assert os.listdir(tmp_dir) == ["fatura.pdf"]
@@ -0,0 +1,225 @@
+"""Tests for the watch-folder ingestion daemon."""
+
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from synthetic_invoices import generate_statement
+
+from services.cache import hash_pdf_file
+from services.extractor import extract_data_from_pdf
+from services.watcher import (
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_PROCESSED,
+    IngestionDaemon,
+    IngestionManifest,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _inbox(tmp_dir):
+    folder = os.path.join(tmp_dir, "inbox")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _daemon(folder, **kwargs):
+    kwargs.setdefault("max_workers", 1)
+    kwargs.setdefault("debounce", 0)
+    kwargs.setdefault("use_cache", False)
+    return IngestionDaemon(folder, **kwargs)
+
+
+class TestIngestionManifest:
+    def test_latest_entry_wins_after_reload(self, tmp_dir):
+        path = os.path.join(tmp_dir, "manifest.jsonl")
+        manifest = IngestionManifest(path)
+        manifest.record("abc", "a.pdf", STATUS_FAILED, error="senha")
+        manifest.record("abc", "a.pdf", STATUS_PROCESSED)
+
+        reloaded = IngestionManifest(path)
+
+        assert reloaded.get("abc")["status"] == STATUS_PROCESSED
+        assert len(reloaded) == 1
+
+    def test_failed_entries_are_retried_only_on_request(self, tmp_dir):
+        manifest = IngestionManifest(os.path.join(tmp_dir, "manifest.jsonl"))
+        manifest.record("abc", "a.pdf", STATUS_FAILED, error="senha")
+
+        assert manifest.should_process("abc") is False
+        assert manifest.should_process("abc", retry_failed=True) is True
+        assert manifest.should_process("outro") is True
+
+    def test_truncated_line_is_ignored(self, tmp_dir):
+        path = os.path.join(tmp_dir, "manifest.jsonl")
+        IngestionManifest(path).record("abc", "a.pdf", STATUS_PROCESSED)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"content_hash": "de')
+
+        assert IngestionManifest(path).get("abc")["status"] == STATUS_PROCESSED
+
+
+class TestIngestionDaemon:
+    def test_scan_and_poll_saves_micro_batch(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        invoice_pdf(2025, name="inbox/a.pdf")
+        invoice_pdf(2026, name="inbox/b.pdf")
+        daemon = _daemon(folder)
+
+        daemon.scan()
+        daemon.poll(force=True)
+
+        df_fat = tmp_store.load_all_data()[0]
+        assert set(df_fat["mes_referencia"]) == {"01/2025", "01/2026"}
+        assert len(daemon.manifest.entries(STATUS_PROCESSED)) == 2
+
+    def test_batch_waits_for_size_or_interval(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        invoice_pdf(2025, name="inbox/a.pdf")
+        clock = FakeClock()
+        saves = []
+        daemon = _daemon(
+            folder, batch_size=5, batch_interval=10, clock=clock,
+            save=lambda *frames: saves.append(frames) or True, known_keys=set(),
+        )
+
+        daemon.scan()
+        daemon.poll()
+        assert saves == []
+
+        clock.now = 10
+        daemon.poll()
+        assert len(saves) == 1
+
+    def test_debounce_waits_for_quiet_file(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        path = invoice_pdf(2025, name="inbox/a.pdf")
+        clock = FakeClock()
+        daemon = _daemon(folder, debounce=2, batch_interval=0, clock=clock)
+
+        daemon.schedule(path)
+        clock.now = 1
+        daemon.poll()
+        assert len(daemon.manifest) == 0
+
+        clock.now = 2
+        daemon.poll()
+        assert len(daemon.manifest) == 1
+
+    def test_restart_does_not_reprocess(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        invoice_pdf(2025, name="inbox/a.pdf")
+        first = _daemon(folder)
+        first.scan()
+        first.poll(force=True)
+
+        saves = []
+        second = _daemon(folder, save=lambda *frames: saves.append(frames) or True)
+        second.scan()
+        second.poll(force=True)
+
+        assert saves == []
+
+    def test_invoice_already_in_store_is_duplicate(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        original = invoice_pdf(2025, name="inbox/a.pdf")
+        daemon = _daemon(folder)
+        daemon.scan()
+        daemon.poll(force=True)
+
+        # Mesmo conteúdo lógico com outro hash: só a checagem no banco pega
+        with open(original, "ab") as f:
+            f.write(b"\n% reenviado\n")
+        shutil.move(original, os.path.join(folder, "reenvio.pdf"))
+        restarted = _daemon(folder)
+        restarted.scan()
+        restarted.poll(force=True)
+
+        statuses = sorted(e["status"] for e in restarted.manifest.entries())
+        assert statuses == [STATUS_DUPLICATE, STATUS_PROCESSED]
+        assert len(tmp_store.load_all_data()[0]) == 3
+
+    def test_invoice_imported_after_start_is_duplicate(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        path = invoice_pdf(2025, name="inbox/a.pdf")
+        saves = []
+        daemon = _daemon(folder, save=lambda *frames: saves.append(frames) or True)
+
+        # Importada pelo app (ou bulk_import) com o daemon já rodando
+        tmp_store.save_data(*extract_data_from_pdf(path))
+        daemon.scan()
+        daemon.poll(force=True)
+
+        assert saves == []
+        assert daemon.manifest.get(hash_pdf_file(path))["status"] == STATUS_DUPLICATE
+
+    def test_shutdown_waits_for_compaction(self, invoice_pdf, tmp_dir, tmp_store, monkeypatch):
+        import database
+
+        calls = []
+        monkeypatch.setattr(database, "wait_for_compaction", lambda: calls.append("wait"))
+        folder = _inbox(tmp_dir)
+        invoice_pdf(2025, name="inbox/a.pdf")
+        daemon = _daemon(folder)
+
+        daemon.scan()
+        daemon.shutdown()
+
+        assert daemon.manifest.entries()[0]["status"] == STATUS_PROCESSED
+        assert calls == ["wait"]
+
+    def test_statement_checks_each_uc(self, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        generate_statement(os.path.join(folder, "parcial.pdf"), invoices=2, seed=2)
+        daemon = _daemon(folder)
+        daemon.scan()
+        daemon.poll(force=True)
+
+        expected = generate_statement(os.path.join(folder, "extrato.pdf"), invoices=4, seed=2)
+        restarted = _daemon(folder)
+        restarted.scan()
+        restarted.poll(force=True)
+
+        entry = restarted.manifest.get(hash_pdf_file(os.path.join(folder, "extrato.pdf")))
+        assert entry["status"] == STATUS_PROCESSED
+        assert entry["invoices"] == 2
+        df_fat = tmp_store.load_all_data()[0]
+        assert set(df_fat["numero_cliente"]) == {invoice["client_id"] for invoice in expected}
+
+    def test_failed_file_is_recorded(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        invoice_pdf(2025, password="12345", name="inbox/a.pdf")
+        daemon = _daemon(folder, password="errada")
+
+        daemon.scan()
+        daemon.poll(force=True)
+
+        [entry] = daemon.manifest.entries()
+        assert entry["status"] == STATUS_FAILED
+        assert entry["error"]
+        assert not os.path.exists(tmp_store.DIR_FATURAS)
+
+    def test_observer_picks_up_new_file(self, invoice_pdf, tmp_dir, tmp_store):
+        folder = _inbox(tmp_dir)
+        daemon = _daemon(folder, debounce=0.2, batch_interval=0)
+
+        with daemon:
+            invoice_pdf(2025, name="inbox/a.pdf")
+            deadline = time.monotonic() + 10
+            while not daemon.manifest.entries() and time.monotonic() < deadline:
+                time.sleep(0.1)
+                daemon.poll()
+
+        assert daemon.manifest.entries()[0]["status"] == STATUS_PROCESSED
+        assert os.path.exists(tmp_store.DIR_FATURAS)